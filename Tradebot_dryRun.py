@@ -1,70 +1,92 @@
-from ib_insync import *
-import pandas as pd
-from dotenv import load_dotenv
 import os
 
+from artifacts import read_artifact
+from execution import ExecutionEngine, WORKING
+from tradelog import TradeLog
+
 # === Top-level flag ===
 USE_ENV = "paper"  # ⬅️ Change to "live" for live trading
+LOG_FILE = "tradebot_dryrun_log_%s.txt"   # % session date (engine clock)
+REQUIRED_ENV = ("IB_HOST", "IB_PORT", "IB_CLIENT_ID")
+
+def load_config(use_env=USE_ENV):
+    """Loads .env.<use_env> and reads the connection settings."""
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=f".env.{use_env}")
+    missing = [name for name in REQUIRED_ENV if not os.getenv(name)]
+    if missing:
+        raise SystemExit(f"⛔ Missing {', '.join(missing)} in .env.{use_env}")
+    return {
+        "IB_HOST": os.getenv("IB_HOST"),
+        "IB_PORT": int(os.getenv("IB_PORT")),
+        "IB_CLIENT_ID": int(os.getenv("IB_CLIENT_ID")),
+        "ACCOUNT_ID": os.getenv("ACCOUNT_ID"),
+    }
+
+async def session(engine, log):
+    from ib_insync import LimitOrder, Stock
+
+    # === Connect ===
+    await engine.connect()
+    log(f"✅ Connected to IB Gateway ({USE_ENV.upper()})", "connected")
+
+    # ===  Cancel Existing Orders ===
+    open_trades = engine.ib.openTrades()
+    if open_trades:
+        log(f"🚫 Canceling {len(open_trades)} open orders...", "cancel_all", orders=len(open_trades))
+        await engine.cancel_all_open(timeout=2)
+    else:
+        log("✅ No open orders to cancel.")
+
+    # === Load CSV ===
+    watchlist = read_artifact("buyalert", "buyalert.csv").dropna(how='any')
+    log(f"📊 Loaded {len(watchlist)} stocks from buyalert.csv", "loaded", rows=len(watchlist))
 
-# === Load selected .env ===
-env_file = f".env.{USE_ENV}"
-load_dotenv(dotenv_path=env_file)
-
-# === Read from env ===
-IB_HOST = os.getenv("IB_HOST")
-IB_PORT = int(os.getenv("IB_PORT"))
-IB_CLIENT_ID = int(os.getenv("IB_CLIENT_ID"))
-ACCOUNT_ID = os.getenv("ACCOUNT_ID")
-
-print(f"🔧 Loaded config: {USE_ENV.upper()}")
-
-# === Connect ===
-ib = IB()
-ib.connect(IB_HOST, IB_PORT, clientId=IB_CLIENT_ID)
-print(f"✅ Connected to IB Gateway ({USE_ENV.upper()})")
-
-# ===  Cancel Existing Orders ===
-open_orders = ib.openOrders()
-if open_orders:
-    print(f"🚫 Canceling {len(open_orders)} open orders...")
-    for o in open_orders:
-        ib.cancelOrder(o)
-    ib.sleep(2)
-else:
-    print("✅ No open orders to cancel.")
-
-# === Load CSV ===
-watchlist = pd.read_csv('buyalert.csv').dropna(how='any')
-print(f"📊 Loaded {len(watchlist)} stocks from buyalert.csv")
-
-# === Process each stock ===
-for _, row in watchlist.iterrows():
-    ticker = row['Ticker']
-    buy_price = float(row['BuyPrice'])
-    stop_loss = float(row['StopLossPrice'])
-    allocated = float(row['AllocatedAmount'])
-
-    qty = int(allocated // buy_price)
-    if qty < 1:
-        print(f"⚠️ Skipping {ticker} — not enough allocation for even 1 share.")
-        continue
-
-    # === Build contract ===
-    contract = Stock(ticker, 'SMART', 'USD')
-
-    # === Build limit order ===
-    order = LimitOrder('BUY', qty, buy_price, tif='DAY')
-
-    # === Submit ===
-    trade = ib.placeOrder(contract, order)
-    print(f"📩 Submitted LIMIT order for {ticker}: {qty} @ ${buy_price}")
-
-    # Optional: Wait and display order status
-    ib.sleep(1)
-    print(f"🧾 Order Status: {trade.orderStatus.status}")
+    # === Process each stock ===
+    submitted = []
+    for _, row in watchlist.iterrows():
+        ticker = row['Ticker']
+        buy_price = float(row['BuyPrice'])
+        stop_loss = float(row['StopLossPrice'])
+        allocated = float(row['AllocatedAmount'])
+
+        qty = int(allocated // buy_price)
+        if qty < 1:
+            log(f"⚠️ Skipping {ticker} — not enough allocation for even 1 share.", "skip",
+                symbol=ticker, reason="allocation below 1 share")
+            continue
+
+        # === Build contract ===
+        contract = Stock(ticker, 'SMART', 'USD')
+
+        # === Build limit order ===
+        order = LimitOrder('BUY', qty, buy_price, tif='DAY')
+
+        # === Submit ===
+        submitted.append(engine.submit(ticker, contract, order))
+        log(f"📩 Submitted LIMIT order for {ticker}: {qty} @ ${buy_price}", "order", symbol=ticker,
+            qty=qty, limit=buy_price, stop_loss=stop_loss, order_id=order.orderId)
+
+    await engine.wait_all(submitted, timeout=5, states=(WORKING,))
+    for order in submitted:
+        log(f"🧾 Order Status {order.symbol}: {order.trade.orderStatus.status}", "status",
+            symbol=order.symbol, status=order.trade.orderStatus.status, order_id=order.trade.order.orderId)
 
     watchlist['Quantity'] = watchlist['AllocatedAmount'] // watchlist['BuyPrice']
     watchlist.to_csv('executed_orders_log.csv', index=False)
 
-ib.disconnect()
-print("🚪 Disconnected from IB Gateway")
+def main():
+    config = load_config()
+    engine = ExecutionEngine(client_id=config["IB_CLIENT_ID"], host=config["IB_HOST"], port=config["IB_PORT"])
+    log = TradeLog(LOG_FILE % engine.clock.now().date(), clock=engine.clock)
+    engine.log = log
+    log(f"🔧 Loaded config: {USE_ENV.upper()}", "config", env=USE_ENV)
+    try:
+        engine.run(session(engine, log))
+    finally:
+        engine.close()
+        log("🚪 Disconnected from IB Gateway", "disconnected")
+        log.close()
+
+if __name__ == "__main__":
+    main()
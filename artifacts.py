@@ -0,0 +1,152 @@
+"""
+Typed Stage Artifacts (screening -> ranking -> sizing -> execution handoff)
+---------------------------------------------------------------
+- SCHEMAS declares the required columns and dtypes of every handoff
+  table; extra columns pass through untouched
+- write_artifact() validates and coerces first, so a missing StopLoss
+  or a non-numeric EntryPrice fails when the file is written, not when
+  an order is built from it
+- Tables are written as Parquet (typed, columnar, fast to load) and
+  optionally as Arrow IPC (.arrow, uncompressed, memory-mapped on
+  read); the CSV copy is kept for humans and spreadsheets
+- read_artifact() loads the freshest of <stem>.arrow / .parquet / .csv
+  (a hand-edited CSV wins over an older binary copy) and validates it
+- pyarrow is optional and imported lazily: without it only the CSV is
+  written and read, with a one-time notice
+
+Example:
+    write_artifact(sized_df, "sizing", "position_sizing_output.csv")
+    df = read_artifact("sizing", "position_sizing_output.csv")
+
+Optional:  pip install pyarrow
+"""
+
+import importlib.util
+import os
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+# stage -> {column: dtype}; dtypes: "string", "float", "int"
+SCHEMAS = {
+    "rs_ranked": {"Ticker": "string", "Price": "float", "RS_Score": "float"},
+    "buy_list": {"Ticker": "string", "Price": "float", "ATR%": "float",
+                 "Base_Duration_Days": "int", "RS_Rating": "float"},
+    "candidates": {"Symbol": "string", "EntryPrice": "float", "StopLoss": "float"},
+    "sizing": {"Symbol": "string", "EntryPrice": "float", "StopLoss": "float", "PositionSize": "int"},
+    "buyalert": {"Ticker": "string", "BuyPrice": "float", "StopLossPrice": "float",
+                 "AllocatedAmount": "float"},
+}
+DECISION_KEYS = ("phase", "market", "portfolio_value")
+
+FORMATS = ("parquet", "csv")           # default outputs; add "ipc" for .arrow
+EXTENSIONS = {"ipc": ".arrow", "parquet": ".parquet", "csv": ".csv"}
+_warned = False
+
+
+def have_pyarrow():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _binary_formats_available():
+    global _warned
+    if have_pyarrow():
+        return True
+    if not _warned:
+        print("pyarrow not installed - CSV artifacts only (pip install pyarrow)")
+        _warned = True
+    return False
+
+
+def validate(df, stage):
+    """
+    Checks the stage's required columns and coerces their dtypes.
+    Returns a new DataFrame; raises ValueError naming the stage and column.
+    """
+    schema = SCHEMAS[stage]
+    missing = [col for col in schema if col not in df.columns]
+    if missing:
+        raise ValueError(f"{stage}: missing column(s): {', '.join(missing)}")
+
+    out = df.copy()
+    for col, dtype in schema.items():
+        if dtype == "string":
+            out[col] = out[col].astype("string")
+            continue
+        try:
+            values = pd.to_numeric(out[col], errors="raise")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{stage}: column {col} is not numeric ({e})") from None
+        if dtype == "int":
+            if values.isna().any():
+                raise ValueError(f"{stage}: column {col} has missing values")
+            values = values.astype("int64")
+        else:
+            values = values.astype("float64")
+        out[col] = values
+    return out
+
+
+def validate_decision(summary):
+    """Raises ValueError if the decision summary dict lacks a DECISION_KEYS entry."""
+    missing = [key for key in DECISION_KEYS if key not in summary]
+    if missing:
+        raise ValueError(f"decision: missing key(s): {', '.join(missing)}")
+    return summary
+
+
+def artifact_paths(path, formats):
+    """{format: file} for the stem of path."""
+    stem = os.path.splitext(path)[0]
+    return {fmt: stem + EXTENSIONS[fmt] for fmt in formats}
+
+
+def write_artifact(df, stage, path, formats=FORMATS):
+    """
+    Validates df against SCHEMAS[stage] and writes it in every format.
+    Returns {format: path written}.
+    """
+    df = validate(df, stage)
+    if any(fmt != "csv" for fmt in formats) and not _binary_formats_available():
+        formats = [fmt for fmt in formats if fmt == "csv"] or ["csv"]
+
+    # CSV first: read_artifact treats a CSV newer than the binary copy as hand-edited
+    formats = sorted(formats, key=lambda fmt: fmt != "csv")
+    written = {}
+    for fmt, target in artifact_paths(path, formats).items():
+        if fmt == "parquet":
+            df.to_parquet(target, index=False)
+        elif fmt == "ipc":
+            from pyarrow import feather
+            feather.write_feather(df.reset_index(drop=True), target, compression="uncompressed")
+        else:
+            df.to_csv(target, index=False)
+        written[fmt] = target
+    return written
+
+
+def _freshest(path):
+    """(format, file) of the newest existing copy; binary wins a tie."""
+    candidates = artifact_paths(path, ("ipc", "parquet", "csv"))
+    if not _binary_formats_available():
+        candidates = {"csv": candidates["csv"]}
+    found = [(os.path.getmtime(f), -i, fmt, f)
+             for i, (fmt, f) in enumerate(candidates.items()) if os.path.exists(f)]
+    if not found:
+        raise FileNotFoundError(path)
+    _, _, fmt, target = max(found)
+    return fmt, target
+
+
+def read_artifact(stage, path):
+    """Loads the freshest copy of path's stem and validates it against SCHEMAS[stage]."""
+    fmt, target = _freshest(path)
+    if fmt == "ipc":
+        from pyarrow import feather
+        df = feather.read_table(target, memory_map=True).to_pandas()
+    elif fmt == "parquet":
+        df = pd.read_parquet(target)
+    else:
+        df = pd.read_csv(target)
+    return validate(df, stage)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Breakout Bracket Backtester (daily bars)
+---------------------------------------------------------------
+- Replays ranked buy lists (Date, Symbol, EntryPrice, StopLoss) against
+  cached daily OHLC panels with the tradebot_phase2 bracket semantics:
+    * the StopLimit BUY lives for the next session only (DAY) and is
+      placed only while price is below EntryPrice (open < EntryPrice)
+    * it fills at EntryPrice when the high reaches it, capped by the
+      ENTRY_BUFFER limit
+    * the GTC protective stop exits at StopLoss, or at the open when
+      a later session gaps through it
+- MAX_POSITIONS cap on concurrent positions, PHASE_RISK_PCT sizing on
+  realized equity (same floor-division as decision_tool.size_positions)
+- Entry and stop-out detection for every signal is vectorized NumPy
+  (sparse-table range minima + batched binary search); the only Python
+  loop walks the triggered trades to apply the cap and sizing
+- breakout_signals() derives daily buy lists from the screener's ATR%
+  and base-duration filters when no recorded lists exist
+
+Example:
+    python backtest.py --period 5y --phase 2
+    python backtest.py --signals buy_lists.csv --phase 3 --max-positions 4
+"""
+
+import argparse
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import PHASE_RISK_PCT
+from panel import build_panels
+from rs_kernel import RS_WEIGHTS
+from screener import ATR_PERIOD, BASE_RANGE, BASE_WINDOW, MAX_ATR_PCT, MIN_BASE_DAYS
+
+MAX_POSITIONS = 2      # tradebot_phase2.MAX_POSITIONS
+ENTRY_BUFFER = 0.005   # tradebot_phase2.ENTRY_BUFFER
+STOP_ATR_MULT = 1.5    # derived signals: StopLoss = EntryPrice - 1.5 x ATR
+CAPITAL = 100000.0
+RS_BARS = {"1M": 15, "3M": 44, "6M": 126}   # sessions in sortwatchlistrs' 21d / 63d / 6mo windows
+NY_TZ = "America/New_York"
+
+FIELDS = ("Open", "High", "Low", "Close")
+SIGNAL_COLUMNS = ["Date", "Symbol", "EntryPrice", "StopLoss"]
+TRADE_COLUMNS = ["Symbol", "SignalDate", "EntryDate", "EntryPrice", "StopLoss", "Shares",
+                 "ExitDate", "ExitPrice", "Exit", "PnL", "R"]
+
+
+# === Signals ===
+def session_dates(panel):
+    """Panel dates as NY session dates (tz-naive midnight)."""
+    return panel.dates.tz_convert(NY_TZ).tz_localize(None).normalize()
+
+
+def rs_scores(close, weights=RS_WEIGHTS, bars=RS_BARS):
+    """
+    Weighted RS_Score for every (date, ticker): percentile rank of each
+    window's return across tickers on that date, weighted like rs_kernel.
+    """
+    close = pd.DataFrame(close)
+    score = 0
+    for window, weight in weights.items():
+        ret = close / close.shift(bars[window]) - 1
+        score = score + ret.rank(axis=1, pct=True).fillna(0) * 100 * weight
+    return np.round(np.asarray(score, dtype=float), 2)
+
+
+def breakout_signals(panels, max_atr_pct=MAX_ATR_PCT, min_base_days=MIN_BASE_DAYS,
+                     window=BASE_WINDOW, pct=BASE_RANGE, period=ATR_PERIOD,
+                     stop_atr_mult=STOP_ATR_MULT, rs_weights=None):
+    """
+    Daily buy lists from the screener filters, evaluated on every date:
+    EntryPrice = highest high of the base window, StopLoss = EntryPrice -
+    stop_atr_mult x ATR. Ranked tightest ATR% first within each date, or
+    by RS_Score (best first) when rs_weights is given.
+    """
+    high = pd.DataFrame(panels["High"].values)
+    low = pd.DataFrame(panels["Low"].values)
+    close = pd.DataFrame(panels["Close"].values)
+
+    prev_close = close.shift(1)
+    tr = np.fmax(high - low, np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+    atr = tr.rolling(period, min_periods=period).mean()
+    atr_pct = atr / close * 100
+
+    base = _rolling_base_duration(close.to_numpy(), window, pct)
+    pivot = high.rolling(window, min_periods=window).max()
+
+    ok = ((atr_pct <= max_atr_pct).to_numpy() & (base >= min_base_days))
+    rows, cols = np.nonzero(ok)
+    dates = session_dates(panels["Close"])
+    entry = np.round(pivot.to_numpy()[rows, cols], 2)
+    stop = np.round(entry - stop_atr_mult * atr.to_numpy()[rows, cols], 2)
+    signals = pd.DataFrame({
+        "Date": dates[rows],
+        "Symbol": np.asarray(panels["Close"].tickers, dtype=object)[cols],
+        "EntryPrice": entry,
+        "StopLoss": stop,
+        "ATR%": np.round(atr_pct.to_numpy()[rows, cols], 2),
+    })
+    if rs_weights is not None:
+        signals["RS_Score"] = rs_scores(close, rs_weights)[rows, cols]
+        order, ascending = ["Date", "RS_Score"], [True, False]
+    else:
+        order, ascending = ["Date", "ATR%"], [True, True]
+    signals = signals[signals["StopLoss"] < signals["EntryPrice"]]
+    return signals.sort_values(order, ascending=ascending, kind="stable").reset_index(drop=True)
+
+
+def _rolling_base_duration(close, window, pct, block=128):
+    """screener.base_duration() for every row: bars in the trailing window within pct of its max."""
+    n, m = close.shape
+    out = np.zeros((n, m))
+    if n < window:
+        return out
+    filled = np.where(np.isnan(close), -np.inf, close)
+    views = np.lib.stride_tricks.sliding_window_view(filled, window, axis=0)   # (n-w+1, m, w)
+    # Blocks of windows keep the temporary (block, m, w) arrays small
+    for start in range(0, views.shape[0], block):
+        chunk = views[start:start + block]
+        highest = chunk.max(axis=2, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            out[window - 1 + start:window - 1 + start + len(chunk)] = (chunk >= highest * pct).sum(axis=2)
+    return out
+
+
+# === Vectorized fill detection ===
+def _sparse_min(values):
+    """table[k][t] = min(values[t : t + 2**k]) per column (NaN counts as +inf)."""
+    table = [np.where(np.isnan(values), np.inf, values)]
+    k = 1
+    while (1 << k) <= values.shape[0]:
+        prev = table[-1]
+        half = 1 << (k - 1)
+        nxt = prev.copy()
+        nxt[:-half] = np.minimum(prev[:-half], prev[half:])
+        table.append(nxt)
+        k += 1
+    return table
+
+
+def _range_min(table, cols, start, end):
+    """min(values[start..end], col) for vectors of (start <= end)."""
+    length = end - start + 1
+    k = np.floor(np.log2(np.maximum(length, 1))).astype(int)
+    out = np.empty(len(cols))
+    for level in np.unique(k):
+        sel = k == level
+        t = table[level]
+        out[sel] = np.minimum(t[start[sel], cols[sel]], t[end[sel] - (1 << level) + 1, cols[sel]])
+    return out
+
+
+def first_touch_below(low, cols, start, last, level):
+    """
+    First row t in [start, last] with low[t, col] <= level, per signal,
+    or -1 when the stop is never touched. Batched binary search over
+    sparse-table range minima (no per-bar loop).
+    """
+    table = _sparse_min(low)
+    hit = _range_min(table, cols, start, last) <= level
+    lo, hi = start[hit].copy(), last[hit].copy()
+    c, lv, s = cols[hit], level[hit], start[hit]
+    while True:
+        active = lo < hi
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        below = _range_min(table, c, s, mid) <= lv
+        hi = np.where(active & below, mid, hi)
+        lo = np.where(active & ~below, mid + 1, lo)
+    out = np.full(len(cols), -1)
+    out[hit] = lo
+    return out
+
+
+def detect_trades(panels, signals, entry_buffer=ENTRY_BUFFER, slippage=0.0, max_hold=None):
+    """
+    Entry and exit bars for every signal at once (before the position cap).
+    Returns a DataFrame with one row per triggered signal, in signal order.
+    """
+    close_panel = panels["Close"]
+    opens, highs, lows, closes = (panels[f].values for f in FIELDS)
+    n = closes.shape[0]
+    dates = session_dates(close_panel)
+    col_of = {t: i for i, t in enumerate(close_panel.tickers)}
+
+    sig = signals[signals["Symbol"].isin(col_of)].reset_index(drop=True)
+    cols = sig["Symbol"].map(col_of).to_numpy(dtype=int)
+    # The list is built after the signal date's close; the order works the next session
+    signal_row = dates.searchsorted(pd.to_datetime(sig["Date"]).to_numpy(), side="right") - 1
+    entry_row = signal_row + 1
+    valid = (signal_row >= 0) & (entry_row < n)
+
+    stop_px = sig["EntryPrice"].to_numpy(dtype=float)
+    sl_px = sig["StopLoss"].to_numpy(dtype=float)
+    limit_px = np.round(stop_px * (1 + entry_buffer), 2)
+    fill_px = np.round(stop_px * (1 + slippage), 2)
+
+    er = np.clip(entry_row, 0, n - 1)
+    o, h = opens[er, cols], highs[er, cols]
+    with np.errstate(invalid="ignore"):
+        armed = o < stop_px                       # bot only places while last < EntryPrice
+        triggered = valid & armed & (h >= stop_px) & (fill_px <= limit_px) & (sl_px < stop_px)
+
+    idx = np.nonzero(triggered)[0]
+    cols, er = cols[idx], er[idx]
+    last = np.full(len(idx), n - 1)
+    if max_hold is not None:
+        last = np.minimum(last, er + max_hold - 1)
+    exit_row = first_touch_below(lows, cols, er, last, sl_px[idx])
+
+    stopped = exit_row >= 0
+    exit_row = np.where(stopped, exit_row, last)
+    with np.errstate(invalid="ignore"):
+        gap_open = opens[exit_row, cols]
+        stop_exit = np.where((exit_row > er) & (gap_open < sl_px[idx]), gap_open, sl_px[idx])
+    close_exit = pd.DataFrame(closes).ffill().to_numpy()[exit_row, cols]
+    exit_px = np.where(stopped, stop_exit, close_exit)
+    reason = np.where(stopped, "stop", np.where(exit_row == n - 1, "end", "max_hold"))
+
+    return pd.DataFrame({
+        "Symbol": sig["Symbol"].to_numpy()[idx],
+        "SignalDate": dates[signal_row[idx]],
+        "EntryRow": er,
+        "ExitRow": exit_row,
+        "Col": cols,
+        "EntryPrice": fill_px[idx],
+        "StopLoss": sl_px[idx],
+        "ExitPrice": np.round(exit_px, 2),
+        "Exit": reason,
+    })
+
+
+# === Event loop over trades: position cap + sizing ===
+def apply_portfolio(candidates, capital=CAPITAL, phase=2, max_positions=MAX_POSITIONS,
+                    vol_factor=1.0):
+    """
+    Walks triggered signals by entry session (list order within a
+    session), keeps at most max_positions open and sizes each entry with
+    floor(equity * PHASE_RISK_PCT[phase] / risk per share), limited by cash.
+    Like the bot, never holds a symbol twice: a repeat signal for a symbol
+    that is still open is skipped.
+    """
+    risk_pct = PHASE_RISK_PCT[phase]
+    equity = cash = float(capital)
+    open_heap = []      # (exit_row, seq, shares, exit_price, entry_price, symbol)
+    held = set()
+    shares_out = np.zeros(len(candidates), dtype=int)
+
+    rows = candidates[["EntryRow", "ExitRow", "EntryPrice", "StopLoss", "ExitPrice", "Symbol"]].to_numpy()
+    for i, (entry_row, exit_row, entry_px, stop, exit_px, symbol) in enumerate(rows):
+        # Positions exited by this session (same-bar exits included) free their slot and cash
+        while open_heap and open_heap[0][0] <= entry_row:
+            _, _, sh, xp, ep, sym = heapq.heappop(open_heap)
+            cash += sh * xp
+            equity += sh * (xp - ep)
+            held.discard(sym)
+        if len(open_heap) >= max_positions or symbol in held:
+            continue
+        shares = int(equity * risk_pct // ((entry_px - stop) * vol_factor))
+        shares = min(shares, int(cash // entry_px))
+        if shares <= 0:
+            continue
+        cash -= shares * entry_px
+        shares_out[i] = shares
+        heapq.heappush(open_heap, (exit_row, i, shares, exit_px, entry_px, symbol))
+        held.add(symbol)
+
+    trades = candidates.assign(Shares=shares_out)
+    return trades[trades["Shares"] > 0].reset_index(drop=True)
+
+
+def equity_curve(trades, panels, capital=CAPITAL):
+    """Daily mark-to-market equity from the taken trades (vectorized)."""
+    n = panels["Close"].values.shape[0]
+    # Only the traded columns are needed
+    traded, c = np.unique(trades["Col"].to_numpy(dtype=int), return_inverse=True)
+    closes = pd.DataFrame(panels["Close"].values[:, traded]).ffill().to_numpy()
+    holdings = np.zeros((n + 1, len(traded)))
+    cash = np.zeros(n + 1)
+    er, xr = (trades[k].to_numpy(dtype=int) for k in ("EntryRow", "ExitRow"))
+    sh = trades["Shares"].to_numpy(dtype=float)
+    np.add.at(holdings, (er, c), sh)
+    np.add.at(holdings, (xr, c), -sh)
+    np.add.at(cash, er, -sh * trades["EntryPrice"].to_numpy())
+    np.add.at(cash, xr, sh * trades["ExitPrice"].to_numpy())
+    held = np.cumsum(holdings[:n], axis=0)
+    value = capital + np.cumsum(cash[:n]) + np.nansum(held * closes, axis=1)
+    return pd.Series(value, index=session_dates(panels["Close"]), name="Equity")
+
+
+def summarize(trades, equity, capital=CAPITAL):
+    if equity.empty:
+        return {"trades": 0, "return_%": 0.0, "cagr_%": 0.0, "max_drawdown_%": 0.0,
+                "hit_rate_%": 0.0, "avg_R": 0.0}
+    years = max((equity.index[-1] - equity.index[0]).days / 365.25, 1e-9)
+    peak = equity.cummax()
+    final = equity.iloc[-1]
+    return {
+        "trades": int(len(trades)),
+        "return_%": round(float(final / capital - 1) * 100, 2),
+        "cagr_%": round(float((final / capital) ** (1 / years) - 1) * 100, 2) if final > 0 else -100.0,
+        "max_drawdown_%": round(float(((equity - peak) / peak).min() * -100), 2),
+        "hit_rate_%": round(float((trades["PnL"] > 0).mean() * 100), 2) if len(trades) else 0.0,
+        "avg_R": round(float(trades["R"].mean()), 2) if len(trades) else 0.0,
+    }
+
+
+def prepare_candidates(panels, signals, entry_buffer=ENTRY_BUFFER, slippage=0.0, max_hold=None):
+    """Triggered signals ordered by entry session (buy-list order within a session)."""
+    missing = [c for c in SIGNAL_COLUMNS if c not in signals.columns]
+    if missing:
+        raise ValueError(f"Missing signal columns: {missing}")
+    candidates = detect_trades(panels, signals, entry_buffer, slippage, max_hold)
+    return candidates.sort_values("EntryRow", kind="stable").reset_index(drop=True)
+
+
+def simulate_portfolio(panels, candidates, capital=CAPITAL, phase=2, max_positions=MAX_POSITIONS):
+    """Cap + sizing + equity for prepared candidates. Returns (trades, equity, summary)."""
+    trades = apply_portfolio(candidates, capital, phase, max_positions)
+
+    equity = equity_curve(trades, panels, capital)
+    dates = equity.index
+    trades["EntryDate"] = dates[trades["EntryRow"].to_numpy()]
+    trades["ExitDate"] = dates[trades["ExitRow"].to_numpy()]
+    trades["PnL"] = np.round(trades["Shares"] * (trades["ExitPrice"] - trades["EntryPrice"]), 2)
+    trades["R"] = np.round((trades["ExitPrice"] - trades["EntryPrice"])
+                           / (trades["EntryPrice"] - trades["StopLoss"]), 2)
+    trades = trades[TRADE_COLUMNS]
+    return trades, equity, summarize(trades, equity, capital)
+
+
+def run_backtest(panels, signals, capital=CAPITAL, phase=2, max_positions=MAX_POSITIONS,
+                 entry_buffer=ENTRY_BUFFER, slippage=0.0, max_hold=None):
+    """Returns (trades DataFrame, daily equity Series, summary dict)."""
+    candidates = prepare_candidates(panels, signals, entry_buffer, slippage, max_hold)
+    return simulate_portfolio(panels, candidates, capital, phase, max_positions)
+
+
+def load_panels(tickers, period="5y", store=None):
+    """Open/High/Low/Close panels for tickers from the price store."""
+    from price_store import PriceStore
+    store = store if store is not None else PriceStore()
+    bulk = store.history_many(tickers, period=period)
+    if bulk.failed:
+        print(f"⚠️ {len(bulk.failed)} of {len(tickers)} tickers returned no data")
+    return build_panels(bulk.frames, FIELDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the breakout entry + stop bracket strategy")
+    parser.add_argument("--signals", help="CSV with Date,Symbol,EntryPrice,StopLoss (default: derived)")
+    parser.add_argument("--watchlist", default="ILAN_COMBINED.csv", help="Universe when deriving signals")
+    parser.add_argument("--period", default="5y", help="History to load (default 5y)")
+    parser.add_argument("--phase", type=int, default=2, choices=sorted(PHASE_RISK_PCT))
+    parser.add_argument("--capital", type=float, default=CAPITAL)
+    parser.add_argument("--max-positions", type=int, default=MAX_POSITIONS)
+    parser.add_argument("--entry-buffer", type=float, default=ENTRY_BUFFER)
+    parser.add_argument("--max-hold", type=int, help="Exit at the close after N sessions")
+    parser.add_argument("--out", default="backtest_trades.csv", help="Trades CSV")
+    args = parser.parse_args()
+
+    if args.signals:
+        signals = pd.read_csv(args.signals)
+        tickers = signals["Symbol"].unique().tolist()
+    else:
+        tickers = pd.read_csv(args.watchlist)["Ticker"].dropna().unique().tolist()
+    panels = load_panels(tickers, args.period)
+    if not args.signals:
+        signals = breakout_signals(panels)
+        print(f"📋 Derived {len(signals)} breakout signals")
+
+    trades, equity, stats = run_backtest(panels, signals, args.capital, args.phase,
+                                         args.max_positions, args.entry_buffer,
+                                         max_hold=args.max_hold)
+    trades.to_csv(args.out, index=False)
+    print(f"✅ {len(trades)} trades → {args.out}")
+    for key, value in stats.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-Time Benchmark (startup budget for the CLI entry points)
+---------------------------------------------------------------
+- Imports each entry-point module in a fresh interpreter (no warm
+  caches shared between runs) and takes the median of several runs
+- Fails when a module exceeds its budget in BUDGETS_MS, or when importing
+  it executes one of the HEAVY modules (pandas, numpy, ib_insync, ...)
+  that should only load lazily once a command actually needs them
+- Exit code 1 on any failure, so the launcher or a cron job can gate on it
+
+Example:
+    python bench_import.py
+    python bench_import.py --runs 9 --module decision_tool=80
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Budget per module, milliseconds of import time (Windows box included)
+BUDGETS_MS = {
+    "decision_tool": 100,
+    "clock": 100,
+    "ib_utils": 150,
+    "execution": 150,
+    "tradebot_phase1": 150,
+    "Tradebot_dryRun": 150,
+    "tradebot_phase2": 150,
+    "pipeline": 150,
+}
+HEAVY = ("pandas", "numpy", "ib_insync", "yfinance", "requests", "bs4", "dotenv")
+RUNS = 5
+
+PROBE = """
+import importlib, json, sys, time, types
+t0 = time.perf_counter()
+importlib.import_module(sys.argv[1])
+ms = (time.perf_counter() - t0) * 1000
+heavy = [m for m in sys.argv[2:] if type(sys.modules.get(m)) is types.ModuleType]
+print(json.dumps({"ms": ms, "heavy": heavy}))
+"""
+
+
+def probe(module, heavy=HEAVY):
+    """{'ms': import ms, 'heavy': [heavy modules executed]} from a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", PROBE, module, *heavy],
+                         capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench(budgets=BUDGETS_MS, runs=RUNS):
+    """[(module, median ms, budget ms, heavy modules loaded)] for every module."""
+    results = []
+    for module, budget in budgets.items():
+        samples = [probe(module) for _ in range(runs)]
+        median = statistics.median(s["ms"] for s in samples)
+        heavy = sorted({m for s in samples for m in s["heavy"]})
+        results.append((module, median, budget, heavy))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budget check for the CLI entry points")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Fresh interpreters per module (median)")
+    parser.add_argument("--module", action="append", default=[], metavar="NAME=MS",
+                        help="Add or override a module budget")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.module:
+        name, _, ms = item.partition("=")
+        budgets[name] = float(ms) if ms else budgets.get(name, 100)
+
+    failed = 0
+    for module, median, budget, heavy in bench(budgets, args.runs):
+        ok = median <= budget and not heavy
+        failed += not ok
+        note = f" | eager: {', '.join(heavy)}" if heavy else ""
+        print(f"{'✅' if ok else '❌'} {module:<18} {median:7.1f} ms (budget {budget:.0f} ms){note}")
+
+    if failed:
+        print(f"⛔ {failed} module(s) over the startup budget")
+        sys.exit(1)
+    print("🏁 All entry points within the startup budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Bulk Multi-Ticker Download
+---------------------------------------------------------------
+- Requests tickers from yfinance in configurable chunks (one
+  yf.download round trip per chunk instead of one per ticker)
+- Splits the wide result back into per-ticker OHLCV frames
+- Retries tickers missing from a chunk with a single-ticker fetch
+- Reports failures as {ticker: reason} instead of printing them
+
+Example:
+    result = download_many(["AAPL", "MSFT"], start=pd.Timestamp("2025-01-01"))
+    result.frames["AAPL"], result.failed
+"""
+
+import pandas as pd
+
+from parallel import run_chunks, split
+
+DEFAULT_CHUNK_SIZE = 100
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class BulkResult:
+    """Per-ticker frames plus {ticker: reason} for tickers that failed."""
+
+    def __init__(self, frames=None, failed=None):
+        self.frames = frames if frames is not None else {}
+        self.failed = failed if failed is not None else {}
+
+    def merge(self, other):
+        self.frames.update(other.frames)
+        for ticker in other.frames:
+            self.failed.pop(ticker, None)
+        for ticker, reason in other.failed.items():
+            if ticker not in self.frames:
+                self.failed[ticker] = reason
+        return self
+
+    def __repr__(self):
+        return "BulkResult(%d frames, %d failed)" % (len(self.frames), len(self.failed))
+
+
+def chunked(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def split_wide(wide, tickers):
+    """Splits a yf.download(group_by='ticker') frame into {ticker: frame}."""
+    frames = {}
+    if wide is None or wide.empty:
+        return frames
+
+    if not isinstance(wide.columns, pd.MultiIndex):
+        # Single ticker without a ticker level
+        if len(tickers) == 1:
+            frames[tickers[0]] = wide.reindex(columns=OHLCV).dropna(how="all")
+        return frames
+
+    level0 = set(wide.columns.get_level_values(0))
+    for ticker in tickers:
+        if ticker not in level0:
+            continue
+        df = wide[ticker].reindex(columns=OHLCV).dropna(how="all")
+        if not df.empty:
+            frames[ticker] = df
+    return frames
+
+
+def _download_chunk(tickers, start, interval, threads=True):
+    import yfinance as yf
+    wide = yf.download(tickers, start=start.strftime("%Y-%m-%d"), interval=interval,
+                       group_by="ticker", auto_adjust=True, ignore_tz=False,
+                       threads=threads, progress=False)
+    return split_wide(wide, tickers)
+
+
+def _fetch_single(fetch_one, ticker, start, interval):
+    try:
+        df = fetch_one(ticker, start, interval)
+    except Exception as e:
+        return ticker, None, "single fetch error: %s" % e
+    if df is None or df.empty:
+        return ticker, None, "no data"
+    return ticker, df, None
+
+
+def download_many(tickers, start, interval="1d", chunk_size=DEFAULT_CHUNK_SIZE,
+                  fetch_one=None, workers=1):
+    """
+    Downloads bars for many tickers, chunk_size tickers per request.
+    Tickers missing from a chunk are retried through fetch_one(ticker,
+    start, interval) when given. workers > 1 sets yfinance's download
+    threads and runs the single-ticker retries on a thread pool.
+    """
+    result = BulkResult()
+    tickers = list(dict.fromkeys(tickers))
+    missing = {}
+
+    for chunk in chunked(tickers, chunk_size):
+        try:
+            frames = _download_chunk(chunk, start, interval,
+                                     threads=workers if workers > 1 else True)
+        except Exception as e:
+            frames = {}
+            reason = "bulk download error: %s" % e
+        else:
+            reason = "no data in bulk download"
+        result.frames.update(frames)
+        missing.update({t: reason for t in chunk if t not in frames})
+
+    if fetch_one is None:
+        result.failed.update(missing)
+        return result
+
+    retried = run_chunks(lambda ts: [_fetch_single(fetch_one, t, start, interval) for t in ts],
+                         split(missing, workers), workers, kind="thread")
+    for ticker, df, error in (r for part in retried for r in part):
+        if df is not None:
+            result.frames[ticker] = df
+        else:
+            result.failed[ticker] = error
+    return result
@@ -0,0 +1,135 @@
+"""
+Clocks for the Tradebot Engine
+---------------------------------------------------------------
+- Everything that reads the time or waits goes through a clock object
+  instead of calling datetime.now() / time.sleep() directly
+- WallClock: real time; sleeps yield to the asyncio loop, so IB events
+  keep being processed while a strategy waits
+- ScaledClock: starts at a chosen time and runs speed times faster than
+  real time (speed=3600 plays a 6.5h session in about 6.5 seconds)
+- VirtualClock: time only moves when every task is waiting on the clock;
+  it then jumps straight to the earliest wake-up, so a full session
+  against a fake gateway replays as fast as its callbacks run
+
+Example:
+    clock = WallClock()
+    await clock.sleep_until(clock.now().replace(hour=10, minute=0))
+"""
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import time
+from zoneinfo import ZoneInfo
+
+NY_TZ = ZoneInfo("America/New_York")
+MAX_SETTLE = 1000      # loop passes a VirtualClock waits for runnable work before jumping
+
+
+class WallClock:
+    """Real time (NY timezone by default)."""
+
+    def now(self, tz=NY_TZ):
+        return datetime.datetime.now(tz=tz)
+
+    def monotonic(self):
+        return time.perf_counter()      # highest-resolution monotonic timer
+
+    async def sleep(self, secs):
+        await asyncio.sleep(max(0.0, secs))
+
+    async def sleep_until(self, when):
+        await self.sleep((when - self.now(when.tzinfo)).total_seconds())
+
+    async def wait_for(self, aw, timeout):
+        """asyncio.wait_for measured on this clock (raises asyncio.TimeoutError)."""
+        return await asyncio.wait_for(aw, timeout)
+
+
+class ScaledClock(WallClock):
+    """Starts at the aware datetime start and runs speed times faster than real time."""
+
+    def __init__(self, start, speed=1.0):
+        self.start = start
+        self.speed = float(speed)
+        self._t0 = time.monotonic()
+
+    def monotonic(self):
+        return (time.monotonic() - self._t0) * self.speed
+
+    def now(self, tz=NY_TZ):
+        return (self.start + datetime.timedelta(seconds=self.monotonic())).astimezone(tz)
+
+    async def sleep(self, secs):
+        await asyncio.sleep(max(0.0, secs) / self.speed)
+
+    async def wait_for(self, aw, timeout):
+        return await asyncio.wait_for(aw, timeout / self.speed)
+
+
+class VirtualClock(WallClock):
+    """
+    Virtual time starting at the aware datetime start. Sleeps are queued;
+    once nothing else is runnable the clock jumps to the earliest one and
+    wakes it. Only for in-process runs (no real network I/O to wait on).
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self._now = start
+        self._timers = []
+        self._seq = itertools.count()
+        self._driver = None
+
+    def monotonic(self):
+        return (self._now - self.start).total_seconds()
+
+    def now(self, tz=NY_TZ):
+        return self._now.astimezone(tz)
+
+    async def sleep(self, secs):
+        if secs <= 0:
+            await asyncio.sleep(0)
+            return
+        fut = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._timers, (self._now + datetime.timedelta(seconds=secs),
+                                      next(self._seq), fut))
+        if self._driver is None or self._driver.done():
+            self._driver = asyncio.ensure_future(self._drive())
+        await fut
+
+    async def wait_for(self, aw, timeout):
+        """
+        asyncio.wait_for on virtual time. On every exit (result, timeout or
+        the caller being canceled) the timer and the awaited task are
+        canceled and awaited, so nothing is left pending.
+        """
+        task = asyncio.ensure_future(aw)
+        timer = asyncio.ensure_future(self.sleep(timeout))
+        try:
+            await asyncio.wait({task, timer}, return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                return task.result()
+            raise asyncio.TimeoutError()
+        finally:
+            task.cancel()
+            timer.cancel()
+            await asyncio.wait({task, timer})
+
+    async def _settle(self):
+        """Yields until the loop has no ready callbacks left."""
+        loop = asyncio.get_event_loop()
+        for _ in range(MAX_SETTLE):
+            await asyncio.sleep(0)
+            if not getattr(loop, "_ready", None):
+                return
+
+    async def _drive(self):
+        while self._timers:
+            await self._settle()
+            when, _, fut = heapq.heappop(self._timers)
+            if fut.done():
+                continue        # canceled wait
+            self._now = max(self._now, when)
+            fut.set_result(None)
@@ -18,14 +18,33 @@ Example:
         --csv shortlisted.csv \
         --out position_sizing_output.csv \
         --json summary.json
+
+Multi-account sizing (candidate × account share matrix):
+    python decision_tool.py ... --accounts main=60000 ira=25000 \
+        --matrix-out position_sizing_matrix.csv
+
+Batch mode (no per-scenario process start):
+    python decision_tool.py --scenarios scenarios.csv --scenarios-out scenario_results.csv
+    python decision_tool.py --equity-stats daily_stats.parquet --paths-out phase_paths.csv
+
+scenarios.csv columns: last_phase, market, wins_2r, both_to_breakeven,
+drawdown_pct, growth_since_high_pct, consistency_days (optional portfolio).
+Equity stats use the same columns without last_phase (optional date).
 """
 
+from __future__ import annotations
+
 import sys
-import math
 import argparse
-import pandas as pd
 import json
 
+from artifacts import read_artifact, validate_decision, write_artifact
+from lazy_imports import lazy_import
+
+# Imported on first use: --help and a RED-market exit never load them
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 ALLOWED_PHASES_BY_MARKET = {
     "red": [],
     "yellow": [1, 2],
@@ -89,50 +108,274 @@ def decide_phase(last_phase:int,
 
     return phase, messages
 
-def size_positions(df: pd.DataFrame, portfolio_value: float, phase: int):
-    risk_pct = PHASE_RISK_PCT[phase]
-    total_risk_dollars = portfolio_value * risk_pct
+# === Batch scenarios ===
+SCENARIO_COLUMNS = ["last_phase", "market", "wins_2r", "both_to_breakeven",
+                    "drawdown_pct", "growth_since_high_pct", "consistency_days"]
+STATS_COLUMNS = SCENARIO_COLUMNS[1:]
+
+def read_table(path: str) -> pd.DataFrame:
+    """CSV, or Parquet for .parquet/.pq files (needs pyarrow)."""
+    if path.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def _require(df: pd.DataFrame, columns):
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+def _yes(values) -> np.ndarray:
+    text = pd.Series(values).astype(str).str.strip().str.lower()
+    return text.isin(["y", "yes", "true", "1"]).to_numpy()
+
+def _market(values) -> np.ndarray:
+    """Market names capitalized like the single-run --market ("orange" -> "Orange")."""
+    return pd.Series(values).astype(str).str.capitalize().to_numpy()
+
+def _stats_arrays(df: pd.DataFrame):
+    return (_market(df["market"]),
+            df["wins_2r"].to_numpy(dtype=int),
+            _yes(df["both_to_breakeven"]),
+            df["drawdown_pct"].to_numpy(dtype=float),
+            df["growth_since_high_pct"].to_numpy(dtype=float),
+            df["consistency_days"].to_numpy(dtype=int))
+
+def _phase_step(phase, market, wins, breakeven, drawdown, growth, days):
+    """
+    decide_phase's rules on whole arrays. Returns the intermediate arrays
+    needed to rebuild each row's messages; "final" is the decided phase.
+    """
+    phase = np.asarray(phase, dtype=int)
+    risk_pct = np.vectorize(lambda p: PHASE_RISK_PCT.get(p, 0.01), otypes=[float])(phase) * 100.0
+
+    reverted_to = np.maximum(1, phase - 1)
+    reverted = (drawdown >= risk_pct) & (reverted_to != phase)
+    start = np.where(reverted, reverted_to, phase)
+
+    advance = (((start == 1) & breakeven & (wins >= 2))
+               | ((start == 2) & (wins >= 2) & (drawdown < PHASE_RISK_PCT[2] * 100))
+               | ((start == 3) & (growth >= 5.0)))
+    decided = np.where(advance, start + 1, start)
+
+    key = np.char.lower(np.asarray(market, dtype=str))
+    halted = np.ones(len(phase), dtype=bool)
+    capped = decided.copy()
+    for name, allowed in ALLOWED_PHASES_BY_MARKET.items():
+        rows = key == name
+        if not allowed or not rows.any():
+            continue
+        halted[rows] = False
+        allowed = np.array(sorted(allowed))
+        below = np.searchsorted(allowed, decided[rows], side="right") - 1
+        capped[rows] = np.where(below >= 0, allowed[np.maximum(below, 0)], allowed[0])
+
+    return {"risk_pct": risk_pct, "reverted": reverted, "start": start,
+            "advance": advance, "decided": decided, "halted": halted,
+            "gated": ~halted & (capped != decided),
+            "final": np.where(halted, 0, capped)}
+
+def _scenario_messages(step, market, wins, breakeven, drawdown, consistency_days, phase):
+    """Per-row decision messages (same wording as decide_phase), joined by ' | '."""
+    start, decided, final = step["start"], step["decided"], step["final"]
+
+    def fmt(values, spec):
+        return pd.Series(values).map(spec.format)
+
+    parts = []
 
-    for col in ["Symbol", "EntryPrice", "StopLoss"]:
+    parts.append(np.where(step["reverted"],
+        "Reversion: Drawdown " + fmt(drawdown, "{:.2f}") + "% ≥ " + fmt(step["risk_pct"], "{:.2f}")
+        + "%. Phase " + fmt(phase, "{}") + " → " + fmt(start, "{}") + ".", ""))
+    parts.append(np.select(
+        [(start == 1) & step["advance"], start == 1,
+         (start == 2) & step["advance"], start == 2,
+         (start == 3) & step["advance"], start == 3,
+         (start == 4) & (consistency_days >= 90), start == 4],
+        ["Advance: Phase 1 criteria met (both BE + ≥2×2R wins). 1 → 2.",
+         "Remain: Phase 1 criteria not met.",
+         "Advance: Phase 2 criteria met (≥2×2R wins, no DD breach). 2 → 3.",
+         "Remain: Phase 2 criteria not met.",
+         "Advance: Phase 3 criteria met (+5% growth). 3 → 4.",
+         "Remain: Phase 3 criteria not met.",
+         "Maintain: Phase 4 consistency confirmed (≥90 days).",
+         "Maintain: Phase 4 (consistency < 90 days)."], ""))
+    parts.append(np.where(step["halted"], "Market RED: No entries allowed → Phase 0.", ""))
+    parts.append(np.where(step["gated"],
+        "Market gating: Phase " + fmt(decided, "{}") + " not allowed in " + pd.Series(market).astype(str)
+        + ". Capped to " + fmt(final, "{}") + ".", ""))
+
+    rows = np.column_stack(parts)
+    return np.array([" | ".join(m for m in row if m) for row in rows], dtype=object)
+
+def decide_phases(scenarios: pd.DataFrame) -> pd.DataFrame:
+    """
+    Batch decide_phase: one row per scenario (SCENARIO_COLUMNS), evaluated
+    as array operations. Adds Phase, RiskPct, Messages (and RiskDollars
+    when a portfolio column is present) to a copy of scenarios.
+    """
+    _require(scenarios, SCENARIO_COLUMNS)
+    phase = scenarios["last_phase"].to_numpy(dtype=int)
+    market, wins, breakeven, drawdown, growth, days = _stats_arrays(scenarios)
+    step = _phase_step(phase, market, wins, breakeven, drawdown, growth, days)
+
+    out = scenarios.copy()
+    out["market"] = market
+    out["Phase"] = step["final"]
+    out["RiskPct"] = np.vectorize(lambda p: PHASE_RISK_PCT.get(p, 0.0), otypes=[float])(step["final"])
+    if "portfolio" in out.columns:
+        out["RiskDollars"] = out["portfolio"].astype(float) * out["RiskPct"]
+    out["Messages"] = _scenario_messages(step, market, wins, breakeven, drawdown, days, phase)
+    return out
+
+def simulate_phase_paths(stats: pd.DataFrame, start_phases=(1, 2, 3, 4)) -> pd.DataFrame:
+    """
+    Replays a daily equity-stats series (STATS_COLUMNS, optional date):
+    each day's decided phase becomes the next day's last phase. All
+    starting phases advance together, one array step per day.
+    Returns one row per day with a Phase_from_<start> column per path.
+    """
+    _require(stats, STATS_COLUMNS)
+    market, wins, breakeven, drawdown, growth, days = _stats_arrays(stats)
+    phases = np.array(start_phases, dtype=int)
+    path = np.empty((len(stats), len(phases)), dtype=int)
+    for i in range(len(stats)):
+        n = len(phases)
+        phases = _phase_step(phases, np.repeat(market[i], n), np.repeat(wins[i], n),
+                             np.repeat(breakeven[i], n), np.repeat(drawdown[i], n),
+                             np.repeat(growth[i], n), np.repeat(days[i], n))["final"]
+        path[i] = phases
+
+    out = stats[["date"]].copy() if "date" in stats.columns else pd.DataFrame(index=stats.index)
+    for j, start in enumerate(start_phases):
+        out[f"Phase_from_{start}"] = path[:, j]
+    return out
+
+SIZING_COLUMNS = ["Symbol", "EntryPrice", "StopLoss"]
+
+def _risk_arrays(df: pd.DataFrame):
+    """Validated (RiskPerShare, VolFactor, sizeable mask) column arrays."""
+    for col in SIZING_COLUMNS:
         if col not in df.columns:
             raise ValueError(f"Missing column: {col}")
 
-    if "VolFactor" not in df.columns:
-        df["VolFactor"] = 1.0
+    entry = pd.to_numeric(df["EntryPrice"], errors="coerce").to_numpy(dtype=float)
+    stop = pd.to_numeric(df["StopLoss"], errors="coerce").to_numpy(dtype=float)
+    if "VolFactor" in df.columns:
+        vol = pd.to_numeric(df["VolFactor"], errors="coerce").fillna(1.0).to_numpy(dtype=float)
+    else:
+        vol = np.ones(len(df))
+
+    risk = entry - stop
+    with np.errstate(invalid="ignore"):
+        sizeable = (risk > 0) & (vol > 0) & np.isfinite(risk * vol)
+    return risk, vol, sizeable
+
+def _floor_shares(risk_dollars, denom, sizeable):
+    """floor(risk_dollars / denom) where sizeable, else 0 (broadcasts)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = np.floor(risk_dollars / denom)
+    return np.where(sizeable & np.isfinite(shares), shares, 0).astype(np.int64)
+
+def size_positions(df: pd.DataFrame, portfolio_value: float, phase: int):
+    """
+    Adds RiskPerShare / InvalidRisk / PositionSize to a copy of df.
+    Returns (sized copy, total risk dollars); df itself is left untouched.
+    """
+    risk_pct = PHASE_RISK_PCT[phase]
+    total_risk_dollars = portfolio_value * risk_pct
 
-    df["VolFactor"] = df["VolFactor"].fillna(1.0).astype(float)
-    df["RiskPerShare"] = (df["EntryPrice"] - df["StopLoss"]).astype(float)
-    df["InvalidRisk"] = df["RiskPerShare"] <= 0
+    risk, vol, sizeable = _risk_arrays(df)
+    out = df.copy()
+    out["VolFactor"] = vol
+    out["RiskPerShare"] = risk
+    out["InvalidRisk"] = risk <= 0
 
-    if df["InvalidRisk"].any():
+    if out["InvalidRisk"].any():
         print("⚠️ Warning: Some rows have invalid risk (Entry ≤ Stop).")
 
-    def compute_pos(row):
-        if row["InvalidRisk"] or row["VolFactor"] <= 0:
-            return 0
-        denom = row["RiskPerShare"] * row["VolFactor"]
-        return int(math.floor(total_risk_dollars / denom)) if denom > 0 else 0
+    out["PhaseRisk%"] = f"{risk_pct*100:.2f}%"
+    out["PositionSize"] = _floor_shares(total_risk_dollars, risk * vol, sizeable)
+    out["Phase"] = phase
+    return out, total_risk_dollars
+
+def size_matrix(df: pd.DataFrame, accounts, phase):
+    """
+    Share counts for every candidate in every account in one broadcast.
+    accounts: {name: portfolio value} (or a Series); phase: one phase for
+    all accounts or {name: phase}.
+    Returns a (candidate x account) DataFrame indexed by Symbol.
+    """
+    accounts = pd.Series(accounts, dtype=float)
+    if isinstance(phase, dict):
+        risk_pct = accounts.index.map(lambda name: PHASE_RISK_PCT[phase[name]])
+    else:
+        risk_pct = PHASE_RISK_PCT[phase]
+    risk_dollars = accounts.to_numpy() * np.asarray(risk_pct, dtype=float)
+
+    risk, vol, sizeable = _risk_arrays(df)
+    shares = _floor_shares(risk_dollars[None, :], (risk * vol)[:, None], sizeable[:, None])
+    return pd.DataFrame(shares, index=pd.Index(df["Symbol"], name="Symbol"),
+                        columns=accounts.index)
+
+def parse_accounts(items):
+    """['main=60000', 'ira=25000'] -> {'main': 60000.0, 'ira': 25000.0}."""
+    accounts = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if not value:
+            raise ValueError(f"Account must be NAME=VALUE: {item}")
+        accounts[name] = float(value)
+    return accounts
+
+SINGLE_ARGS = ["portfolio", "market", "phase", "wins", "breakeven", "drawdown", "growth", "days", "csv"]
 
-    df["PhaseRisk%"] = f"{risk_pct*100:.2f}%"
-    df["PositionSize"] = df.apply(compute_pos, axis=1)
-    df["Phase"] = phase
-    return df, total_risk_dollars
+def run_batch(args):
+    """--scenarios / --equity-stats: every row in one process, no sizing."""
+    if args.scenarios:
+        results = decide_phases(read_table(args.scenarios))
+        results.to_csv(args.scenarios_out, index=False)
+        print(f"✅ {len(results)} scenarios evaluated → {args.scenarios_out}")
+        print(results["Phase"].value_counts().sort_index().rename("Scenarios").to_string())
+
+    if args.equity_stats:
+        paths = simulate_phase_paths(read_table(args.equity_stats))
+        paths.to_csv(args.paths_out, index=False)
+        print(f"✅ Phase paths over {len(paths)} days → {args.paths_out}")
+        print(paths.tail().to_string(index=False))
 
 def main():
     parser = argparse.ArgumentParser(description="Decision Tool for Progressive Exposure Plan (with JSON output)")
-    parser.add_argument("--portfolio", type=float, required=True, help="Portfolio value in USD")
-    parser.add_argument("--market", type=str, required=True, help="Market condition: Red/Yellow/Orange/Green")
-    parser.add_argument("--phase", type=int, required=True, help="Last confirmed phase (1-4)")
-    parser.add_argument("--wins", type=int, required=True, help="Recent 2R wins")
-    parser.add_argument("--breakeven", type=str, required=True, help="Both positions breakeven (y/n)")
-    parser.add_argument("--drawdown", type=float, required=True, help="Drawdown %% from equity high")
-    parser.add_argument("--growth", type=float, required=True, help="Growth %% since last equity high")
-    parser.add_argument("--days", type=int, required=True, help="Consistency days for Phase 4")
-    parser.add_argument("--csv", type=str, required=True, help="Input CSV filename")
+    parser.add_argument("--portfolio", type=float, help="Portfolio value in USD")
+    parser.add_argument("--market", type=str, help="Market condition: Red/Yellow/Orange/Green")
+    parser.add_argument("--phase", type=int, help="Last confirmed phase (1-4)")
+    parser.add_argument("--wins", type=int, help="Recent 2R wins")
+    parser.add_argument("--breakeven", type=str, help="Both positions breakeven (y/n)")
+    parser.add_argument("--drawdown", type=float, help="Drawdown %% from equity high")
+    parser.add_argument("--growth", type=float, help="Growth %% since last equity high")
+    parser.add_argument("--days", type=int, help="Consistency days for Phase 4")
+    parser.add_argument("--csv", type=str, help="Input CSV filename")
     parser.add_argument("--out", type=str, default="position_sizing_output.csv", help="Output CSV filename")
     parser.add_argument("--json", type=str, help="Optional JSON summary output filename")
+    parser.add_argument("--accounts", nargs="+", metavar="NAME=VALUE",
+                        help="Also size every account (e.g. main=60000 ira=25000)")
+    parser.add_argument("--matrix-out", type=str, default="position_sizing_matrix.csv",
+                        help="Candidate x account share matrix CSV (with --accounts)")
+    parser.add_argument("--scenarios", type=str, help="Batch mode: scenarios CSV/Parquet (SCENARIO_COLUMNS)")
+    parser.add_argument("--scenarios-out", type=str, default="scenario_results.csv",
+                        help="Batch scenario results CSV")
+    parser.add_argument("--equity-stats", type=str,
+                        help="Batch mode: daily equity stats CSV/Parquet to replay phase paths over")
+    parser.add_argument("--paths-out", type=str, default="phase_paths.csv", help="Phase paths CSV")
     args = parser.parse_args()
 
+    if args.scenarios or args.equity_stats:
+        run_batch(args)
+        return
+
+    missing = [f"--{name}" for name in SINGLE_ARGS if getattr(args, name) is None]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+
     portfolio_value = args.portfolio
     market_condition = args.market.capitalize()
     last_phase = args.phase
@@ -161,18 +404,26 @@ def main():
     print(f"✅ Phase {phase} selected ({PHASE_RISK_PCT[phase]*100:.2f}% risk) | Market: {market_condition}")
 
     try:
-        df = pd.read_csv(csv_name)
+        df = read_artifact("candidates", csv_name)
     except FileNotFoundError:
         print(f"⛔ Input file not found: {csv_name}")
         sys.exit(1)
+    except ValueError as e:
+        print(f"⛔ Invalid input {csv_name}: {e}")
+        sys.exit(1)
 
     sized_df, total_risk_dollars = size_positions(df, portfolio_value, phase)
-    sized_df.to_csv(out_name, index=False)
+    write_artifact(sized_df, "sizing", out_name)
 
     print(f"\n✅ Output saved → {out_name}")
     print(f"Total risk: ${total_risk_dollars:,.2f}")
     print(sized_df.head().to_string(index=False))
 
+    if args.accounts:
+        matrix = size_matrix(df, parse_accounts(args.accounts), phase)
+        matrix.to_csv(args.matrix_out)
+        print(f"\n✅ Account size matrix ({matrix.shape[0]}×{matrix.shape[1]}) → {args.matrix_out}")
+
     if json_name:
         summary = {
             "phase": phase,
@@ -185,7 +436,7 @@ def main():
             "decision_messages": reasons,
         }
         with open(json_name, "w") as jf:
-            json.dump(summary, jf, indent=2)
+            json.dump(validate_decision(summary), jf, indent=2)
         print(f"\n📄 JSON summary saved → {json_name}")
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+"""
+Asyncio Order Execution Engine (shared by the tradebot scripts)
+---------------------------------------------------------------
+- Connects with IB.connectAsync and never blocks the event loop: every
+  wait is an awaitable measured on the engine's clock
+- submit() / submit_bracket() return a TrackedOrder, a per-order state
+  machine (PENDING -> WORKING -> FILLED / CANCELLED / REJECTED) driven by
+  the trade's statusEvent, with an awaitable fill
+- call_at() schedules timers (pre-close cancel, market close)
+- A heartbeat task keeps the socket alive; a dropped socket is
+  reconnected in the background and on_reconnect callbacks restore
+  subscriptions
+- Each order is awaited on its own, so one ticker's wait never holds up
+  another ticker's fill
+
+Example:
+    engine = ExecutionEngine(client_id=1, log=log)
+
+    async def strategy(engine):
+        await engine.connect()
+        order = engine.submit("AAPL", contract, LimitOrder("BUY", 10, 150.0))
+        if await order.wait_filled(timeout=5):
+            ...
+        engine.close()
+
+    engine.run(strategy(engine))
+
+Requires:  pip install ib_insync
+"""
+
+import asyncio
+
+from clock import WallClock
+from ib_utils import QUOTE_TIMEOUT, snapshot_prices_async
+from lazy_imports import lazy_import
+
+ib_insync = lazy_import("ib_insync")
+
+IB_HOST = "127.0.0.1"
+IB_PORT = 7497
+HEARTBEAT_SECS = 30     # reqCurrentTime keep-alive interval
+RECONNECT_DELAY = 5     # seconds between reconnect attempts
+
+# === Order states ===
+PENDING = "PENDING"
+WORKING = "WORKING"
+FILLED = "FILLED"
+CANCELLED = "CANCELLED"
+REJECTED = "REJECTED"
+TERMINAL = (FILLED, CANCELLED, REJECTED)
+
+IB_STATES = {
+    "PendingSubmit": PENDING,
+    "ApiPending": PENDING,
+    "PreSubmitted": WORKING,
+    "Submitted": WORKING,
+    "PendingCancel": WORKING,
+    "Filled": FILLED,
+    "Cancelled": CANCELLED,
+    "ApiCancelled": CANCELLED,
+    "Inactive": REJECTED,
+}
+
+TRANSITIONS = {
+    PENDING: {WORKING, FILLED, CANCELLED, REJECTED},
+    WORKING: {FILLED, CANCELLED, REJECTED},
+    FILLED: set(),
+    CANCELLED: set(),
+    REJECTED: set(),
+}
+
+
+class TrackedOrder:
+    """
+    One submitted order. state follows the IB order status through
+    TRANSITIONS; every transition wakes the wait() calls it satisfies.
+    """
+
+    def __init__(self, symbol, trade, clock, children=()):
+        self.symbol = symbol
+        self.trade = trade
+        self.children = list(children)
+        self.clock = clock
+        self.state = PENDING
+        self.history = [PENDING]
+        self._waiters = []
+        trade.statusEvent += self._on_status
+        self._on_status(trade)
+
+    def _on_status(self, trade):
+        new = IB_STATES.get(trade.orderStatus.status)
+        if new is None or new not in TRANSITIONS[self.state]:
+            return
+        self.state = new
+        self.history.append(new)
+        for states, fut in self._waiters:
+            if (new in states or new in TERMINAL) and not fut.done():
+                fut.set_result(new)
+
+    @property
+    def done(self):
+        return self.state in TERMINAL
+
+    @property
+    def fill_price(self):
+        return self.trade.orderStatus.avgFillPrice
+
+    async def wait(self, states=TERMINAL, timeout=None):
+        """
+        Waits until the order reaches one of states (or any terminal
+        state) and returns the state it is in when the wait ends.
+        """
+        if self.state in states or self.done:
+            return self.state
+        waiter = (states, asyncio.get_event_loop().create_future())
+        self._waiters.append(waiter)
+        try:
+            if timeout is None:
+                await waiter[1]
+            else:
+                await self.clock.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._waiters.remove(waiter)
+        return self.state
+
+    async def wait_filled(self, timeout=None):
+        return await self.wait(TERMINAL, timeout) == FILLED
+
+    def __repr__(self):
+        return "TrackedOrder(%s %s %s)" % (self.symbol, self.trade.order.action, self.state)
+
+
+class ExecutionEngine:
+    """
+    Owns the IB connection, the clock and the background tasks
+    (heartbeat, reconnect, timers) for one trading session.
+    """
+
+    def __init__(self, ib=None, client_id=1, host=IB_HOST, port=IB_PORT, clock=None,
+                 log=print, heartbeat_secs=HEARTBEAT_SECS):
+        self.ib = ib if ib is not None else ib_insync.IB()
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.clock = clock if clock is not None else WallClock()
+        self.log = log
+        self.heartbeat_secs = heartbeat_secs
+        self.orders = []
+        self.on_reconnect = []
+        self._tasks = set()
+        self._closing = False
+        self._reconnecting = False
+
+    # --- Connection ---
+    async def connect(self, timeout=4):
+        await self.ib.connectAsync(self.host, self.port, clientId=self.client_id, timeout=timeout)
+        self.ib.disconnectedEvent += self._on_disconnected
+        self.spawn(self._heartbeat())
+
+    def _on_disconnected(self):
+        if not self._closing and not self._reconnecting:
+            self.log("IB socket dropped - reconnecting.")
+            self.spawn(self._reconnect())
+
+    async def _reconnect(self):
+        self._reconnecting = True
+        try:
+            while not self._closing and not self.ib.isConnected():
+                try:
+                    await self.ib.connectAsync(self.host, self.port, clientId=self.client_id)
+                except Exception as e:
+                    self.log("Reconnect failed: %s" % e)
+                    await self.clock.sleep(RECONNECT_DELAY)
+                    continue
+                self.log("Reconnected to IB Gateway.")
+                for callback in self.on_reconnect:
+                    callback()
+        finally:
+            self._reconnecting = False
+
+    async def _heartbeat(self):
+        while not self._closing:
+            await self.clock.sleep(self.heartbeat_secs)
+            if self.ib.isConnected():
+                try:
+                    await self.ib.reqCurrentTimeAsync()     # keep socket alive
+                except Exception as e:
+                    self.log("Heartbeat failed: %s" % e)
+
+    # --- Tasks & timers ---
+    def spawn(self, coro):
+        """Runs coro as a background task that close() cancels."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def call_at(self, when, callback):
+        """Calls callback() once the clock reaches the aware datetime when."""
+        async def timer():
+            await self.clock.sleep_until(when)
+            callback()
+        return self.spawn(timer())
+
+    # --- Orders ---
+    def submit(self, symbol, contract, order):
+        trade = self.ib.placeOrder(contract, order)
+        tracked = TrackedOrder(symbol, trade, self.clock)
+        self.orders.append(tracked)
+        return tracked
+
+    def submit_bracket(self, symbol, contract, parent, *children):
+        """
+        Places parent + children as one bracket: children are linked by
+        parentId and only the last one transmits. Tracks the parent.
+        """
+        parent.orderId = self.ib.client.getReqId()
+        parent.transmit = False
+        for i, child in enumerate(children):
+            child.parentId = parent.orderId
+            child.transmit = i == len(children) - 1
+
+        trade = self.ib.placeOrder(contract, parent)
+        child_trades = [self.ib.placeOrder(contract, child) for child in children]
+        tracked = TrackedOrder(symbol, trade, self.clock, child_trades)
+        self.orders.append(tracked)
+        return tracked
+
+    def cancel(self, tracked):
+        """Cancels tracked unless it already reached a terminal state."""
+        if tracked.done:
+            return False
+        self.ib.cancelOrder(tracked.trade.order)
+        return True
+
+    def cancel_unfilled(self, orders=None):
+        """Cancels every live order (default: all submitted). Returns the canceled ones."""
+        orders = self.orders if orders is None else orders
+        return [o for o in list(orders) if self.cancel(o)]
+
+    async def cancel_all_open(self, timeout=5):
+        """Cancels every open order on the account (not only this session's)."""
+        tracked = [TrackedOrder(t.contract.symbol, t, self.clock) for t in self.ib.openTrades()]
+        for order in tracked:
+            self.cancel(order)
+        await self.wait_all(tracked, timeout, states=(CANCELLED,))
+        return tracked
+
+    async def wait_all(self, orders, timeout=None, states=TERMINAL):
+        """Waits on all orders concurrently. True if every one reached one of states."""
+        orders = list(orders)
+        await asyncio.gather(*(o.wait(states, timeout) for o in orders))
+        return all(o.state in states for o in orders)
+
+    # --- Market data ---
+    async def quotes(self, contracts, timeout=QUOTE_TIMEOUT, regulatory=False):
+        """Snapshot price table for {symbol: contract}, one round trip."""
+        return await snapshot_prices_async(self.ib, contracts, timeout, regulatory)
+
+    # --- Lifecycle ---
+    def close(self):
+        self._closing = True
+        for task in list(self._tasks):
+            task.cancel()
+        self.ib.disconnectedEvent -= self._on_disconnected
+        self.ib.disconnect()
+
+    def run(self, coro):
+        """Runs a strategy coroutine to completion on the ib_insync loop."""
+        return ib_insync.util.run(coro)
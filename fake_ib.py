@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fake IB Gateway (offline stand-in for ib_insync.IB)
+---------------------------------------------------------------
+- In-process object implementing the subset of the IB API the tradebots
+  use: connect/connectAsync, qualifyContracts, reqContractDetailsAsync,
+  reqMktData/cancelMktData, placeOrder, openOrders/openTrades,
+  cancelOrder, reqCurrentTime and the ib_insync events
+- Plays scripted price paths ({symbol: Series of prices indexed by
+  aware timestamps}) on the injected clock and pushes quote updates
+  through pendingTickersEvent as the paths change
+- Matches MKT / LMT / STP / STP LMT orders against the path; bracket
+  children (parentId) stay PreSubmitted until the parent fills, and
+  transmit=False orders wait for the transmitting order of the bracket
+- Simulates fill latency, ack latency, rejections (per symbol) and
+  socket drops at scripted times (with an optional reconnect delay)
+- simulate() drives tradebot_phase2.main() through a full 9:30-16:00
+  session: on a VirtualClock (default, well under a second) or on a
+  ScaledClock (--speed N), against random walks or recorded quotes
+
+Example:
+    python fake_ib.py --quotes quotes_2025-06-02.csv --drop 11:00 --reject MSFT
+    python fake_ib.py --speed 3600
+
+Requires:  pip install ib_insync
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from eventkit import Event
+from ib_insync import (CommissionReport, Contract, ContractDetails, Execution, Fill,
+                       OrderStatus, Ticker, Trade, TradeLogEntry, util)
+
+from artifacts import read_artifact
+from clock import NY_TZ, ScaledClock, VirtualClock, WallClock
+
+FILL_LATENCY = 0.05     # seconds (clock time) between trigger and fill report
+ACK_LATENCY = 0.01      # seconds (clock time) before an order is acknowledged
+CONID_BASE = 900000
+
+
+def scripted_path(start, prices, step=60):
+    """Series of prices starting at start, one every step seconds."""
+    index = pd.date_range(start, periods=len(prices), freq=pd.Timedelta(seconds=step))
+    return pd.Series(np.asarray(prices, dtype=float), index=index)
+
+
+def random_walk_paths(start_prices, start, end, step=60, vol=0.002, seed=0):
+    """{symbol: Series} of geometric random walks between start and end."""
+    rng = np.random.default_rng(seed)
+    n = int((end - start).total_seconds() // step) + 1
+    paths = {}
+    for sym, p0 in start_prices.items():
+        steps = rng.normal(0.0, vol, n - 1)
+        prices = np.round(p0 * np.exp(np.concatenate([[0.0], np.cumsum(steps)])), 2)
+        paths[sym] = scripted_path(start, prices, step)
+    return paths
+
+
+def quotes_to_paths(quotes):
+    """{symbol: Series} from a long Time/Symbol/Price DataFrame (naive times are NY)."""
+    times = pd.to_datetime(quotes["Time"])
+    if times.dt.tz is None:
+        times = times.dt.tz_localize(NY_TZ)
+    quotes = quotes.assign(Time=times)
+    return {sym: g.set_index("Time")["Price"].sort_index()
+            for sym, g in quotes.groupby("Symbol", sort=False)}
+
+
+class FakeClient:
+    """Order id allocator (ib.client in ib_insync)."""
+
+    def __init__(self, ib):
+        self._ib = ib
+        self._next_id = 0
+
+    def getReqId(self):
+        self._next_id += 1
+        return self._next_id
+
+    def isConnected(self):
+        return self._ib.isConnected()
+
+
+class FakeIB:
+    """
+    Scripted, single-process IB Gateway. All timing (paths, latencies,
+    drops) is measured on clock, so it runs as fast as the clock does.
+    """
+
+    def __init__(self, paths=None, clock=None, fill_latency=FILL_LATENCY,
+                 ack_latency=ACK_LATENCY, reject=None, drops=(), reconnect_delay=0,
+                 conids=None):
+        self.paths = {sym: s.sort_index() for sym, s in (paths or {}).items()}
+        self.clock = clock if clock is not None else WallClock()
+        self.fill_latency = fill_latency
+        self.ack_latency = ack_latency
+        self.reject = dict(reject or {})           # {symbol: reason}
+        self.drops = sorted(drops)                 # aware datetimes
+        self.reconnect_delay = reconnect_delay
+        self.conids = dict(conids or {})
+        self.client = FakeClient(self)
+
+        self.connectedEvent = Event("connectedEvent")
+        self.disconnectedEvent = Event("disconnectedEvent")
+        self.updateEvent = Event("updateEvent")
+        self.pendingTickersEvent = Event("pendingTickersEvent")
+        self.orderStatusEvent = Event("orderStatusEvent")
+        self.errorEvent = Event("errorEvent")
+
+        self.stats = {"connects": 0, "drops": 0, "orders": 0, "fills": 0,
+                      "rejects": 0, "cancels": 0, "quotes": 0}
+        self._connected = False
+        self._down_until = None
+        self._task = None
+        self._wake = None
+        self._tickers = {}
+        self._subscribed = set()
+        self._trades = {}
+        self._held = {}        # bracket parent id -> [trades waiting for transmit]
+        self._children = {}    # parent id -> [child trades]
+        self._triggered = set()
+        self._exec_id = 0
+
+    # --- Connection ---
+    def isConnected(self):
+        return self._connected
+
+    async def connectAsync(self, host="127.0.0.1", port=7497, clientId=1, timeout=4,
+                           readonly=False, account=""):
+        if self._connected:
+            return self
+        if self._down_until is not None and self.clock.now() < self._down_until:
+            raise ConnectionRefusedError("fake gateway unreachable until %s"
+                                         % self._down_until.time())
+        self._connected = True
+        self.stats["connects"] += 1
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+        self.connectedEvent.emit()
+        return self
+
+    def connect(self, host="127.0.0.1", port=7497, clientId=1, timeout=4,
+                readonly=False, account=""):
+        return util.run(self.connectAsync(host, port, clientId, timeout, readonly, account))
+
+    def disconnect(self):
+        if not self._connected:
+            return
+        self._go_down()
+
+    def _go_down(self):
+        self._connected = False
+        self._subscribed.clear()
+        try:
+            current = asyncio.current_task()
+        except RuntimeError:        # disconnect() after the loop stopped
+            current = None
+        if self._task is not None and self._task is not current:
+            self._task.cancel()
+        self._task = None
+        self.disconnectedEvent.emit()
+
+    def _drop(self):
+        self.stats["drops"] += 1
+        self._down_until = self.clock.now() + datetime.timedelta(seconds=self.reconnect_delay)
+        self._go_down()
+
+    def _check_connected(self):
+        if not self._connected:
+            raise ConnectionError("Not connected")
+
+    def run(self, *awaitables, timeout=None):
+        return util.run(*awaitables, timeout=timeout)
+
+    def sleep(self, secs=0.02):
+        return util.run(self.clock.sleep(secs))
+
+    def reqCurrentTime(self):
+        self._check_connected()
+        return self.clock.now(datetime.timezone.utc)
+
+    async def reqCurrentTimeAsync(self):
+        return self.reqCurrentTime()
+
+    # --- Contracts ---
+    def _conid(self, symbol):
+        if symbol not in self.conids:
+            self.conids[symbol] = CONID_BASE + len(self.conids)
+        return self.conids[symbol]
+
+    def _known(self, symbol):
+        return symbol in self.paths or symbol in self.conids
+
+    async def reqContractDetailsAsync(self, contract):
+        self._check_connected()
+        if not self._known(contract.symbol):
+            return []
+        c = Contract(secType="STK", conId=self._conid(contract.symbol), symbol=contract.symbol,
+                     exchange=contract.exchange or "SMART", primaryExchange="NASDAQ",
+                     currency=contract.currency or "USD")
+        return [ContractDetails(contract=c)]
+
+    def reqContractDetails(self, contract):
+        return util.run(self.reqContractDetailsAsync(contract))
+
+    async def qualifyContractsAsync(self, *contracts):
+        qualified = []
+        for contract in contracts:
+            details = await self.reqContractDetailsAsync(contract)
+            if len(details) == 1:
+                contract.conId = details[0].contract.conId
+                contract.primaryExchange = details[0].contract.primaryExchange
+                qualified.append(contract)
+        return qualified
+
+    def qualifyContracts(self, *contracts):
+        return util.run(self.qualifyContractsAsync(*contracts))
+
+    # --- Market data ---
+    def price_at(self, symbol, when=None):
+        path = self.paths.get(symbol)
+        if path is None or path.empty:
+            return float("nan")
+        when = when if when is not None else self.clock.now()
+        i = path.index.searchsorted(when, side="right") - 1
+        return float(path.iloc[i]) if i >= 0 else float("nan")
+
+    def reqMktData(self, contract, genericTickList="", snapshot=False,
+                   regulatorySnapshot=False, mktDataOptions=None):
+        self._check_connected()
+        sym = contract.symbol
+        ticker = self._tickers.get(sym)
+        if ticker is None:
+            ticker = self._tickers[sym] = Ticker(contract=contract)
+        if snapshot:
+            asyncio.get_event_loop().call_soon(self._quote, {sym})
+        else:
+            self._subscribed.add(sym)
+            self._poke()
+        return ticker
+
+    def cancelMktData(self, contract):
+        self._subscribed.discard(contract.symbol)
+
+    def _quote(self, symbols):
+        """Updates tickers for symbols at the current path price and emits them."""
+        now = self.clock.now()
+        changed = set()
+        for sym in symbols:
+            ticker = self._tickers.get(sym)
+            price = self.price_at(sym, now)
+            if ticker is None or np.isnan(price) or price == ticker.last:
+                continue
+            ticker.time = now
+            ticker.last = price
+            ticker.bid = round(price - 0.01, 2)
+            ticker.ask = round(price + 0.01, 2)
+            changed.add(ticker)
+        if changed:
+            self.stats["quotes"] += len(changed)
+            self.pendingTickersEvent.emit(changed)
+            self.updateEvent.emit()
+
+    # --- Orders ---
+    def placeOrder(self, contract, order):
+        self._check_connected()
+        if not order.orderId:
+            order.orderId = self.client.getReqId()
+        trade = Trade(contract=contract, order=order,
+                      orderStatus=OrderStatus(orderId=order.orderId, status="PendingSubmit",
+                                              remaining=order.totalQuantity,
+                                              parentId=order.parentId),
+                      fills=[], log=[TradeLogEntry(self.clock.now(), "PendingSubmit", "")])
+        self._trades[order.orderId] = trade
+        self.stats["orders"] += 1
+
+        bracket = order.parentId or order.orderId
+        if order.parentId:
+            self._children.setdefault(order.parentId, []).append(trade)
+        self._held.setdefault(bracket, []).append(trade)
+        if order.transmit:
+            for held in self._held.pop(bracket):
+                self._later(self.ack_latency, self._acknowledge, held)
+        return trade
+
+    def _acknowledge(self, trade):
+        if trade.orderStatus.status != "PendingSubmit":
+            return
+        sym = trade.contract.symbol
+        if sym in self.reject:
+            self.stats["rejects"] += 1
+            self._set_status(trade, "Inactive", self.reject[sym])
+            self.errorEvent.emit(trade.order.orderId, 201, self.reject[sym], trade.contract)
+            return
+        parent = self._trades.get(trade.order.parentId)
+        if parent is not None and parent.orderStatus.status != "Filled":
+            self._set_status(trade, "PreSubmitted")
+        else:
+            self._set_status(trade, "Submitted")
+            self._match({sym})
+
+    def cancelOrder(self, order):
+        self._check_connected()
+        trade = self._trades.get(order.orderId)
+        if trade is None or not trade.isActive():
+            return trade
+        self.stats["cancels"] += 1
+        self._set_status(trade, "PendingCancel")
+        self._later(self.ack_latency, self._cancelled, trade)
+        return trade
+
+    def _cancelled(self, trade):
+        if trade.orderStatus.status in OrderStatus.DoneStates:
+            return
+        self._triggered.discard(trade.order.orderId)
+        self._set_status(trade, "Cancelled")
+        trade.cancelledEvent.emit(trade)
+        # IB cancels the children of a canceled parent
+        for child in self._children.get(trade.order.orderId, []):
+            self._cancelled(child)
+
+    def openTrades(self):
+        return [t for t in self._trades.values() if t.isActive()]
+
+    def openOrders(self):
+        return [t.order for t in self.openTrades()]
+
+    def trades(self):
+        return list(self._trades.values())
+
+    def _set_status(self, trade, status, message=""):
+        trade.orderStatus.status = status
+        trade.log.append(TradeLogEntry(self.clock.now(), status, message))
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+        self.updateEvent.emit()
+        self._poke()
+
+    def _triggers(self, order, price):
+        """True if order executes at price (STP LMT: triggered and within limit)."""
+        buy = order.action == "BUY"
+        kind = order.orderType
+        if kind == "MKT":
+            return True
+        if kind == "LMT":
+            return price <= order.lmtPrice if buy else price >= order.lmtPrice
+        if kind == "STP":
+            return price >= order.auxPrice if buy else price <= order.auxPrice
+        if kind == "STP LMT":
+            stopped = price >= order.auxPrice if buy else price <= order.auxPrice
+            inside = price <= order.lmtPrice if buy else price >= order.lmtPrice
+            return stopped and inside
+        return False
+
+    def _match(self, symbols):
+        now = self.clock.now()
+        for trade in list(self._trades.values()):
+            sym = trade.contract.symbol
+            oid = trade.order.orderId
+            if (sym not in symbols or trade.orderStatus.status != "Submitted"
+                    or oid in self._triggered):
+                continue
+            price = self.price_at(sym, now)
+            if np.isnan(price) or not self._triggers(trade.order, price):
+                continue
+            self._triggered.add(oid)
+            self._later(self.fill_latency, self._fill, trade, price)
+
+    def _fill(self, trade, price):
+        if trade.orderStatus.status != "Submitted":
+            return
+        self._exec_id += 1
+        qty = trade.order.totalQuantity
+        execution = Execution(execId="fake.%d" % self._exec_id, time=self.clock.now(),
+                              side="BOT" if trade.order.action == "BUY" else "SLD",
+                              shares=qty, price=price, orderId=trade.order.orderId,
+                              cumQty=qty, avgPrice=price)
+        fill = Fill(trade.contract, execution, CommissionReport(), execution.time)
+        trade.fills.append(fill)
+        trade.orderStatus.filled = qty
+        trade.orderStatus.remaining = 0
+        trade.orderStatus.avgFillPrice = price
+        trade.orderStatus.lastFillPrice = price
+        self.stats["fills"] += 1
+        trade.fillEvent.emit(trade, fill)
+        self._set_status(trade, "Filled")
+        trade.filledEvent.emit(trade)
+
+        # Activate bracket children
+        for child in self._children.get(trade.order.orderId, []):
+            if child.orderStatus.status == "PreSubmitted":
+                self._set_status(child, "Submitted")
+        self._match({trade.contract.symbol})
+
+    # --- Scheduler ---
+    def _later(self, delay, func, *args):
+        async def call():
+            await self.clock.sleep(delay)
+            func(*args)
+        asyncio.ensure_future(call())
+
+    def _poke(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def _active_symbols(self):
+        working = {t.contract.symbol for t in self._trades.values()
+                   if t.orderStatus.status in ("Submitted", "PreSubmitted")}
+        return self._subscribed | working
+
+    def _next_change(self, now):
+        times = []
+        for sym in self._active_symbols():
+            path = self.paths.get(sym)
+            if path is None:
+                continue
+            i = path.index.searchsorted(now, side="right")
+            if i < len(path):
+                times.append(path.index[i])
+        if self.drops:
+            times.append(self.drops[0])
+        return min(times) if times else None
+
+    async def _run(self):
+        """Pushes quotes and matches orders whenever a path changes."""
+        while self._connected:
+            now = self.clock.now()
+            if self.drops and self.drops[0] <= now:
+                self.drops.pop(0)
+                self._drop()
+                return
+            self._quote(self._subscribed)
+            self._match(self._active_symbols())
+
+            nxt = self._next_change(now)
+            self._wake.clear()
+            try:
+                if nxt is None:
+                    await self._wake.wait()
+                else:
+                    delay = max(0.0, (nxt - self.clock.now()).total_seconds())
+                    await self.clock.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def simulate(paths=None, speed=None, seed=0, fill_latency=FILL_LATENCY, reject=None,
+             drop_times=(), reconnect_delay=60, sizing_file=None, decision_file=None, out_dir=None):
+    """
+    Runs tradebot_phase2.main() against a FakeIB over a full 9:30-16:00 NY
+    session. paths (e.g. recorded quotes) set the session date; without
+    them each candidate gets a random walk for today starting just below
+    its EntryPrice. speed=None runs on a VirtualClock (well under a
+    second); a number runs a ScaledClock that much faster than real time.
+    sizing_file / decision_file are the session's inputs (default: the
+    files tradebot_phase2 reads from the working directory).
+    Files the session writes (trade log, latency metrics, conId cache of
+    the fake conIds) go to out_dir (a new temp directory by default),
+    never to the live ones.
+    Returns (FakeIB, wall seconds).
+    """
+    import tradebot_phase2
+
+    sizing_file = sizing_file or tradebot_phase2.SIZING_FILE
+    decision_file = decision_file or tradebot_phase2.DECISION_FILE
+    if paths:
+        day = min(p.index[0] for p in paths.values()).tz_convert(NY_TZ).date()
+    else:
+        day = datetime.datetime.now(NY_TZ).date()
+    start = datetime.datetime.combine(day, datetime.time(9, 30), tzinfo=NY_TZ)
+    end = datetime.datetime.combine(day, datetime.time(16, 0), tzinfo=NY_TZ)
+
+    if not paths:
+        sizing = read_artifact("sizing", sizing_file)
+        start_prices = {row["Symbol"]: float(row["EntryPrice"]) * 0.995
+                        for _, row in sizing.iterrows()}
+        paths = random_walk_paths(start_prices, start, end, seed=seed)
+
+    clock = VirtualClock(start) if speed is None else ScaledClock(start, speed)
+    drops = [datetime.datetime.combine(day, t, tzinfo=NY_TZ) for t in drop_times]
+    ib = FakeIB(paths, clock=clock, fill_latency=fill_latency, reject=reject,
+                drops=drops, reconnect_delay=reconnect_delay)
+    out_dir = out_dir or tempfile.mkdtemp(prefix="fake_ib_")
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    tradebot_phase2.main(ib=ib, clock=clock, contract_cache=os.path.join(out_dir, "contract_cache.json"),
+                         log_dir=out_dir, sizing_file=sizing_file, decision_file=decision_file)
+    return ib, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run tradebot_phase2 against a fake IB Gateway")
+    parser.add_argument("--quotes", help="Recorded quotes CSV (Time,Symbol,Price) to replay")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Real-time speed-up (default: virtual time, as fast as possible)")
+    parser.add_argument("--seed", type=int, default=0, help="Random-walk seed")
+    parser.add_argument("--fill-latency", type=float, default=FILL_LATENCY,
+                        help="Seconds between trigger and fill")
+    parser.add_argument("--reject", nargs="*", default=[], help="Symbols whose orders are rejected")
+    parser.add_argument("--drop", nargs="*", default=[], help="NY times (HH:MM) of socket drops")
+    parser.add_argument("--sizing", help="Sizing CSV to trade (default: position_sizing_output.csv)")
+    parser.add_argument("--decision", help="Decision JSON (default: decision_summary.json)")
+    parser.add_argument("--out-dir", help="Directory for the session's log/metrics files (default: new temp dir)")
+    args = parser.parse_args()
+
+    paths = quotes_to_paths(pd.read_csv(args.quotes)) if args.quotes else None
+    drop_times = [datetime.time.fromisoformat(t) for t in args.drop]
+    reject = {sym: "Order rejected by fake gateway" for sym in args.reject}
+
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix="fake_ib_")
+    ib, wall = simulate(paths, args.speed, args.seed, args.fill_latency, reject, drop_times,
+                        sizing_file=args.sizing, decision_file=args.decision, out_dir=out_dir)
+    print("Simulated session finished in %.2fs wall clock | %s" % (wall, ib.stats))
+    print("Session files in %s" % out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IB Helpers (shared by the tradebot scripts)
+---------------------------------------------------------------
+- qualify_stocks_async: qualifies every symbol in one concurrent batch
+  via reqContractDetailsAsync and caches conIds on disk by
+  (symbol, exchange, currency), so later sessions skip the lookup;
+  cached_contracts resolves from that cache alone (no connection)
+- Unknown and ambiguous symbols are returned up front instead of
+  surfacing mid-session
+- snapshot_prices_async: requests quotes for every contract at once and
+  waits on ticker updates with one overall timeout, returning a
+  price table (one round trip instead of a sleep per symbol)
+- Order placement and status waits live in execution.ExecutionEngine
+
+Requires:  pip install ib_insync
+"""
+
+import asyncio
+import json
+import math
+import os
+
+from lazy_imports import lazy_import
+
+ib_insync = lazy_import("ib_insync")
+pd = lazy_import("pandas")
+
+CONTRACT_CACHE = "contract_cache.json"
+QUOTE_TIMEOUT = 5.0
+
+
+def _key(symbol, exchange, currency):
+    return "%s|%s|%s" % (symbol, exchange, currency)
+
+
+def load_contract_cache(path=CONTRACT_CACHE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_contract_cache(cache, path=CONTRACT_CACHE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def cached_contracts(symbols, exchange="SMART", currency="USD", path=CONTRACT_CACHE):
+    """
+    Resolves symbols from the on-disk cache only (no connection needed).
+    Returns ({symbol: Stock with conId}, [symbols not in the cache]).
+    """
+    cache = load_contract_cache(path)
+    resolved, missing = {}, []
+    for sym in dict.fromkeys(symbols):
+        entry = cache.get(_key(sym, exchange, currency))
+        if entry:
+            resolved[sym] = ib_insync.Stock(sym, exchange, currency, conId=entry["conId"],
+                                  primaryExchange=entry.get("primaryExchange", ""))
+        else:
+            missing.append(sym)
+    return resolved, missing
+
+
+async def qualify_stocks_async(ib, symbols, exchange="SMART", currency="USD", path=CONTRACT_CACHE):
+    """
+    Qualifies all uncached symbols concurrently in one batch.
+    Returns (contracts {symbol: Stock}, problems {symbol: reason}).
+    """
+    resolved, missing = cached_contracts(symbols, exchange, currency, path)
+    problems = {}
+    if not missing:
+        return resolved, problems
+
+    stocks = [ib_insync.Stock(sym, exchange, currency) for sym in missing]
+    details = await asyncio.gather(
+        *(ib.reqContractDetailsAsync(c) for c in stocks), return_exceptions=True)
+
+    cache = load_contract_cache(path)
+    for sym, stock, found in zip(missing, stocks, details):
+        if isinstance(found, Exception):
+            problems[sym] = "lookup error: %s" % found
+        elif not found:
+            problems[sym] = "unknown symbol"
+        elif len(found) > 1:
+            venues = sorted({d.contract.primaryExchange for d in found})
+            problems[sym] = "ambiguous (%s)" % ", ".join(venues)
+        else:
+            c = found[0].contract
+            stock.conId = c.conId
+            stock.primaryExchange = c.primaryExchange
+            resolved[sym] = stock
+            cache[_key(sym, exchange, currency)] = {
+                "conId": c.conId,
+                "primaryExchange": c.primaryExchange,
+            }
+    save_contract_cache(cache, path)
+
+    # Keep the caller's symbol order
+    resolved = {sym: resolved[sym] for sym in dict.fromkeys(symbols) if sym in resolved}
+    return resolved, problems
+
+
+def _usable(value):
+    return value is not None and not math.isnan(value) and value > 0
+
+
+def ticker_price(ticker):
+    """Last trade (or market price) from a Ticker, None if not usable."""
+    if _usable(ticker.last):
+        return ticker.last
+    price = ticker.marketPrice()
+    return price if _usable(price) else None
+
+
+async def _wait_until(ib, done, timeout):
+    """Waits on ib.updateEvent until done() is true or timeout seconds pass."""
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout
+    while not done():
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        try:
+            await asyncio.wait_for(ib.updateEvent, remaining)
+        except asyncio.TimeoutError:
+            return done()
+    return True
+
+
+async def snapshot_prices_async(ib, contracts, timeout=QUOTE_TIMEOUT, regulatory=False):
+    """
+    Requests a snapshot for every contract at once and waits until each
+    has a usable price or timeout seconds pass.
+    contracts: {symbol: Contract}. Returns a DataFrame indexed by Symbol
+    with Last, Bid, Ask, Close and Price (NaN where no quote arrived).
+    """
+    tickers = {sym: ib.reqMktData(c, "", True, regulatory) for sym, c in contracts.items()}
+    await _wait_until(ib, lambda: all(ticker_price(t) is not None for t in tickers.values()),
+                      timeout)
+
+    rows = []
+    for sym, t in tickers.items():
+        price = ticker_price(t)
+        rows.append({
+            "Symbol": sym,
+            "Last": t.last,
+            "Bid": t.bid,
+            "Ask": t.ask,
+            "Close": t.close,
+            "Price": price if price is not None else float("nan"),
+        })
+    table = pd.DataFrame(rows, columns=["Symbol", "Last", "Bid", "Ask", "Close", "Price"])
+    return table.set_index("Symbol")
@@ -1,5 +1,9 @@
-from ib_insync import *
+def main():
+    from ib_insync import IB
 
-ib = IB()
-ib.connect('127.0.0.1', 4002, clientId=321)  # use 7497 if live
-print("✅ Connected to IB Gateway")
\ No newline at end of file
+    ib = IB()
+    ib.connect('127.0.0.1', 4002, clientId=321)  # use 7497 if live
+    print("✅ Connected to IB Gateway")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Per-Ticker Indicator Cache (screen and RS metrics memoized per bar)
+---------------------------------------------------------------
+- Latest indicator values (price, ATR%, base duration, RSI, 1M/3M/6M
+  returns, ...) are stored per (ticker, indicator, params, last-bar
+  stamp); the stamp is the last bar's timestamp plus the bar count and
+  last close, so a still-forming daily bar or a re-adjusted history
+  misses instead of serving a stale value
+- Two tiers: an in-memory LRU (one process, e.g. a pipeline run) in
+  front of a SQLite table on disk shared by every script and repeated
+  screens during the day
+- lookup() serves hits from the cache and calls compute() once, on a
+  {ticker: frame} dict of the misses only, so the vectorized kernels
+  still run on a single panel; tickers compute() leaves out (short
+  history) are remembered as skipped too
+- The disk tier evicts entries unused for MAX_AGE_DAYS and keeps at most
+  DISK_ENTRIES rows (least recently used go first)
+
+Example:
+    cache = IndicatorCache()
+    spec = {"RSI_14": ("RSI", {"period": 14})}
+    latest = cache.lookup(frames, spec, lambda fr: compute_indicators(build_panel(fr), spec))
+    cache.close()
+"""
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+DEFAULT_DB = "indicator_cache.sqlite"
+MEMORY_ENTRIES = 100_000       # in-process LRU size (values)
+DISK_ENTRIES = 500_000         # rows kept in the SQLite tier
+MAX_AGE_DAYS = 10              # disk rows unused this long are evicted
+_BATCH = 500                   # keys per SELECT ... IN (...)
+_SKIPPED = None                # stored value for a ticker compute() left out
+
+
+def bar_stamp(frame):
+    """Identity of a history's latest bar: 'timestamp|bars|close' (None if empty)."""
+    if frame is None or frame.empty:
+        return None
+    return "%s|%d|%r" % (pd.Timestamp(frame.index[-1]).isoformat(), len(frame),
+                         float(frame["Close"].iloc[-1]))
+
+
+def cache_key(ticker, indicator, params, stamp):
+    return json.dumps([ticker, indicator, params, stamp], sort_keys=True, default=str)
+
+
+def _plain(value):
+    """numpy scalars -> Python numbers (JSON-serializable)."""
+    return value.item() if hasattr(value, "item") else value
+
+
+class IndicatorCache:
+    def __init__(self, path=DEFAULT_DB, memory_entries=MEMORY_ENTRIES,
+                 disk_entries=DISK_ENTRIES, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.max_age_days = max_age_days
+        self.memory = OrderedDict()
+        self.hits_memory = self.hits_disk = self.misses = 0
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS indicators (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL
+                )""")
+            self.db.execute("CREATE INDEX IF NOT EXISTS indicators_used ON indicators (used)")
+
+    def close(self):
+        if self.db is not None:
+            self.evict()
+            self.db.close()
+            self.db = None
+
+    def stats(self):
+        return {"memory_hits": self.hits_memory, "disk_hits": self.hits_disk, "misses": self.misses}
+
+    # === Tiers ===
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """{key: value} for every key found in memory or on disk."""
+        found, missing = {}, []
+        for key in keys:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                found[key] = self.memory[key]
+            else:
+                missing.append(key)
+        self.hits_memory += len(found)
+        if self.db is None or not missing:
+            return found
+
+        on_disk = {}
+        for i in range(0, len(missing), _BATCH):
+            chunk = missing[i:i + _BATCH]
+            rows = self.db.execute(
+                "SELECT key, value FROM indicators WHERE key IN (%s)" % ",".join("?" * len(chunk)),
+                chunk).fetchall()
+            on_disk.update((key, json.loads(value)) for key, value in rows)
+        if on_disk:
+            now = time.time()
+            self.db.executemany("UPDATE indicators SET used=? WHERE key=?",
+                                [(now, key) for key in on_disk])
+            self.db.commit()
+            for key, value in on_disk.items():
+                self._remember(key, value)
+        self.hits_disk += len(on_disk)
+        found.update(on_disk)
+        return found
+
+    def put_many(self, items):
+        """Stores {key: value} in both tiers."""
+        for key, value in items.items():
+            self._remember(key, value)
+        if self.db is not None and items:
+            now = time.time()
+            self.db.executemany(
+                "INSERT OR REPLACE INTO indicators VALUES (?, ?, ?)",
+                [(key, json.dumps(value, default=_plain), now) for key, value in items.items()])
+            self.db.commit()
+
+    def evict(self):
+        """Drops disk rows unused for max_age_days, then the oldest beyond disk_entries."""
+        if self.db is None:
+            return
+        self.db.execute("DELETE FROM indicators WHERE used < ?",
+                        (time.time() - self.max_age_days * 86400,))
+        self.db.execute(
+            "DELETE FROM indicators WHERE key IN ("
+            "SELECT key FROM indicators ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.disk_entries,))
+        self.db.commit()
+
+    # === Memoized computation ===
+    def lookup(self, frames, spec, compute):
+        """
+        Latest value of every spec column for each ticker in frames.
+
+        spec:    {column: (indicator, params)}; params must be JSON-able and
+                 describe everything the value depends on besides the bars
+        compute: compute({ticker: frame}) -> DataFrame with a Ticker column
+                 (or Ticker index) and the spec columns; only called with
+                 the tickers that missed
+
+        Returns a DataFrame (Ticker + spec columns) in frames order; tickers
+        compute() skipped are left out, as compute() itself would.
+        """
+        columns = list(spec)
+        keys = {}
+        for ticker, frame in frames.items():
+            stamp = bar_stamp(frame)
+            if stamp is not None:
+                keys[ticker] = {col: cache_key(ticker, *spec[col], stamp) for col in columns}
+
+        found = self.get_many([key for per in keys.values() for key in per.values()])
+        todo = {t: frames[t] for t in frames
+                if t not in keys or any(key not in found for key in keys[t].values())}
+        self.misses += len(todo) * len(columns)
+
+        if todo:
+            fresh = compute(todo)
+            if "Ticker" in fresh.columns:
+                fresh = fresh.set_index("Ticker")
+            fresh = fresh[~fresh.index.duplicated()]
+            new = {}
+            for ticker in todo:
+                if ticker not in keys:
+                    continue
+                row = fresh.loc[ticker] if ticker in fresh.index else None
+                for col, key in keys[ticker].items():
+                    value = _SKIPPED if row is None else _plain(row[col])
+                    new[key] = found[key] = value
+            self.put_many(new)
+        else:
+            fresh = None
+
+        records = []
+        for ticker in frames:
+            if ticker in keys:
+                values = [found[keys[ticker][col]] for col in columns]
+                if any(v is _SKIPPED for v in values):
+                    continue
+                records.append([ticker, *values])
+            elif fresh is not None and ticker in fresh.index:
+                records.append([ticker, *(fresh.loc[ticker, col] for col in columns)])
+        return pd.DataFrame(records, columns=["Ticker"] + columns)
@@ -0,0 +1,98 @@
+"""
+Vectorized Indicators
+---------------------------------------------------------------
+Indicators computed for every ticker at once from a right-aligned
+(bars x tickers) matrix (see panel.right_align): row -1 is each ticker's
+latest bar, leading NaN rows pad shorter histories.
+
+- RSI: Wilder RSI (SMA seed, then Wilder smoothing), same definition as
+  the Finviz "RSI (14)" field
+- SMA / EMA / ROC: simple helpers for extra screen columns
+
+Example:
+    latest = compute_indicators(build_panel(frames, "Close"),
+                                {"RSI_14": ("RSI", {"period": 14})})
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _first_valid(values):
+    n = values.shape[0]
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), n)
+
+
+def rsi(closes, period=14):
+    """Wilder RSI for every column; NaN until a column has period + 1 bars."""
+    closes = np.asarray(closes, dtype=float)
+    n, m = closes.shape
+    out = np.full((n, m), np.nan)
+    if n <= period:
+        return out
+
+    delta = np.diff(closes, axis=0, prepend=np.nan)
+    gain = np.nan_to_num(np.clip(delta, 0, None))
+    loss = np.nan_to_num(np.clip(-delta, 0, None))
+
+    # Seed row: period deltas after each column's first valid close
+    seed = _first_valid(closes) + period
+    cols = np.arange(m)
+    seeded = seed < n
+    seed_row = np.minimum(seed, n - 1)
+
+    cum_gain = np.cumsum(gain, axis=0)
+    cum_loss = np.cumsum(loss, axis=0)
+    base = np.maximum(seed_row - period, 0)
+    avg_gain = np.full(m, np.nan)
+    avg_loss = np.full(m, np.nan)
+    avg_gain[seeded] = ((cum_gain[seed_row, cols] - cum_gain[base, cols]) / period)[seeded]
+    avg_loss[seeded] = ((cum_loss[seed_row, cols] - cum_loss[base, cols]) / period)[seeded]
+
+    start = seed_row[seeded].min() if seeded.any() else n
+    for row in range(start, n):
+        smooth = row > seed
+        avg_gain = np.where(smooth, (avg_gain * (period - 1) + gain[row]) / period, avg_gain)
+        avg_loss = np.where(smooth, (avg_loss * (period - 1) + loss[row]) / period, avg_loss)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+        out[row] = np.where(row >= seed, value, np.nan)
+    return out
+
+
+def sma(values, period=20):
+    return pd.DataFrame(values).rolling(period).mean().to_numpy()
+
+
+def ema(values, period=20):
+    return pd.DataFrame(values).ewm(span=period, adjust=False, min_periods=period).mean().to_numpy()
+
+
+def roc(values, period=21):
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    out[period:] = (values[period:] / values[:-period] - 1) * 100
+    return out
+
+
+INDICATORS = {
+    "RSI": rsi,
+    "SMA": sma,
+    "EMA": ema,
+    "ROC": roc,
+}
+
+# Column name -> (indicator, params)
+DEFAULT_INDICATORS = {
+    "RSI_14": ("RSI", {"period": 14}),
+}
+
+
+def compute_indicators(close_panel, spec=DEFAULT_INDICATORS, decimals=2):
+    """Latest value of every indicator in spec, one row per ticker."""
+    closes = close_panel.aligned()
+    latest = {}
+    for column, (name, params) in spec.items():
+        latest[column] = np.round(INDICATORS[name](closes, **params)[-1], decimals)
+    return pd.DataFrame(latest, index=pd.Index(close_panel.tickers, name="Ticker"))
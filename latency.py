@@ -0,0 +1,111 @@
+"""
+Hot-Path Latency Recorder (tradebot order loop)
+---------------------------------------------------------------
+- Spans are measured on a monotonic timer and kept per symbol; with
+  the engine clock as timer a VirtualClock session reports simulated
+  ack / fill delays and a ScaledClock one reports spans x speed
+- record() stores one duration; mark() / since() time spans that start
+  in one callback and end in another (order submit -> fill ack)
+- watch_loop() samples event-loop lag: how late a periodic wake-up
+  fires, i.e. how long callbacks kept the loop busy
+- summary() gives count / mean / p50 / p95 / p99 / max and a
+  log-spaced histogram per (symbol, span), plus an ALL row per span;
+  write() saves it as one compact JSON file per session
+
+Example:
+    latency = LatencyRecorder(engine.clock.monotonic)
+    t_quote = latency.now()
+    ...
+    latency.record("AAPL", "decision", latency.now() - t_quote)
+    latency.mark("AAPL", "submit")
+    ...
+    latency.since("AAPL", "submit_to_fill", "submit")
+    latency.write("tradebot_metrics_2025-01-02.json")
+"""
+
+import bisect
+import json
+import time
+from collections import defaultdict
+
+# Histogram bucket upper edges, milliseconds (last bucket is open-ended)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PERCENTILES = (50, 95, 99)
+ALL = "ALL"
+LOOP = "LOOP"       # pseudo-symbol for event-loop lag samples
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def describe(samples):
+    """Stats for a list of durations in seconds, reported in milliseconds."""
+    ordered = sorted(s * 1000.0 for s in samples)
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for ms in ordered:
+        counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+    stats = {"count": len(ordered), "mean_ms": round(sum(ordered) / len(ordered), 3)}
+    for pct in PERCENTILES:
+        stats["p%d_ms" % pct] = round(percentile(ordered, pct), 3)
+    stats["max_ms"] = round(ordered[-1], 3)
+    stats["hist"] = counts
+    return stats
+
+
+class LatencyRecorder:
+    """Per-symbol span samples on a monotonic timer (seconds)."""
+
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        self.samples = defaultdict(list)      # (symbol, span) -> [seconds]
+        self.marks = {}                       # (symbol, event) -> timer value
+
+    def now(self):
+        return self.timer()
+
+    def record(self, symbol, span, seconds):
+        self.samples[(symbol, span)].append(max(0.0, seconds))
+
+    def mark(self, symbol, event, at=None):
+        self.marks[(symbol, event)] = self.timer() if at is None else at
+
+    def since(self, symbol, span, event):
+        """Records now - mark(symbol, event) as span. Returns the duration (None if unmarked)."""
+        start = self.marks.get((symbol, event))
+        if start is None:
+            return None
+        seconds = self.timer() - start
+        self.record(symbol, span, seconds)
+        return seconds
+
+    async def watch_loop(self, clock, interval=1.0):
+        """Samples how late a clock.sleep(interval) wakes up, until canceled."""
+        while True:
+            start = self.timer()
+            await clock.sleep(interval)
+            self.record(LOOP, "loop_lag", self.timer() - start - interval)
+
+    def summary(self):
+        """{symbol: {span: stats}} with an ALL entry aggregating every symbol."""
+        out = defaultdict(dict)
+        combined = defaultdict(list)
+        for (symbol, span), samples in sorted(self.samples.items()):
+            out[symbol][span] = describe(samples)
+            if symbol != LOOP:
+                combined[span].extend(samples)
+        for span, samples in combined.items():
+            out[ALL][span] = describe(samples)
+        return dict(out)
+
+    def write(self, path, **meta):
+        """Writes meta + the summary as one JSON document. Returns the summary."""
+        summary = self.summary()
+        doc = dict(meta, buckets_ms=list(BUCKETS_MS), spans=summary)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        return summary
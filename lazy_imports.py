@@ -0,0 +1,37 @@
+"""
+Lazy Module Imports (fast CLI startup)
+---------------------------------------------------------------
+- lazy_import("pandas") returns the module object right away but only
+  executes it on first attribute access, so --help, argument errors and
+  early exits (e.g. a RED-market decision) never pay for pandas, numpy
+  or ib_insync
+- Modules that are already imported are returned as is
+- Modules using it should also start with
+  `from __future__ import annotations` so type hints such as
+  pd.DataFrame are not evaluated at import
+
+Example:
+    from lazy_imports import lazy_import
+    pd = lazy_import("pandas")
+
+    def load(path):
+        return pd.read_csv(path)     # pandas is imported here
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Module name, executed on first attribute access."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,80 @@
+"""
+Wide Price Panels
+---------------------------------------------------------------
+Aligns per-ticker OHLCV frames into one (dates x tickers) NumPy matrix
+so indicators can be computed for the whole universe at once.
+
+Example:
+    p = build_panel(bulk.frames, "Close")
+    p.values[:, p.tickers.index("AAPL")]
+    p.aligned()[-1]     # latest close of every ticker
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class Panel:
+    """
+    dates:   UTC DatetimeIndex, union of every ticker's bar dates
+    tickers: column order of values/present
+    values:  float64 matrix, NaN where a ticker has no bar
+    present: bool matrix, True where the ticker's own frame had a row
+             (its value may still be NaN)
+    """
+
+    def __init__(self, dates, tickers, values, present):
+        self.dates = dates
+        self.tickers = tickers
+        self.values = values
+        self.present = present
+
+    def __repr__(self):
+        return "Panel(%d dates x %d tickers)" % self.values.shape
+
+    def aligned(self):
+        """values with every ticker's own bars pushed to the bottom rows."""
+        return right_align(self.values, self.present)
+
+
+def right_align(values, valid=None):
+    """
+    Moves each column's valid rows to the bottom (keeping their order) and
+    fills the rows above with NaN. Afterwards the last row holds every
+    ticker's latest bar and row -k its k-th latest bar, so windowed
+    indicators no longer see holes from other tickers' calendars.
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values) if valid is None else valid
+    order = np.argsort(valid, axis=0, kind="stable")
+    aligned = np.take_along_axis(values, order, axis=0)
+    aligned[~np.take_along_axis(valid, order, axis=0)] = np.nan
+    return aligned
+
+
+def _utc_index(df):
+    index = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df.index)
+    return index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+
+
+def build_panel(frames, field="Close"):
+    """Aligns {ticker: frame} on the union of their dates."""
+    tickers = list(frames)
+    if not tickers:
+        return Panel(pd.DatetimeIndex([], tz="UTC"), [], np.empty((0, 0)), np.empty((0, 0), dtype=bool))
+
+    columns = {}
+    for ticker in tickers:
+        df = frames[ticker]
+        columns[ticker] = pd.Series(df[field].to_numpy(dtype=float), index=_utc_index(df))
+
+    wide = pd.concat(columns, axis=1, sort=True)
+    present = pd.concat(
+        {t: pd.Series(True, index=s.index) for t, s in columns.items()}, axis=1, sort=True
+    ).reindex(wide.index).notna().to_numpy()
+    return Panel(wide.index, tickers, wide.to_numpy(dtype=float), present)
+
+
+def build_panels(frames, fields=("High", "Low", "Close")):
+    """{field: Panel} for several fields, sharing the same dates and tickers."""
+    return {field: build_panel(frames, field) for field in fields}
@@ -0,0 +1,58 @@
+"""
+Parallel Execution Helpers
+---------------------------------------------------------------
+- Splits a ticker universe into contiguous, deterministic chunks
+- Runs CPU-bound stages across a process pool and I/O-bound stages
+  across a thread pool
+- Merges results in chunk order, so output is identical to a serial run
+
+workers <= 1 runs everything in-process (the default everywhere).
+Worker functions must be importable top-level functions (Windows spawns).
+
+Example:
+    parts = run_chunks(screen_chunk, split_dict(frames, 4), workers=4)
+    df = pd.concat(parts, ignore_index=True)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def split(items, parts):
+    """Splits items into at most parts contiguous chunks of near-equal size."""
+    items = list(items)
+    parts = max(1, min(parts, len(items)))
+    size, extra = divmod(len(items), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return [c for c in chunks if c]
+
+
+def split_dict(mapping, parts):
+    """split() for dicts, keeping insertion order inside and across chunks."""
+    return [{k: mapping[k] for k in keys} for keys in split(mapping, parts)]
+
+
+def run_chunks(func, chunks, workers=1, kind="process", initializer=None, initargs=()):
+    """
+    func(chunk) for every chunk, results returned in chunk order.
+    kind: "process" for CPU-bound work, "thread" for I/O-bound work.
+    initializer(*initargs) runs once per worker (once in-process when serial).
+    """
+    chunks = list(chunks)
+    if workers <= 1 or len(chunks) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [func(chunk) for chunk in chunks]
+
+    pool_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=min(workers, len(chunks)), initializer=initializer,
+                  initargs=initargs) as pool:
+        return list(pool.map(func, chunks))
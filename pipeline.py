@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-Open Pipeline (screen -> rs -> size -> execute in one process)
+---------------------------------------------------------------
+- Runs the daily stages as a DAG in one interpreter and hands
+  DataFrames from stage to stage in memory (no CSV round trips and one
+  set of imports instead of one per script)
+- Sizes the hand-curated shortlist (shortlisted.csv), exactly like
+  decision_tool.py; the screen and RS stages only refresh the lists it
+  is curated from. --suggest-candidates additionally writes breakout
+  candidates derived from the screen to suggested_candidates.csv for
+  review; they are never sized or traded
+- Each cached stage's result is pickled under .pipeline_cache/, keyed
+  by a hash of the stage's code, the source of the modules doing its
+  work (screener, rs_kernel, decision_tool, ...), its parameters and its
+  inputs' fingerprints; a rerun with unchanged inputs loads it instead of
+  recomputing (--force <stage> recomputes it and everything downstream)
+- Stages that must always run (file reads, price top-ups, order
+  execution) are marked cache=False; their outputs are fingerprinted
+  by content, so downstream stages still hit the cache when the data
+  did not change
+- Stage functions only compute; a stage's emit step writes its files
+  (buy lists, benchmark_rs_ranked, position_sizing_output,
+  decision_summary.json) from the result on every run, cached or not,
+  so the launcher and tradebot_phase2 always find them
+- --fixtures serves prices from CSV fixtures through separate SQLite
+  files (fixtures.sqlite, fixtures_indicators.sqlite), so fixture bars
+  never land in the live price store; --execute is refused with it
+- Every stage is timed; the summary flags a run over --budget seconds
+
+DAG:
+    watchlist -> prices -> screen  (-> suggest)
+    benchmark_watchlist -> rs_prices -> rs
+    shortlist -> size -> execute
+
+Example:
+    python pipeline.py --portfolio 60000 --market Orange --phase 2 --wins 3 \\
+        --breakeven y --drawdown 0.8 --growth 4.0 --days 45
+    python pipeline.py ... --no-rs --fixtures fixtures/   # offline run
+    python pipeline.py ... --execute                       # then trade (tradebot_phase2)
+"""
+
+import argparse
+import datetime
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+from functools import partial
+from graphlib import TopologicalSorter
+
+from indicator_cache import IndicatorCache
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+CACHE_DIR = ".pipeline_cache"
+SHORTLIST_FILE = "shortlisted.csv"
+SUGGESTED_FILE = "suggested_candidates.csv"
+SIZING_FILE = "position_sizing_output.csv"
+SUMMARY_FILE = "decision_summary.json"
+RS_FILE = "benchmark_rs_ranked.csv"
+FIXTURE_DB = "fixtures.sqlite"                         # price store for --fixtures runs
+FIXTURE_INDICATOR_DB = "fixtures_indicators.sqlite"    # indicator cache for --fixtures runs
+KEEP_PER_STAGE = 3      # cached results kept per stage (older keys are evicted)
+BUDGET_SECS = 120.0
+PERIOD = "6mo"
+_MISSING = object()
+
+
+# === Generic DAG runner ===
+class Stage:
+    """
+    func(*dep results, **params); cache=False stages always run.
+    emit(result), if given, runs after every run or cache hit (file writes).
+    modules names the modules func delegates to; their source is part of
+    the cache key, so editing e.g. screener.py invalidates cached screens.
+    """
+
+    def __init__(self, name, func, deps=(), params=None, cache=True, emit=None, modules=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.params = dict(params or {})
+        self.cache = cache
+        self.emit = emit
+        self.modules = tuple(modules)
+
+
+def _code_id(func):
+    func = getattr(func, "func", func)          # functools.partial
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return "%s.%s" % (func.__module__, func.__qualname__)
+
+
+def _module_id(name):
+    """Hash of a module's source file (located, not imported)."""
+    spec = importlib.util.find_spec(name)
+    origin = getattr(spec, "origin", None)
+    if not origin or not os.path.isfile(origin):
+        return name
+    with open(origin, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fingerprint(value):
+    """Content hash of a stage result (DataFrames hashed row by row)."""
+    h = hashlib.sha256()
+
+    def feed(v):
+        if isinstance(v, (pd.DataFrame, pd.Series)):
+            h.update(repr(v.columns if isinstance(v, pd.DataFrame) else v.name).encode())
+            h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+        elif isinstance(v, dict):
+            for k in sorted(v, key=repr):
+                h.update(repr(k).encode())
+                feed(v[k])
+        elif isinstance(v, (list, tuple)):
+            h.update(b"[%d" % len(v))
+            for item in v:
+                feed(item)
+        else:
+            h.update(repr(v).encode())
+
+    feed(value)
+    return h.hexdigest()
+
+
+class Pipeline:
+    def __init__(self, cache_dir=CACHE_DIR, log=print):
+        self.cache_dir = cache_dir
+        self.log = log
+        self.stages = {}
+
+    def add(self, name, func, deps=(), params=None, cache=True, emit=None, modules=()):
+        self.stages[name] = Stage(name, func, deps, params, cache, emit, modules)
+        return self
+
+    def _order(self, targets):
+        graph = {name: stage.deps for name, stage in self.stages.items()}
+        needed, todo = set(), list(targets or graph)
+        while todo:
+            name = todo.pop()
+            if name not in needed:
+                needed.add(name)
+                todo.extend(graph[name])
+        return [name for name in TopologicalSorter(graph).static_order() if name in needed]
+
+    def _downstream(self, names):
+        out = set(names)
+        changed = True
+        while changed:
+            changed = False
+            for name, stage in self.stages.items():
+                if name not in out and out.intersection(stage.deps):
+                    out.add(name)
+                    changed = True
+        return out
+
+    def _path(self, name, key):
+        return os.path.join(self.cache_dir, "%s-%s.pkl" % (name, key[:16]))
+
+    def _load(self, name, key):
+        try:
+            with open(self._path(name, key), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISSING
+
+    def _save(self, name, key, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(name, key)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+        # Evict the oldest results of this stage beyond KEEP_PER_STAGE
+        prefix = name + "-"
+        mine = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir)
+                if f.startswith(prefix) and f.endswith(".pkl")]
+        for old in sorted(mine, key=os.path.getmtime)[:-KEEP_PER_STAGE]:
+            os.remove(old)
+
+    def run(self, targets=None, force=()):
+        """
+        Runs targets (default: every stage) and their dependencies.
+        Returns ({stage: result}, [(stage, "ran"/"cached", seconds)]).
+        """
+        forced = self._downstream(force)
+        results, prints, timings, sources = {}, {}, [], {}
+        for name in self._order(targets):
+            stage = self.stages[name]
+            for module in stage.modules:
+                if module not in sources:
+                    sources[module] = _module_id(module)
+            key = fingerprint([name, _code_id(stage.func), [sources[m] for m in stage.modules],
+                               stage.params, [prints[d] for d in stage.deps]])
+            t0 = time.perf_counter()
+            value = _MISSING
+            if stage.cache and name not in forced:
+                value = self._load(name, key)
+            status = "cached" if value is not _MISSING else "ran"
+            if value is _MISSING:
+                value = stage.func(*(results[d] for d in stage.deps), **stage.params)
+                if stage.cache:
+                    self._save(name, key, value)
+            if stage.emit is not None:
+                stage.emit(value)
+            results[name] = value
+            prints[name] = key if stage.cache else fingerprint(value)
+            secs = time.perf_counter() - t0
+            timings.append((name, status, secs))
+            self.log(f"{'♻️' if status == 'cached' else '⚙️'} {name:<20} {status:<6} {secs:8.2f} s")
+        return results, timings
+
+
+# === Daily stages ===
+def read_tickers(path):
+    return pd.read_csv(path)["Ticker"].dropna().astype(str).unique().tolist()
+
+
+def read_benchmark_watchlist(path):
+    from sortwatchlistrs import load_watchlist
+    return load_watchlist(path)
+
+
+def read_shortlist(path):
+    """The hand-curated candidates decision_tool sizes (Symbol, EntryPrice, StopLoss)."""
+    from artifacts import read_artifact
+    return read_artifact("candidates", path)
+
+
+def open_store(fixtures=None, workers=1):
+    """Live price store, or a separate fixture-only store serving <ticker>_1d.csv files."""
+    from price_store import CsvFetcher, PriceStore, YahooFetcher
+    if fixtures:
+        return PriceStore(path=FIXTURE_DB, fetcher=CsvFetcher(fixtures))
+    return PriceStore(fetcher=YahooFetcher(workers=workers))
+
+
+def load_prices(tickers, period=PERIOD, fixtures=None, workers=1):
+    """{ticker: OHLCV history} from the price store (top-up only)."""
+    store = open_store(fixtures, workers)
+    try:
+        bulk = store.history_many(tickers, period=period)
+    finally:
+        store.close()
+    if bulk.failed:
+        print(f"⚠️ No data for {len(bulk.failed)} tickers: {sorted(bulk.failed)}")
+    return {t: bulk.frames[t] for t in tickers if t in bulk.frames}
+
+
+def load_rs_prices(watchlist, fixtures=None, workers=1):
+    """Constituents + histories of every benchmark universe (sortwatchlistrs.load_universes)."""
+    from sortwatchlistrs import load_universes
+    store = open_store(fixtures, workers)
+    try:
+        return load_universes(watchlist, store)
+    finally:
+        store.close()
+
+
+def screen_stage(frames, workers=1, indicator_cache=None):
+    """Screen table (sortwatchlist.screen_frames)."""
+    from sortwatchlist import screen_frames
+    return screen_frames(frames, workers, indicator_cache)
+
+
+def write_screen(df):
+    from screener import write_buy_lists
+    write_buy_lists(df)
+
+
+def rs_stage(watchlist, universes, as_of, workers=1, indicator_cache=None):
+    """
+    RS_Score of every benchmark-watchlist ticker vs its universe. as_of
+    (the run date) keys the 1M/3M cutoffs, which move once a day.
+    """
+    from sortwatchlistrs import rank_universes, rank_watchlist, rs_anchors
+    return rank_watchlist(watchlist, rank_universes(universes, rs_anchors(), workers, indicator_cache))
+
+
+def write_rs(ranked, out_file=RS_FILE):
+    from artifacts import write_artifact
+    write_artifact(ranked, "rs_ranked", out_file)
+
+
+def suggest_stage(frames, screened, ranked=None):
+    """
+    Last session's breakout candidates for review only: EntryPrice =
+    base-window high, StopLoss = EntryPrice - 1.5 x ATR (the derived
+    signals of backtest.breakout_signals), with the screen's RS_Rating
+    and, when ranked, the benchmark RS_Score. Best RS first.
+    """
+    from backtest import breakout_signals
+    from panel import build_panels
+
+    columns = ["Symbol", "EntryPrice", "StopLoss", "ATR%", "RS_Rating", "RS_Score"]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    signals = breakout_signals(build_panels(frames, ("High", "Low", "Close")))
+    latest = signals[signals["Date"] == signals["Date"].max()] if len(signals) else signals
+
+    df = latest[["Symbol", "EntryPrice", "StopLoss", "ATR%"]].reset_index(drop=True)
+    df["RS_Rating"] = df["Symbol"].map(screened.set_index("Ticker")["RS_Rating"])
+    if ranked is not None and len(ranked):
+        df["RS_Score"] = df["Symbol"].map(ranked.drop_duplicates("Ticker").set_index("Ticker")["RS_Score"])
+        order = ["RS_Score", "RS_Rating"]
+    else:
+        df["RS_Score"] = float("nan")
+        order = ["RS_Rating"]
+    df = df.sort_values(order, ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+    return df[columns]
+
+
+def write_suggested(df, out_file=SUGGESTED_FILE):
+    from artifacts import write_artifact
+    write_artifact(df, "candidates", out_file)
+
+
+def size_stage(candidates, portfolio, market, last_phase, wins, breakeven, drawdown, growth, days,
+               csv_input=SHORTLIST_FILE):
+    """decide_phase + size_positions. Returns {"decision": summary, "sized": DataFrame or None}."""
+    from decision_tool import PHASE_RISK_PCT, decide_phase, size_positions
+
+    phase, reasons = decide_phase(last_phase, market, wins, breakeven, drawdown, growth, days)
+    summary = {"phase": phase, "market": market, "portfolio_value": portfolio,
+               "risk_pct": PHASE_RISK_PCT.get(phase, 0.0), "total_risk": 0.0,
+               "csv_input": csv_input, "csv_output": SIZING_FILE, "decision_messages": reasons}
+    sized = None
+    if phase:
+        sized, summary["total_risk"] = size_positions(candidates, portfolio, phase)
+    return {"decision": summary, "sized": sized}
+
+
+def write_sizing(sizing, out_file=SIZING_FILE, summary_file=SUMMARY_FILE):
+    from artifacts import validate_decision, write_artifact
+    if sizing["sized"] is not None:
+        write_artifact(sizing["sized"], "sizing", out_file)
+    with open(summary_file, "w") as jf:
+        json.dump(validate_decision(sizing["decision"]), jf, indent=2)
+
+
+def execute_stage(sizing):
+    """Runs the tradebot_phase2 session on the in-memory sizing result."""
+    decision, sized = sizing["decision"], sizing["sized"]
+    if not decision["phase"] or sized is None or sized.empty:
+        print("⛔ Nothing to execute (phase 0 or no sized candidates).")
+        return None
+    import tradebot_phase2
+    tradebot_phase2.main(df=sized, decision=decision)
+    return True
+
+
+# Modules whose code decides each cached stage's result (part of its cache key)
+SCREEN_MODULES = ("sortwatchlist", "screener", "indicators", "panel")
+RS_MODULES = ("sortwatchlistrs", "rs_kernel")
+SUGGEST_MODULES = ("backtest", "panel")
+SIZE_MODULES = ("decision_tool",)
+
+
+def build_daily_pipeline(args, indicator_cache=None):
+    p = Pipeline(cache_dir=args.cache_dir)
+    today = datetime.date.today().isoformat()
+    p.add("watchlist", read_tickers, params={"path": args.watchlist}, cache=False)
+    p.add("prices", partial(load_prices, fixtures=args.fixtures, workers=args.workers), ["watchlist"],
+          params={"period": args.period}, cache=False)
+    p.add("screen", partial(screen_stage, workers=args.workers, indicator_cache=indicator_cache), ["prices"],
+          emit=write_screen, modules=SCREEN_MODULES)
+    suggest_deps = ["prices", "screen"]
+    if args.rs:
+        p.add("benchmark_watchlist", read_benchmark_watchlist, params={"path": args.benchmark_watchlist},
+              cache=False)
+        p.add("rs_prices", partial(load_rs_prices, fixtures=args.fixtures, workers=args.workers),
+              ["benchmark_watchlist"], cache=False)
+        p.add("rs", partial(rs_stage, workers=args.workers, indicator_cache=indicator_cache),
+              ["benchmark_watchlist", "rs_prices"], params={"as_of": today}, emit=write_rs,
+              modules=RS_MODULES)
+        suggest_deps.append("rs")
+    if args.suggest:
+        p.add("suggest", suggest_stage, suggest_deps, emit=write_suggested, modules=SUGGEST_MODULES)
+    p.add("shortlist", read_shortlist, params={"path": args.shortlist}, cache=False)
+    p.add("size", size_stage, ["shortlist"], params={
+        "portfolio": args.portfolio, "market": args.market.capitalize(), "last_phase": args.phase,
+        "wins": args.wins, "breakeven": args.breakeven.lower() in ("y", "yes"),
+        "drawdown": args.drawdown, "growth": args.growth, "days": args.days,
+        "csv_input": args.shortlist}, emit=write_sizing, modules=SIZE_MODULES)
+    if args.execute:
+        p.add("execute", execute_stage, ["size"], cache=False)
+    return p
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-open pipeline: screen -> rs -> size -> execute")
+    parser.add_argument("--portfolio", type=float, required=True, help="Portfolio value in USD")
+    parser.add_argument("--market", type=str, required=True, help="Market condition: Red/Yellow/Orange/Green")
+    parser.add_argument("--phase", type=int, required=True, help="Last confirmed phase (1-4)")
+    parser.add_argument("--wins", type=int, required=True, help="Recent 2R wins")
+    parser.add_argument("--breakeven", type=str, required=True, help="Both positions breakeven (y/n)")
+    parser.add_argument("--drawdown", type=float, required=True, help="Drawdown %% from equity high")
+    parser.add_argument("--growth", type=float, required=True, help="Growth %% since last equity high")
+    parser.add_argument("--days", type=int, required=True, help="Consistency days for Phase 4")
+    parser.add_argument("--shortlist", default=SHORTLIST_FILE,
+                        help="Hand-curated candidates to size (Symbol,EntryPrice,StopLoss)")
+    parser.add_argument("--watchlist", default="ILAN_COMBINED.csv", help="Screen universe (Ticker column)")
+    parser.add_argument("--benchmark-watchlist", default="ILAN_COMBINED_BENCHMARK.csv",
+                        help="RS watchlist (Ticker,Benchmark)")
+    parser.add_argument("--no-rs", dest="rs", action="store_false", help="Skip the benchmark RS stages")
+    parser.add_argument("--suggest-candidates", dest="suggest", action="store_true",
+                        help=f"Also write derived breakout candidates to {SUGGESTED_FILE} (review only)")
+    parser.add_argument("--period", default=PERIOD, help="History for the screen (default 6mo)")
+    parser.add_argument("--fixtures", help="Serve prices from <ticker>_1d.csv fixtures (offline, own DBs)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes/threads for screen and downloads")
+    parser.add_argument("--execute", action="store_true", help="Run the tradebot_phase2 session at the end")
+    parser.add_argument("--force", nargs="+", default=[], metavar="STAGE",
+                        help="Recompute these stages (and everything downstream)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-indicator-cache", dest="indicator_cache", action="store_false",
+                        help="Recompute every per-ticker indicator (skip indicator_cache.sqlite)")
+    parser.add_argument("--budget", type=float, default=BUDGET_SECS, help="Seconds the run should fit in")
+    args = parser.parse_args()
+    if args.execute and args.fixtures:
+        parser.error("--execute cannot be combined with --fixtures")
+
+    indicator_cache = None
+    if args.indicator_cache:
+        indicator_cache = IndicatorCache(FIXTURE_INDICATOR_DB) if args.fixtures else IndicatorCache()
+    pipeline = build_daily_pipeline(args, indicator_cache)
+    unknown = set(args.force) - set(pipeline.stages)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    t0 = time.perf_counter()
+    try:
+        results, timings = pipeline.run(force=args.force)
+    except FileNotFoundError as e:
+        print(f"⛔ Input file not found: {e}")
+        sys.exit(1)
+    finally:
+        if indicator_cache is not None:
+            indicator_cache.close()
+    total = time.perf_counter() - t0
+
+    decision = results["size"]["decision"]
+    sized = results["size"]["sized"]
+    print(f"\n✅ Phase {decision['phase']} | {len(results['shortlist'])} shortlisted | "
+          f"{0 if sized is None else int((sized['PositionSize'] > 0).sum())} sized")
+    cached = sum(1 for _, status, _ in timings if status == "cached")
+    flag = "✅" if total <= args.budget else "⚠️ over budget:"
+    print(f"{flag} pipeline took {total:.2f} s (budget {args.budget:.0f} s, {cached} stage(s) from cache)")
+
+
+if __name__ == "__main__":
+    main()
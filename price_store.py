@@ -0,0 +1,290 @@
+"""
+Local OHLCV Price Store
+---------------------------------------------------------------
+- Keeps bars on disk in SQLite, keyed by (ticker, interval)
+- Only asks the fetcher for bars newer than the last stored bar
+- Serves everything else from disk
+- Re-downloads a ticker when Yahoo re-adjusts its history (splits/dividends)
+- Batches tickers that need the same top-up into one bulk request
+- Fetchers are pluggable: YahooFetcher for live runs, CsvFetcher for
+  offline runs against saved fixture files
+
+Example:
+    store = PriceStore()
+    hist = store.history("AAPL", period="6mo")
+    result = store.history_many(["AAPL", "MSFT"], period="6mo")
+"""
+
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from bulk_download import BulkResult, DEFAULT_CHUNK_SIZE, download_many
+
+DEFAULT_DB = "price_store.sqlite"
+DEFAULT_TZ = "America/New_York"
+MAX_AGE_SECONDS = 3600          # skip top-ups if fetched within the last hour
+ADJUST_TOLERANCE = 1e-4         # relative close change that signals a re-adjustment
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_start(period, now=None):
+    """Converts a yfinance-style period ('5d', '6mo', '1y') to a start Timestamp."""
+    now = now if now is not None else pd.Timestamp.now(tz=DEFAULT_TZ)
+    m = _PERIOD_RE.match(period)
+    if not m:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "d":
+        offset = pd.DateOffset(days=n)
+    elif unit == "wk":
+        offset = pd.DateOffset(weeks=n)
+    elif unit == "mo":
+        offset = pd.DateOffset(months=n)
+    else:
+        offset = pd.DateOffset(years=n)
+    return (now - offset).normalize()
+
+
+def _readjusted(bars, last_ts, stored_close):
+    """
+    True if a completed bar we already stored came back with a different
+    close, i.e. Yahoo re-adjusted the series for a split or dividend.
+    """
+    if bars is None or bars.empty or last_ts.normalize() >= pd.Timestamp.now(tz=last_ts.tz).normalize():
+        return False
+    overlap = bars.loc[bars.index == last_ts, "Close"]
+    if overlap.empty:
+        return False
+    return abs(float(overlap.iloc[0]) - stored_close) > ADJUST_TOLERANCE * abs(stored_close)
+
+
+class Fetcher:
+    """
+    Fetcher interface: fetch() returns one ticker's bars from start onwards,
+    fetch_many() returns a BulkResult for several tickers. The default
+    fetch_many() simply loops over fetch().
+    """
+
+    def fetch(self, ticker, start, interval="1d"):
+        raise NotImplementedError
+
+    def fetch_many(self, tickers, start, interval="1d"):
+        result = BulkResult()
+        for ticker in tickers:
+            try:
+                df = self.fetch(ticker, start, interval)
+            except Exception as e:
+                result.failed[ticker] = "fetch error: %s" % e
+                continue
+            if df is None or df.empty:
+                result.failed[ticker] = "no data"
+            else:
+                result.frames[ticker] = df
+        return result
+
+
+class YahooFetcher(Fetcher):
+    """
+    Fetches bars from yfinance, chunk_size tickers per bulk request;
+    workers > 1 parallelises the download threads and single retries.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def fetch(self, ticker, start, interval="1d"):
+        import yfinance as yf
+        return yf.Ticker(ticker).history(start=start.strftime("%Y-%m-%d"), interval=interval)
+
+    def fetch_many(self, tickers, start, interval="1d"):
+        return download_many(tickers, start, interval, chunk_size=self.chunk_size,
+                             fetch_one=self.fetch, workers=self.workers)
+
+
+class CsvFetcher(Fetcher):
+    """
+    Serves bars from saved CSV fixtures named <ticker>_<interval>.csv
+    (a Date column plus Open/High/Low/Close/Volume). Stand-in for
+    yfinance when running offline.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, ticker, start, interval="1d"):
+        path = os.path.join(self.directory, f"{ticker}_{interval}.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=OHLCV)
+        df = pd.read_csv(path)
+        index = pd.to_datetime(df.pop("Date"), utc=True)
+        df.index = pd.DatetimeIndex(index).tz_convert(start.tz or DEFAULT_TZ)
+        return df[df.index >= start]
+
+
+class PriceStore:
+    def __init__(self, path=DEFAULT_DB, fetcher=None, max_age=MAX_AGE_SECONDS):
+        self.path = path
+        self.fetcher = fetcher if fetcher is not None else YahooFetcher()
+        self.max_age = max_age
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS bars (
+                ticker TEXT, interval TEXT, ts INTEGER,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, interval, ts)
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                ticker TEXT, interval TEXT, tz TEXT,
+                covered_from INTEGER, fetched_at REAL,
+                PRIMARY KEY (ticker, interval)
+            );
+        """)
+
+    def close(self):
+        self.db.close()
+
+    # === Reads ===
+    def _meta(self, ticker, interval):
+        return self.db.execute(
+            "SELECT tz, covered_from, fetched_at FROM meta WHERE ticker=? AND interval=?",
+            (ticker, interval)).fetchone()
+
+    def _last_bar(self, ticker, interval):
+        row = self.db.execute(
+            "SELECT ts, close FROM bars WHERE ticker=? AND interval=? ORDER BY ts DESC LIMIT 1",
+            (ticker, interval)).fetchone()
+        return row
+
+    def load(self, ticker, interval="1d", start=None):
+        """Returns the stored bars as a yfinance-shaped DataFrame (no network)."""
+        meta = self._meta(ticker, interval)
+        tz = meta[0] if meta else DEFAULT_TZ
+        since = int(start.timestamp()) if start is not None else 0
+        rows = self.db.execute(
+            "SELECT ts, open, high, low, close, volume FROM bars "
+            "WHERE ticker=? AND interval=? AND ts>=? ORDER BY ts",
+            (ticker, interval, since)).fetchall()
+        df = pd.DataFrame(rows, columns=["ts"] + OHLCV)
+        index = pd.to_datetime(df.pop("ts"), unit="s", utc=True).dt.tz_convert(tz)
+        df.index = pd.DatetimeIndex(index, name="Date")
+        return df
+
+    # === Writes ===
+    def _save(self, ticker, interval, bars, covered_from):
+        meta = self._meta(ticker, interval)
+        if bars is not None and not bars.empty:
+            if meta:
+                tz = meta[0]
+            else:
+                tz = str(bars.index.tz) if bars.index.tz is not None else DEFAULT_TZ
+            index = bars.index if bars.index.tz is not None else bars.index.tz_localize(tz)
+            ts = index.tz_convert("UTC").as_unit("s").asi8.tolist()
+            cols = bars.reindex(columns=OHLCV).astype(float)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(ticker, interval, t, *vals) for t, vals in zip(ts, cols.itertuples(index=False))])
+        else:
+            tz = meta[0] if meta else DEFAULT_TZ
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?, ?)",
+            (ticker, interval, tz, int(covered_from.timestamp()), time.time()))
+        self.db.commit()
+
+    def _drop(self, ticker, interval):
+        self.db.execute("DELETE FROM bars WHERE ticker=? AND interval=?", (ticker, interval))
+        self.db.execute("DELETE FROM meta WHERE ticker=? AND interval=?", (ticker, interval))
+
+    # === Incremental refresh ===
+    def _plan(self, ticker, start, interval):
+        """
+        Works out what a ticker needs: None if its stored bars are fresh,
+        else (fetch_start, covered_from, last_bar). last_bar is None when
+        the stored bars have to be replaced rather than topped up.
+        """
+        meta = self._meta(ticker, interval)
+
+        # Nothing stored (or not far enough back): full download from start
+        if meta is None or meta[1] > int(start.timestamp()):
+            return start, start, None
+
+        if time.time() - meta[2] < self.max_age:
+            return None
+
+        covered_from = pd.Timestamp(meta[1], unit="s", tz="UTC").tz_convert(meta[0])
+        last = self._last_bar(ticker, interval)
+        if last is None:
+            return covered_from, covered_from, None
+
+        # Top-up from the last stored bar (inclusive, it may have been partial)
+        last_ts = pd.Timestamp(last[0], unit="s", tz="UTC").tz_convert(meta[0])
+        return last_ts.normalize(), covered_from, (last_ts, last[1])
+
+    def _apply(self, ticker, interval, bars, plan):
+        _, covered_from, last = plan
+        if last is None:
+            if bars is None or bars.empty:
+                return
+            self._drop(ticker, interval)
+        elif _readjusted(bars, *last):
+            # History was re-adjusted upstream: stored bars are stale, but
+            # only replaced once the full re-download actually returned bars
+            print(f"⚠️ {ticker}: adjusted history changed, re-downloading")
+            try:
+                bars = self.fetcher.fetch(ticker, covered_from, interval)
+            except Exception as e:
+                bars = None
+                print(f"⚠️ {ticker}: re-download failed ({e})")
+            if bars is None or bars.empty:
+                print(f"⚠️ {ticker}: keeping the stored bars until the next refresh")
+                return
+            self._drop(ticker, interval)
+        self._save(ticker, interval, bars, covered_from)
+
+    def refresh(self, ticker, start, interval="1d"):
+        """Brings the stored bars for ticker up to date, back to start."""
+        plan = self._plan(ticker, start, interval)
+        if plan is not None:
+            self._apply(ticker, interval, self.fetcher.fetch(ticker, plan[0], interval), plan)
+
+    def history(self, ticker, period="6mo", interval="1d"):
+        """Drop-in for yf.Ticker(ticker).history(period=..., interval=...)."""
+        start = period_start(period)
+        self.refresh(ticker, start, interval)
+        return self.load(ticker, interval, start)
+
+    def history_many(self, tickers, period="6mo", interval="1d"):
+        """
+        Batched history(): tickers needing the same top-up start are fetched
+        together through fetcher.fetch_many. Returns a BulkResult; tickers
+        whose refresh failed are still served from disk when stored.
+        """
+        start = period_start(period)
+        plans = {t: self._plan(t, start, interval) for t in dict.fromkeys(tickers)}
+
+        groups = {}
+        for ticker, plan in plans.items():
+            if plan is not None:
+                groups.setdefault(plan[0], []).append(ticker)
+
+        failed = {}
+        for fetch_start, group in groups.items():
+            fetched = self.fetcher.fetch_many(group, fetch_start, interval)
+            failed.update(fetched.failed)
+            for ticker, bars in fetched.frames.items():
+                self._apply(ticker, interval, bars, plans[ticker])
+
+        frames = {}
+        for ticker in plans:
+            hist = self.load(ticker, interval, start)
+            if not hist.empty:
+                frames[ticker] = hist
+            elif ticker not in failed:
+                failed[ticker] = "no data"
+        return BulkResult(frames, failed)
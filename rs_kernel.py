@@ -0,0 +1,143 @@
+"""
+Vectorized Returns / RS Kernel
+---------------------------------------------------------------
+- Takes one aligned (dates x tickers) Close panel
+- Finds the 1M/3M/6M anchor rows once with searchsorted
+- Computes returns, percentile ranks and the weighted RS_Score as
+  whole-array operations (no per-ticker loop)
+
+Skip rules match the old per-ticker get_returns():
+- fewer than MIN_HISTORY bars                      -> skipped
+- no bar on/after a window cutoff                  -> skipped
+- NaN close today or at any anchor                 -> skipped
+- a window with cutoff None anchors on the first bar of the history
+
+Example:
+    returns = compute_returns(build_panel(frames), {"1M": d1, "3M": d3, "6M": None})
+    ranked = rank_table(returns)
+"""
+
+import numpy as np
+import pandas as pd
+
+from panel import build_panel
+
+RS_WEIGHTS = {"1M": 0.2, "3M": 0.3, "6M": 0.5}
+MIN_HISTORY = 126
+
+
+def _next_present(present):
+    """next_row[i, j] = first row >= i where ticker j has a bar (n if none)."""
+    n = present.shape[0]
+    rows = np.where(present, np.arange(n)[:, None], n)
+    return np.minimum.accumulate(rows[::-1], axis=0)[::-1]
+
+
+def compute_returns(panel, windows, min_history=MIN_HISTORY):
+    """
+    Returns a DataFrame with Ticker, Price and Return_<window>_% for every
+    ticker that passes the skip rules, in panel column order.
+    """
+    n, m = panel.values.shape
+    columns = ["Ticker", "Price"] + [f"Return_{w}_%" for w in windows]
+    if n == 0 or m == 0:
+        return pd.DataFrame(columns=columns)
+
+    closes, present = panel.values, panel.present
+    cols = np.arange(m)
+    rows = np.arange(n)[:, None]
+
+    counts = present.sum(axis=0)
+    first = np.where(present, rows, n).min(axis=0)
+    last = np.where(present, rows, -1).max(axis=0)
+    next_row = _next_present(present)
+
+    ok = counts >= min_history
+    close_today = closes[np.clip(last, 0, n - 1), cols]
+    ok &= ~np.isnan(close_today)
+
+    anchors = {}
+    for window, cutoff in windows.items():
+        if cutoff is None:
+            anchor = first
+        else:
+            start = panel.dates.searchsorted(pd.Timestamp(cutoff), side="left")
+            anchor = next_row[start] if start < n else np.full(m, n)
+        ok &= anchor < n
+        value = closes[np.clip(anchor, 0, n - 1), cols]
+        ok &= ~np.isnan(value)
+        anchors[window] = value
+
+    out = {"Ticker": np.asarray(panel.tickers, dtype=object)[ok],
+           "Price": np.round(close_today[ok], 2)}
+    for window, close_then in anchors.items():
+        close_then = close_then[ok]
+        out[f"Return_{window}_%"] = np.round((close_today[ok] - close_then) / close_then * 100, 2)
+    return pd.DataFrame(out, columns=columns)
+
+
+def returns_for_frames(frames, windows, min_history=MIN_HISTORY):
+    """compute_returns() for a {ticker: frame} chunk (process-pool friendly)."""
+    return compute_returns(build_panel(frames, "Close"), windows, min_history)
+
+
+def percentile_rank(values):
+    """Same as pd.Series.rank(pct=True) * 100 (average method) for NaN-free input."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    uniques, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    starts = np.cumsum(counts) - counts
+    avg_rank = starts + (counts + 1) / 2
+    return avg_rank[inverse] / values.size * 100
+
+
+def rank_against(universe_values, values):
+    """
+    Percentile rank of each value as if it alone were appended to
+    universe_values (average method), for tickers outside the universe.
+    """
+    ref = np.sort(np.asarray(universe_values, dtype=float))
+    values = np.asarray(values, dtype=float)
+    less = ref.searchsorted(values, side="left")
+    equal = ref.searchsorted(values, side="right") - less
+    avg_rank = less + (equal + 2) / 2
+    return avg_rank / (ref.size + 1) * 100
+
+
+def rs_score(ranks, weights=RS_WEIGHTS):
+    """Weighted RS_Score from {window: rank array}."""
+    score = None
+    for window, weight in weights.items():
+        term = ranks[window] * weight
+        score = term if score is None else score + term
+    return np.round(score, 2)
+
+
+def rank_table(returns, weights=RS_WEIGHTS):
+    """
+    Percentile-ranks every row of a returns DataFrame against the others
+    and adds the <window>_Rank columns plus the weighted RS_Score.
+    """
+    df = returns.fillna(0)
+    ranks = {}
+    for window in weights:
+        ranks[window] = percentile_rank(df[f"Return_{window}_%"].to_numpy())
+        df[f"{window}_Rank"] = ranks[window]
+    df["RS_Score"] = rs_score(ranks, weights)
+    return df
+
+
+def rank_outsiders(universe_table, outsiders, weights=RS_WEIGHTS):
+    """
+    Ranks each outsider row against universe_table (an already ranked
+    universe) plus itself, without re-ranking the universe.
+    """
+    df = outsiders.fillna(0)
+    ranks = {}
+    for window in weights:
+        col = f"Return_{window}_%"
+        ranks[window] = rank_against(universe_table[col].to_numpy(), df[col].to_numpy())
+        df[f"{window}_Rank"] = ranks[window]
+    df["RS_Score"] = rs_score(ranks, weights)
+    return df
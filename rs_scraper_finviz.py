@@ -10,34 +10,123 @@ import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-def get_finviz_rs(tickers):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    rs_data = {}
+FINVIZ_URL = 'https://finviz.com/quote.ashx'
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
 
-    for ticker in tickers:
-        try:
-            url = f'https://finviz.com/quote.ashx?t={ticker}'
-            page = requests.get(url, headers=headers)
-            soup = BeautifulSoup(page.content, 'html.parser')
-            table = soup.find_all('table', class_='snapshot-table2')
+MAX_CONCURRENCY = 4     # parallel requests in flight
+RATE_PER_SEC = 1.0      # sustained request rate (the old fixed sleep(1))
+BURST = 2               # requests allowed back-to-back before throttling
+MAX_RETRIES = 3         # retries on 429/5xx, with exponential backoff
+BACKOFF = 1.0           # seconds; doubles per retry, Retry-After wins if sent
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
-            if not table:
-                continue
 
-            for row in table[0].find_all('tr'):
-                cells = row.find_all('td')
-                for i in range(len(cells)):
-                    if cells[i].text == 'RSI (14)':
-                        rs_value = cells[i + 1].text
-                        rs_data[ticker] = float(rs_value)
-                        break
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens/sec, at most burst banked."""
 
-            time.sleep(1)  # polite delay
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
-        except Exception as e:
-            print(f"Error scraping {ticker}: {e}")
-            continue
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
 
-    return rs_data
 
+def make_session(pool_size=MAX_CONCURRENCY):
+    """
+    Keep-alive session with a connection pool. Retries are left to
+    get_finviz_rs, so every attempt draws a token from its rate limiter.
+    """
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def retry_delay(response, attempt, backoff=BACKOFF):
+    """Seconds before retry attempt + 1: Retry-After if sent, else backoff * 2**attempt."""
+    after = response.headers.get('Retry-After', '') if response is not None else ''
+    if after.strip().isdigit():
+        return float(after)
+    return backoff * 2 ** attempt
+
+
+def parse_snapshot(html, field='RSI (14)'):
+    """
+    Returns the numeric value of field from a Finviz snapshot-table2
+    ('%' stripped), or None if the field is missing or not a number ('-').
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find_all('table', class_='snapshot-table2')
+
+    if not table:
+        return None
+
+    for row in table[0].find_all('tr'):
+        cells = row.find_all('td')
+        for i in range(len(cells) - 1):
+            if cells[i].text == field:
+                try:
+                    return float(cells[i + 1].text.replace('%', ''))
+                except ValueError:
+                    return None
+    return None
+
+
+def get_finviz_rs(tickers, base_url=FINVIZ_URL, field='RSI (14)',
+                  concurrency=MAX_CONCURRENCY, rate=RATE_PER_SEC, burst=BURST, session=None,
+                  retries=MAX_RETRIES, backoff=BACKOFF):
+    """
+    Scrapes field (RSI (14) by default) for every ticker and returns
+    {ticker: value}. Requests share one keep-alive session, run
+    concurrency at a time and are throttled to rate per second; a 429/5xx
+    or connection error is retried up to retries times, each retry
+    paced by the same token bucket.
+    Point base_url at a local server to run against saved snapshot pages.
+    """
+    session = session if session is not None else make_session(concurrency)
+    bucket = TokenBucket(rate, burst)
+
+    def fetch(ticker):
+        for attempt in range(retries + 1):
+            bucket.acquire()
+            page = None
+            try:
+                page = session.get(base_url, params={'t': ticker}, timeout=15)
+                if page.status_code not in RETRY_STATUSES:
+                    page.raise_for_status()
+                    return ticker, parse_snapshot(page.content, field)
+                error = f"HTTP {page.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception as e:
+                print(f"Error scraping {ticker}: {e}")
+                return ticker, None
+            if attempt < retries:
+                time.sleep(retry_delay(page, attempt, backoff))
+        print(f"Error scraping {ticker}: {error} (gave up after {retries} retries)")
+        return ticker, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, tickers))
+
+    # Keep the caller's ticker order
+    return {ticker: value for ticker, value in results if value is not None}
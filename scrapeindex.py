@@ -1,22 +1,139 @@
+"""
+Index Constituent Lists (cached)
+---------------------------------------------------------------
+- Scrapes S&P 500 / ASX 200 / NIFTY 50 members from Wikipedia
+- Keeps each list on disk (index_cache/<name>.json) with a TTL
+- Refreshes lazily, only when the cached copy is stale, using the
+  page's Last-Modified header so an unchanged page is not re-parsed
+- Falls back to the last good snapshot if a refresh or parse fails
+
+Example:
+    universe = get_constituents("SPY")
+"""
+
+import json
+import os
+import time
+from io import StringIO
+
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+
+CACHE_DIR = "index_cache"
+CACHE_TTL = 24 * 3600       # seconds between refresh checks
+
+headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+}
+
+SP500_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+ASX200_URL = 'https://en.wikipedia.org/wiki/S%26P/ASX_200'
+NIFTY50_URL = 'https://en.wikipedia.org/wiki/NIFTY_50'
+
+
+def _find_column(tables, keyword):
+    """First column, in the first table that has one, whose name contains keyword."""
+    for table in tables:
+        for col in table.columns:
+            if keyword in str(col).lower():
+                return table[col]
+    return None
+
+
+def parse_sp500(html):
+    column = _find_column(pd.read_html(StringIO(html)), 'symbol')
+    if column is None:
+        raise ValueError("Couldn't find a table with a 'Symbol' column on SP500 page.")
+    return [f"{code}" for code in column]
+
+
+def parse_asx200(html):
+    column = _find_column(pd.read_html(StringIO(html)), 'code')
+    if column is None:
+        raise ValueError("Couldn't find a table with a 'Code' column on ASX200 page.")
+    return [f"{code}.AX" for code in column]
+
+
+def parse_nifty50(html):
+    column = _find_column(pd.read_html(StringIO(html)), 'symbol')
+    if column is None:
+        raise ValueError("No table with a 'Symbol' column found")
+    return [f"{code}.NS" for code in column]
+
+
+# Benchmark name -> (page, parser)
+SOURCES = {
+    'SPY': (SP500_URL, parse_sp500),
+    'ASX200': (ASX200_URL, parse_asx200),
+    'NIFTY50': (NIFTY50_URL, parse_nifty50),
+}
+
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.json")
+
+
+def _read_cache(name):
+    try:
+        with open(_cache_path(name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(name, snapshot):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _cache_path(name) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=1)
+    os.replace(tmp, _cache_path(name))
+
+
+def get_constituents(name, ttl=CACHE_TTL, refresh=False):
+    """
+    Constituent symbols for a benchmark ('SPY', 'ASX200', 'NIFTY50').
+    Served from disk while younger than ttl seconds.
+    """
+    cached = _read_cache(name)
+    if cached and not refresh and time.time() - cached['fetched_at'] < ttl:
+        return cached['symbols']
+
+    url, parse = SOURCES[name]
+    req_headers = dict(headers)
+    if cached and cached.get('last_modified'):
+        req_headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        res = requests.get(url, headers=req_headers, timeout=30)
+        if res.status_code == 304 and cached:
+            symbols = cached['symbols']
+        else:
+            res.raise_for_status()
+            symbols = parse(res.text)
+            if not symbols:
+                raise ValueError("empty constituent list")
+    except Exception as e:
+        if cached:
+            age_h = (time.time() - cached['fetched_at']) / 3600
+            print(f"⚠️ {name}: refresh failed ({e}); using last good snapshot ({age_h:.0f}h old)")
+            return cached['symbols']
+        raise
+
+    _write_cache(name, {
+        'name': name,
+        'url': url,
+        'fetched_at': time.time(),
+        'last_modified': res.headers.get('Last-Modified') or (cached or {}).get('last_modified'),
+        'symbols': symbols,
+    })
+    return symbols
+
 
 def get_sp500():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    table = pd.read_html(url)[0]
-    return table['Symbol'].tolist()
+    return get_constituents('SPY')
 
 def get_asx200():
-    url = 'https://en.wikipedia.org/wiki/S%26P/ASX_200'
-    r = requests.get(url)
-    soup = BeautifulSoup(r.content, 'lxml')
-    table = soup.find('table', {'class': 'wikitable'})
-    df = pd.read_html(str(table))[0]
-    return [f"{code}.AX" for code in df['ASX code']]
+    return get_constituents('ASX200')
 
 def get_nifty50():
-    url = 'https://en.wikipedia.org/wiki/NIFTY_50'
-    table = pd.read_html(url)[1]
-    return [f"{code}.NS" for code in table['Symbol']]
-
+    return get_constituents('NIFTY50')
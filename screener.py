@@ -0,0 +1,129 @@
+"""
+Vectorized Breakout Screener
+---------------------------------------------------------------
+- Computes ATR% (true range), base duration and price for a whole panel
+  of tickers with 2-D array operations (no per-ticker pandas loop)
+- Applies the base/volatility filters for the step-2 shortlist
+  (MAX_ATR_PCT / MIN_BASE_DAYS, overridable per run)
+- Writes ranked_buy_list_step2 and ranked_buy_list_final in one pass
+  (typed Parquet + CSV via artifacts.py); the final list is filtered only
+  on having an RS_Rating, as in the original per-ticker script
+
+Example:
+    df = screen(build_panels(bulk.frames))
+    write_buy_lists(df)
+"""
+
+import numpy as np
+import pandas as pd
+
+from artifacts import write_artifact
+from indicators import compute_indicators
+from panel import build_panels
+
+ATR_PERIOD = 14
+BASE_WINDOW = 60        # bars looked back for the base
+BASE_RANGE = 0.90       # a bar is "in the base" if close >= 90% of the window's max close
+
+# Step-2 shortlist filters. The original script wrote only the final list;
+# these match the checked-in ranked_buy_list_step2.csv (all its rows have
+# ATR% <= 3.89 and a base of >= 35 days, and they pick exactly its rows out
+# of the checked-in final list). They decide ranked_buy_list_step2 only;
+# override them with sortwatchlist.py --max-atr-pct / --min-base-days.
+MAX_ATR_PCT = 4.0       # tight enough to size a stop
+MIN_BASE_DAYS = 35      # long enough base (bars of the last BASE_WINDOW)
+
+COLUMNS = ['Ticker', 'Price', 'ATR%', 'Base_Duration_Days', 'RS_Rating']
+STEP2_FILE = 'ranked_buy_list_step2.csv'
+FINAL_FILE = 'ranked_buy_list_final.csv'
+
+
+def true_range(high, low, close):
+    """Wilder true range on right-aligned matrices; first bar falls back to H-L."""
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    hl = high - low
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(hl, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return np.where(np.isnan(hl), np.nan, tr)
+
+
+def atr_last(high, low, close, period=ATR_PERIOD):
+    """Simple-average ATR over each ticker's last period bars (NaN if short)."""
+    if close.shape[0] < period:
+        return np.full(close.shape[1], np.nan)
+    return true_range(high, low, close)[-period:].mean(axis=0)
+
+
+def base_duration(close, window=BASE_WINDOW, pct=BASE_RANGE):
+    """Bars in the last window whose close is within pct of the window's max close."""
+    recent = close[-window:]
+    with np.errstate(invalid="ignore"):
+        highest = np.where(np.isnan(recent), -np.inf, recent).max(axis=0)
+        return (recent >= highest * pct).sum(axis=0)
+
+
+def screen(panels):
+    """
+    Price, ATR% and base duration for every ticker, from the
+    {'High', 'Low', 'Close'} panels returned by panel.build_panels.
+    """
+    close_panel = panels['Close']
+    if not close_panel.tickers:
+        return pd.DataFrame(columns=COLUMNS)
+
+    high, low, close = (panels[f].aligned() for f in ("High", "Low", "Close"))
+
+    price = close[-1]
+    atr = atr_last(high, low, close)
+    return pd.DataFrame({
+        'Ticker': close_panel.tickers,
+        'Price': np.round(price, 2),
+        'ATR%': np.round(atr / price * 100, 2),
+        'Base_Duration_Days': base_duration(close),
+        'RS_Rating': np.nan,
+    }, columns=COLUMNS)
+
+
+def screen_chunk(frames, indicators=None):
+    """
+    screen() plus the latest indicator values (as extra columns) for a
+    {ticker: frame} chunk. Top-level so it can run in a process pool.
+    """
+    panels = build_panels(frames, ("High", "Low", "Close"))
+    df = screen(panels)
+    if indicators:
+        latest = compute_indicators(panels['Close'], indicators) if len(df) else None
+        for column in indicators:
+            df[column] = df['Ticker'].map(latest[column]) if latest is not None else np.nan
+    return df
+
+
+def screen_spec(indicators=None):
+    """indicator_cache spec of the screen_chunk() columns ({column: (indicator, params)})."""
+    spec = {
+        'Price': ('price', {}),
+        'ATR%': ('atr_pct', {'period': ATR_PERIOD}),
+        'Base_Duration_Days': ('base_duration', {'window': BASE_WINDOW, 'pct': BASE_RANGE}),
+    }
+    spec.update(indicators or {})
+    return spec
+
+
+def shortlist(df, max_atr_pct=MAX_ATR_PCT, min_base_days=MIN_BASE_DAYS):
+    """Step-2 candidates: tight ATR% and a long enough base."""
+    return df[(df['ATR%'] <= max_atr_pct) & (df['Base_Duration_Days'] >= min_base_days)]
+
+
+def write_buy_lists(df, step2_file=STEP2_FILE, final_file=FINAL_FILE,
+                    max_atr_pct=MAX_ATR_PCT, min_base_days=MIN_BASE_DAYS):
+    """
+    Writes the step-2 shortlist (RS_Rating left blank for manual review)
+    and the final list (rows with an RS_Rating, best first).
+    Returns the final DataFrame.
+    """
+    step2 = shortlist(df, max_atr_pct, min_base_days).assign(RS_Rating=np.nan)
+    write_artifact(step2, "buy_list", step2_file)
+
+    final = df.dropna(subset=['RS_Rating']).sort_values(by='RS_Rating', ascending=False)
+    write_artifact(final, "buy_list", final_file)
+    return final
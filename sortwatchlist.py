@@ -6,116 +6,92 @@
 # ///
 
 
-import yfinance as yf
-import pandas as pd
-from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
-import time
-
-def get_sp500():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    table = pd.read_html(url)[0]
-    return table['Symbol'].tolist()
-
-def get_asx200():
-    url = 'https://en.wikipedia.org/wiki/S%26P/ASX_200'
-    r = requests.get(url)
-    soup = BeautifulSoup(r.content, 'lxml')
-    table = soup.find('table', {'class': 'wikitable'})
-    df = pd.read_html(str(table))[0]
-    return [f"{code}.AX" for code in df['ASX code']]
-
-def get_nifty50():
-    url = 'https://en.wikipedia.org/wiki/NIFTY_50'
-    table = pd.read_html(url)[1]
-    return [f"{code}.NS" for code in table['Symbol']]
-
-def get_finviz_rs(tickers):
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    rs_data = {}
-
-    for ticker in tickers:
-        try:
-            url = f'https://finviz.com/quote.ashx?t={ticker}'
-            response = requests.get(url, headers=headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            table = soup.find_all('table', class_='snapshot-table2')
-
-            if not table:
-                continue
-
-            for row in table[0].find_all('tr'):
-                cells = row.find_all('td')
-                for i in range(len(cells)):
-                    if cells[i].text == 'RSI (14)':
-                        rs_value = cells[i + 1].text.replace('%', '')
-                        rs_data[ticker] = float(rs_value)
-                        break
-
-            time.sleep(1)  # Polite delay to avoid being blocked
-
-        except Exception as e:
-            print(f"Error scraping {ticker}: {e}")
-            continue
-
-    return rs_data
-
-
-# Load tickers
-watchlist = pd.read_csv("ILAN_COMBINED.csv")['Ticker'].tolist()
+import argparse
+from functools import partial
 
-results = []
-
-for ticker in watchlist:
+import pandas as pd
+from price_store import PriceStore, YahooFetcher
+from rs_scraper_finviz import get_finviz_rs
+from indicator_cache import IndicatorCache
+from screener import COLUMNS, MAX_ATR_PCT, MIN_BASE_DAYS, screen_chunk, screen_spec, write_buy_lists
+from parallel import run_chunks, split_dict
+
+# === Config ===
+INDICATORS = {
+    'RSI_14': ('RSI', {'period': 14}),
+}
+FINVIZ_CROSS_CHECK = False      # also scrape Finviz RSI (14) and report mismatches
+CROSS_CHECK_TOLERANCE = 1.0     # RSI points
+
+
+def compute_screen(frames, workers=1):
+    # ATR%, base duration, price and RSI(14) for every ticker at once,
+    # split across worker processes by ticker
+    parts = run_chunks(partial(screen_chunk, indicators=INDICATORS),
+                       split_dict(frames, workers), workers, kind="process")
+    return pd.concat(parts, ignore_index=True) if parts else screen_chunk({}, INDICATORS)
+
+
+def screen_frames(frames, workers=1, cache=None):
+    """
+    Screen table (ATR%, base duration, price, RS_Rating) for {ticker: history}.
+    With an IndicatorCache only tickers without cached values for their
+    latest bar are computed.
+    """
+    if cache is None:
+        df = compute_screen(frames, workers)
+    else:
+        df = cache.lookup(frames, screen_spec(INDICATORS), partial(compute_screen, workers=workers))
+        df = df.reindex(columns=COLUMNS + list(INDICATORS))
+    df['RS_Rating'] = df.pop('RSI_14')
+
+    # Optional: compare against the Finviz snapshot value
+    if FINVIZ_CROSS_CHECK:
+        rs_values = get_finviz_rs(df['Ticker'].tolist(), concurrency=max(workers, 1))
+        diff = (df['RS_Rating'] - df['Ticker'].map(rs_values)).abs()
+        off = df.loc[diff > CROSS_CHECK_TOLERANCE, 'Ticker'].tolist()
+        print(f"Finviz cross-check: {diff.notna().sum()} compared, {len(off)} off by > {CROSS_CHECK_TOLERANCE}: {off}")
+    return df
+
+
+def run(watchlist_file="ILAN_COMBINED.csv", workers=1, use_cache=True,
+        max_atr_pct=MAX_ATR_PCT, min_base_days=MIN_BASE_DAYS):
+    # Load tickers
+    watchlist = pd.read_csv(watchlist_file)['Ticker'].tolist()
+
+    store = PriceStore(fetcher=YahooFetcher(workers=workers))
+    bulk = store.history_many(watchlist, period="6mo")
+    if bulk.failed:
+        print(f"No data for {len(bulk.failed)} tickers: {sorted(bulk.failed)}")
+
+    frames = {t: bulk.frames[t] for t in watchlist if t in bulk.frames}
+    cache = IndicatorCache() if use_cache else None
     try:
-        data = yf.Ticker(ticker).history(period="6mo")
-
-        if data.empty:
-            continue
-
-        # Latest Close
-        close = data['Close'].iloc[-1]
-
-        # ATR(14)
-        data['H-L'] = data['High'] - data['Low']
-        atr = data['H-L'].rolling(14).mean().iloc[-1]
-        atr_percent = round((atr / close) * 100, 2)
-
-        # Base Duration: Price stayed in 10% range of max close over last 60 bars
-        recent = data['Close'][-60:]
-        highest_close = recent.max()
-        within_range = recent[recent >= highest_close * 0.90]
-        base_duration = len(within_range)
-
-        # Append result (RS_Rating will be manually filled later)
-        results.append({
-            'Ticker': ticker,
-            'Price': round(close, 2),
-            'ATR%': atr_percent,
-            'Base_Duration_Days': base_duration,
-            'RS_Rating': None  # Manual entry or future scraper
-        })
-
-    except Exception as e:
-        print(f"Error on {ticker}: {e}")
-
-# Create DataFrame
-df = pd.DataFrame(results)
-
-# After df is created
-rs_values = get_finviz_rs(df['Ticker'].tolist())
-
-# Map RS into DataFrame
-df['RS_Rating'] = df['Ticker'].map(rs_values)
-
-# Drop rows without RS value
-df = df.dropna(subset=['RS_Rating'])
-
-# Final sort
-df = df.sort_values(by='RS_Rating', ascending=False)
-
-# Output final list
-df.to_csv('ranked_buy_list_final.csv', index=False)
-print(df.head(10))
+        df = screen_frames(frames, workers, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # Step-2 shortlist + final list sorted by RS, written in one pass
+    return write_buy_lists(df, max_atr_pct=max_atr_pct, min_base_days=min_base_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ATR / base-duration / RSI breakout screen")
+    parser.add_argument("--watchlist", default="ILAN_COMBINED.csv", help="CSV with a Ticker column")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for indicator math and threads for downloads (default 1)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="Recompute every indicator (skip indicator_cache.sqlite)")
+    parser.add_argument("--max-atr-pct", type=float, default=MAX_ATR_PCT,
+                        help=f"Step-2 filter: highest ATR%% kept (default {MAX_ATR_PCT})")
+    parser.add_argument("--min-base-days", type=int, default=MIN_BASE_DAYS,
+                        help=f"Step-2 filter: shortest base kept, in days (default {MIN_BASE_DAYS})")
+    args = parser.parse_args()
+
+    df = run(args.watchlist, args.workers, args.cache, args.max_atr_pct, args.min_base_days)
+    print(df.head(10))
+
+
+if __name__ == "__main__":
+    main()
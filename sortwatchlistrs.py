@@ -1,220 +1,173 @@
-import yfinance as yf
+import argparse
+from datetime import datetime, timedelta
+from functools import partial
+
 import pandas as pd
-from datetime import datetime,timedelta
-import requests
-from bs4 import BeautifulSoup
-import time
-from io import StringIO
 import pytz
-import numpy as np
-import math
-
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-}
-
-def get_sp500():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    res = requests.get(url, headers=headers)
-
-    # Load all tables and find one with a Symbol column
-    tables = pd.read_html(StringIO(res.text))
-
-    symbol_col = None
-    target_table = None
-
-    for table in tables:
-        for col in table.columns:
-            if 'symbol' in str(col).lower():
-                symbol_col = col
-                target_table = table
-                break
-        if target_table is not None:
-            break
-
-    if target_table is None:
-        raise ValueError("Couldn't find a table with a 'Symbol' column on SP500 page.")
-
-    return [f"{code}" for code in target_table[symbol_col]]
-
-def get_asx200():
-    url = 'https://en.wikipedia.org/wiki/S%26P/ASX_200'
-    res = requests.get(url, headers=headers)
-    return [f"{code}.AX" for code in pd.read_html(StringIO(res.text))[0]['Code']]
-
-def get_nifty50():
-    url = 'https://en.wikipedia.org/wiki/NIFTY_50'
-    res = requests.get(url, headers=headers)
-
-    tables = pd.read_html(StringIO(res.text))
-    symbol_col = None
-    target_table = None
-
-    for table in tables:
-        for col in table.columns:
-            if 'symbol' in str(col).lower():
-                symbol_col = col
-                target_table = table
-                break
-        if target_table is not None:
-            break
-
-    if target_table is None:
-        raise ValueError("No table with a 'Symbol' column found")
-
-    return [f"{code}.NS" for code in target_table[symbol_col]]
+from price_store import PriceStore, YahooFetcher
+from scrapeindex import get_constituents
+from rs_kernel import MIN_HISTORY, returns_for_frames, rank_table, rank_outsiders
+from parallel import run_chunks, split_dict
+from artifacts import write_artifact
+from indicator_cache import IndicatorCache
 
 def fix_yahoo_ticker(ticker):
     return ticker.replace('.', '-')
 
 # === Step 1: Define Benchmark Universes ===
-benchmark_universes = {
-    'SPY': get_sp500(),
-    #'ASX200': get_asx200(),
-    'NIFTY50': get_nifty50()
-}
+# Loaded lazily from the constituent cache, only for benchmarks in the watchlist
+BENCHMARKS = ['SPY', 'NIFTY50']     # 'ASX200' also available
 
 # === Step 2: Define Time Windows ===
 nytz = pytz.timezone("America/New_York")
-now = datetime.now(nytz)
 
-windows = {
-    '1M': now - timedelta(days=21),
-    '3M': now - timedelta(days=63),
-    '6M': now - timedelta(days=126),
-}
+def rs_anchors(now=None):
+    """
+    Cutoff per RS window. 6M anchors on the first bar of the 6mo
+    history, not on now - 126 days.
+    """
+    now = now if now is not None else datetime.now(nytz)
+    return {
+        '1M': now - timedelta(days=21),
+        '3M': now - timedelta(days=63),
+        '6M': None,
+    }
 
 # === Step 3: Function to Get Returns ===
-def get_returns(tickers):
-    returns = []
-    for ticker in tickers:
-        try:
-            yf_ticker = fix_yahoo_ticker(ticker)
-            hist = yf.Ticker(yf_ticker).history(period="6mo")
-            if len(hist) < 126:
-                continue
-            
-            if hist is None or hist.empty:
-                print(f"⚠️ Skipping {ticker}: no data (yf: {yf_ticker})")
-                continue
-
-            close_today = hist['Close'].iloc[-1]
-            # 1M Close
-            #print("🧪 close_today :", close_today)
-            #print(type(close_today))
-            close_1m_filtered = hist.loc[hist.index >= windows['1M']]['Close']
-            if close_1m_filtered.empty:
-                print(f"⚠️ No 1M data for {ticker}")
-                continue
-            close_1m = close_1m_filtered.iloc[0]
-            #print("🧪 close_1m :", close_1m)
-            #print(type(close_1m))
-
-            # 3M Close
-            close_3m_filtered = hist.loc[hist.index >= windows['3M']]['Close']
-            if close_3m_filtered.empty:
-                print(f"⚠️ No 3M data for {ticker}")
-                continue
-            close_3m = close_3m_filtered.iloc[0]
-            #print("🧪 close_3m :", close_3m)
-            #print(type(close_3m))
-
-            # 6M Close (entire history)
-            close_6m_filtered = hist['Close'].iloc[0]
-            if close_6m_filtered is None:
-                print(f"⚠️ No 6M data for {ticker}")
-                continue
-            close_6m = close_6m_filtered
-            #print("🧪 close_6m :", close_6m)
-            #print(type(close_6m))
-
-            if np.isnan(close_today):
-                print(f"⚠️ NaN detected in return calc for {ticker} (missing Close today data)")
-                close_today = 0
-                continue 
-            if np.isnan(close_1m):
-                print(f"⚠️ NaN detected in return calc for {ticker} (missing 1M data)")
-                close_1m = 0
-                continue
-            if np.isnan(close_3m):
-                print(f"⚠️ NaN detected in return calc for {ticker} (missing 3M data)")
-                close_3m = 0
-                continue
-            if np.isnan(close_6m):
-                close_6m = 0
-                print(f"⚠️ NaN detected in return calc for {ticker} (missing 6M data)")
-                continue 
-            
-
-            r1m = (close_today - close_1m) / close_1m * 100
-            r3m = (close_today - close_3m) / close_3m * 100
-            r6m = (close_today - close_6m) / close_6m * 100
-
-            returns.append({
-                'Ticker': ticker,
-                'Price': round(close_today, 2),
-                'Return_1M_%': round(r1m, 2) if not pd.isna(r1m) else np.nan,
-                'Return_3M_%': round(r3m, 2) if not pd.isna(r3m) else np.nan,
-                'Return_6M_%': round(r6m, 2) if not pd.isna(r6m) else np.nan
-            })
-        except IndexError as e:
-            print(f"❌ IndexError for {ticker}: {e}")
-            continue
-        except Exception as e:
-            print(f"❌ Unexpected error for {ticker}: {e}")
-            continue
-    return pd.DataFrame(returns)
+def returns_spec(anchors):
+    """
+    indicator_cache spec of the returns_for_frames() columns. Every column
+    carries all windows, because a ticker is skipped when any window fails.
+    Daily bars sit at midnight, so any cutoff on the same day picks the same
+    anchor bar and the day is enough of a key.
+    """
+    params = {
+        'windows': {w: c.date().isoformat() if c is not None else None for w, c in anchors.items()},
+        'min_history': MIN_HISTORY,
+    }
+    spec = {'Price': ('returns_price', params)}
+    spec.update({f"Return_{w}_%": ('return', dict(params, window=w)) for w in anchors})
+    return spec
+
+def compute_returns_frames(frames, anchors, workers=1):
+    parts = run_chunks(partial(returns_for_frames, windows=anchors),
+                       split_dict(frames, workers), workers, kind="process")
+    return pd.concat(parts, ignore_index=True) if parts else returns_for_frames({}, anchors)
+
+def fetch_frames(tickers, store):
+    """{ticker: 6mo history} through the price store, keyed by the watchlist spelling."""
+    # One batched download for every ticker that needs new bars
+    yf_tickers = {ticker: fix_yahoo_ticker(ticker) for ticker in tickers}
+    bulk = store.history_many(list(yf_tickers.values()), period="6mo")
+    if bulk.failed:
+        print(f"⚠️ {len(bulk.failed)} of {len(yf_tickers)} tickers returned no data")
+    return {t: bulk.frames[yf_t] for t, yf_t in yf_tickers.items() if yf_t in bulk.frames}
+
+def returns_from_frames(frames, anchors, workers=1, cache=None):
+    # Returns are per ticker, so chunks can run in separate processes
+    compute = partial(compute_returns_frames, anchors=anchors, workers=workers)
+    returns = compute(frames) if cache is None else cache.lookup(frames, returns_spec(anchors), compute)
+
+    skipped = len(frames) - len(returns)
+    if skipped:
+        print(f"⚠️ Skipped {skipped} tickers with short or incomplete history")
+    return returns
 
 # === Step 4: Build RS Rank for Each Ticker vs Benchmark ===
-watchlist_df = pd.read_csv("ILAN_COMBINED_BENCHMARK.csv", sep=",", engine="python")
-watchlist_df.columns = watchlist_df.columns.str.strip().str.lower()
-watchlist = watchlist_df.to_dict("records")
-#if 'ticker' not in watchlist_df.columns or 'benchmark' not in watchlist_df.columns:
-#    raise ValueError(
-#        f"❌ Invalid CSV headers. Found: {list(watchlist_df.columns)} — Expected: ['ticker','benchmark']"
-#    )
-#print("📄 Parsed watchlist:", watchlist)
-
-final = []
-
-for entry in watchlist:
-    #print("🔁 Entry:", entry)
-    ticker = entry['ticker']
-    benchmark = entry['benchmark']
-    universe = benchmark_universes[benchmark]
-
-    # Get returns for benchmark + target ticker
-    tickers_to_pull = list(set(universe + [ticker]))
-    #print("📥 tickers to pull :", tickers_to_pull)
-    df = get_returns(tickers_to_pull)
-    #print("📥 Raw df before filtering:", df.shape)
-    #print(df.head(10))
-    #print("🔍 DataFrame columns:", df.columns)
-    #print("🧪 Sample rows:\n", df.head())
-    if df.empty:
-        raise ValueError("❌ DataFrame is empty — check data source or filters.")
-    df = df.fillna(0)
-    #df.columns = df.columns.str.strip().str.lower()
-    print("✅ Normalized columns:", df.columns)
-
-    target_row = df[df['Ticker'] == ticker]
-    if target_row.empty:
-        continue
-
-    # RS Rank: Percentile of target vs universe
-    for window in ['1M', '3M', '6M']:
-        rank_col = f'Return_{window}_%'
-        df[f'{window}_Rank'] = df[rank_col].rank(pct=True) * 100
-
-    # Weighted Score
-    df['RS_Score'] = round(df['1M_Rank']*0.2 + df['3M_Rank']*0.3 + df['6M_Rank']*0.5, 2)
-
-    # Extract just the target
-    target_rs = df[df['Ticker'] == ticker].iloc[0].to_dict()
-    final.append(target_rs)
-
-# === Step 5: Export ===
-final_df = pd.DataFrame(final)
-final_df = final_df.sort_values(by='RS_Score', ascending=False)
-final_df.to_csv("benchmark_rs_ranked.csv", index=False)
-print(final_df[['Ticker', 'Price', 'RS_Score']])
+def load_watchlist(path):
+    watchlist_df = pd.read_csv(path, sep=",", engine="python")
+    watchlist_df.columns = watchlist_df.columns.str.strip().str.lower()
+    #if 'ticker' not in watchlist_df.columns or 'benchmark' not in watchlist_df.columns:
+    #    raise ValueError(
+    #        f"❌ Invalid CSV headers. Found: {list(watchlist_df.columns)} — Expected: ['ticker','benchmark']"
+    #    )
+    return watchlist_df.to_dict("records")
+
+def load_universes(watchlist, store):
+    """
+    {benchmark: {'universe': constituents, 'frames': {ticker: history}}}
+    for every benchmark in the watchlist, each fetched exactly once.
+    """
+    universes = {}
+    for benchmark in dict.fromkeys(entry['benchmark'] for entry in watchlist):
+        if benchmark not in BENCHMARKS:
+            raise ValueError(f"❌ Unknown benchmark '{benchmark}' — expected one of {BENCHMARKS}")
+        universe = get_constituents(benchmark)
+        targets = [entry['ticker'] for entry in watchlist if entry['benchmark'] == benchmark]
+
+        # Sorted so chunking (and therefore output) is the same on every run
+        tickers_to_pull = sorted(set(universe + targets))
+        print(f"📥 {benchmark}: pulling {len(tickers_to_pull)} tickers once for {len(targets)} watchlist rows")
+        universes[benchmark] = {'universe': universe, 'frames': fetch_frames(tickers_to_pull, store)}
+    return universes
+
+def rank_universes(universes, anchors, workers=1, cache=None):
+    """Rank table per benchmark from load_universes() output (no network)."""
+    rank_tables = {}
+
+    for benchmark, loaded in universes.items():
+        universe = loaded['universe']
+        df = returns_from_frames(loaded['frames'], anchors, workers, cache)
+        if df.empty:
+            raise ValueError("❌ DataFrame is empty — check data source or filters.")
+
+        # RS Rank: Percentile of every universe member vs the universe, and of
+        # each ticker outside the universe vs universe + itself
+        in_universe = df['Ticker'].isin(universe)
+        table = rank_table(df[in_universe].reset_index(drop=True))
+        outsiders = rank_outsiders(table, df[~in_universe].reset_index(drop=True))
+        rank_tables[benchmark] = pd.concat([table, outsiders], ignore_index=True).drop_duplicates('Ticker').set_index('Ticker', drop=False)
+
+    return rank_tables
+
+def build_rank_tables(watchlist, store, anchors, workers=1, cache=None):
+    """Fetches and ranks each benchmark universe (plus its watchlist tickers) exactly once."""
+    return rank_universes(load_universes(watchlist, store), anchors, workers, cache)
+
+def rank_watchlist(watchlist, rank_tables):
+    final = []
+
+    for entry in watchlist:
+        ticker = entry['ticker']
+        table = rank_tables[entry['benchmark']]
+        if ticker not in table.index:
+            continue
+
+        # Extract just the target
+        target_rs = table.loc[ticker].to_dict()
+        final.append(target_rs)
+
+    final_df = pd.DataFrame(final)
+    return final_df.sort_values(by='RS_Score', ascending=False)
+
+def run(watchlist_file="ILAN_COMBINED_BENCHMARK.csv", out_file="benchmark_rs_ranked.csv", workers=1,
+        use_cache=True):
+    watchlist = load_watchlist(watchlist_file)
+    store = PriceStore(fetcher=YahooFetcher(workers=workers))
+    cache = IndicatorCache() if use_cache else None
+    try:
+        rank_tables = build_rank_tables(watchlist, store, rs_anchors(), workers, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # === Step 5: Export ===
+    final_df = rank_watchlist(watchlist, rank_tables)
+    write_artifact(final_df, "rs_ranked", out_file)
+    return final_df
+
+def main():
+    parser = argparse.ArgumentParser(description="RS ranking of watchlist tickers vs their benchmark universe")
+    parser.add_argument("--watchlist", default="ILAN_COMBINED_BENCHMARK.csv", help="CSV with Ticker,Benchmark columns")
+    parser.add_argument("--out", default="benchmark_rs_ranked.csv", help="Output CSV filename")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for returns math and threads for downloads (default 1)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="Recompute every ticker's returns (skip indicator_cache.sqlite)")
+    args = parser.parse_args()
+
+    final_df = run(args.watchlist, args.out, args.workers, args.cache)
+    print(final_df[['Ticker', 'Price', 'RS_Score']])
+
+if __name__ == "__main__":
+    main()
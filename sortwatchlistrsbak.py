@@ -7,61 +7,8 @@ import time
 from io import StringIO
 import pytz
 import numpy as np
-
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-}
-
-def get_sp500():
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    res = requests.get(url, headers=headers)
-
-    # Load all tables and find one with a Symbol column
-    tables = pd.read_html(StringIO(res.text))
-
-    symbol_col = None
-    target_table = None
-
-    for table in tables:
-        for col in table.columns:
-            if 'symbol' in str(col).lower():
-                symbol_col = col
-                target_table = table
-                break
-        if target_table is not None:
-            break
-
-    if target_table is None:
-        raise ValueError("Couldn't find a table with a 'Symbol' column on SP500 page.")
-
-    return [f"{code}" for code in target_table[symbol_col]]
-
-def get_asx200():
-    url = 'https://en.wikipedia.org/wiki/S%26P/ASX_200'
-    res = requests.get(url, headers=headers)
-    return [f"{code}.AX" for code in pd.read_html(StringIO(res.text))[0]['Code']]
-
-def get_nifty50():
-    url = 'https://en.wikipedia.org/wiki/NIFTY_50'
-    res = requests.get(url, headers=headers)
-
-    tables = pd.read_html(StringIO(res.text))
-    symbol_col = None
-    target_table = None
-
-    for table in tables:
-        for col in table.columns:
-            if 'symbol' in str(col).lower():
-                symbol_col = col
-                target_table = table
-                break
-        if target_table is not None:
-            break
-
-    if target_table is None:
-        raise ValueError("No table with a 'Symbol' column found")
-
-    return [f"{code}.NS" for code in target_table[symbol_col]]
+from price_store import PriceStore
+from scrapeindex import get_sp500, get_asx200, get_nifty50
 
 def fix_yahoo_ticker(ticker):
     return ticker.replace('.', '-')
@@ -207,11 +154,13 @@ def get_returns_safely(hist: pd.DataFrame, windows: dict, ticker: str) -> dict |
         print(f"❌ Unexpected error for {ticker}: {e}")
         return None
     
+price_store = PriceStore()
+
 def get_returns(tickers):
     results = []
     for ticker in tickers:
         yf_ticker = fix_yahoo_ticker(ticker)
-        hist = yf.download(yf_ticker, period="6mo", interval="1d")
+        hist = price_store.history(yf_ticker, period="6mo", interval="1d")
         returns = get_returns_safely(hist, windows, ticker)
         if returns is None:
             continue
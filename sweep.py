@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parameter Sweep (grid search over risk / entry / filter settings)
+---------------------------------------------------------------
+- Expands a grid of phase (PHASE_RISK_PCT), ENTRY_BUFFER, MAX_POSITIONS,
+  MAX_ATR_PCT, MIN_BASE_DAYS and RS weights into every combination
+- Runs the combinations on a process pool; the OHLC panels are placed
+  in shared memory once and every worker attaches to them read-only
+  (no per-worker copy of the price arrays); each worker closes its
+  handles on exit, the parent unlinks the blocks
+- Combinations are ordered so each worker derives signals once per
+  filter setting and detects fills once per entry buffer; only the
+  position cap / sizing loop runs per combination
+- Writes sweep_results.csv ranked by return, drawdown and hit rate
+
+Example:
+    python sweep.py --period 5y --workers 8
+    python sweep.py --grid grid.json --out sweep_results.csv
+
+grid.json maps the GRID keys to lists, e.g.
+    {"phase": [2, 3], "max_positions": [2, 4], "rs_weights": ["0.2/0.3/0.5"]}
+"""
+
+import argparse
+import gc
+import itertools
+import json
+from multiprocessing import shared_memory, util as mp_util
+
+import numpy as np
+import pandas as pd
+
+from backtest import (CAPITAL, FIELDS, breakout_signals, load_panels, prepare_candidates,
+                      simulate_portfolio)
+from panel import Panel
+from parallel import default_workers, run_chunks, split
+
+DEFAULT_GRID = {
+    "phase": [1, 2, 3, 4],
+    "entry_buffer": [0.0025, 0.005, 0.01],
+    "max_positions": [1, 2, 3, 4],
+    "max_atr_pct": [3.0, 4.0, 5.0],
+    "min_base_days": [25, 35, 45],
+    "rs_weights": ["0.2/0.3/0.5", "0.34/0.33/0.33", "0.5/0.3/0.2"],
+}
+SIGNAL_KEYS = ("max_atr_pct", "min_base_days", "rs_weights")
+CACHE_SIZE = 4          # derived signal sets / candidate sets kept per worker
+RESULTS_FILE = "sweep_results.csv"
+
+
+def parse_weights(text):
+    """'0.2/0.3/0.5' -> {'1M': 0.2, '3M': 0.3, '6M': 0.5}."""
+    return dict(zip(("1M", "3M", "6M"), (float(w) for w in text.split("/"))))
+
+
+def _fills_key(combo):
+    return tuple(combo[k] for k in SIGNAL_KEYS) + (combo["entry_buffer"],)
+
+
+def expand_grid(grid):
+    """Every combination as a dict, grouped by signal settings then entry buffer."""
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return sorted(combos, key=lambda c: tuple(str(k) for k in _fills_key(c)))
+
+
+def chunk_combos(combos, workers):
+    """
+    One chunk per (signal settings, entry buffer) group, so a worker
+    derives signals and fills once per chunk; the largest groups are
+    halved until every worker has at least one chunk.
+    """
+    chunks = [list(g) for _, g in itertools.groupby(combos, key=_fills_key)]
+    while chunks and len(chunks) < workers and max(len(c) for c in chunks) > 1:
+        largest = max(range(len(chunks)), key=lambda i: len(chunks[i]))
+        chunk = chunks.pop(largest)
+        chunks[largest:largest] = split(chunk, 2)
+    return chunks
+
+
+# === Shared price arrays ===
+def share_panels(panels):
+    """
+    Copies each field's values into a SharedMemory block.
+    Returns (spec for attach_panels, [blocks] to close/unlink).
+    """
+    close = panels["Close"]
+    spec = {"dates": close.dates, "tickers": close.tickers, "fields": {}}
+    blocks = []
+    for field in FIELDS:
+        values = np.ascontiguousarray(panels[field].values, dtype=np.float64)
+        shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+        spec["fields"][field] = (shm.name, values.shape)
+        blocks.append(shm)
+    return spec, blocks
+
+
+def attach_panels(spec):
+    """Read-only Panel views over the shared blocks. Returns (panels, blocks)."""
+    panels, blocks = {}, []
+    for field, (name, shape) in spec["fields"].items():
+        shm = shared_memory.SharedMemory(name=name)
+        values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        values.flags.writeable = False
+        panels[field] = Panel(spec["dates"], spec["tickers"], values, None)
+        blocks.append(shm)
+    return panels, blocks
+
+
+# === Worker ===
+_WORKER = {}
+_FINALIZER = None
+
+
+def detach_worker():
+    """Drops the worker's panel views and caches, then closes its attached blocks."""
+    blocks = _WORKER.get("blocks", [])
+    _WORKER.clear()
+    gc.collect()        # views over the buffers must be gone before close()
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            pass        # a view is still referenced; unmapped when the process exits
+
+
+def _init_worker(spec, capital):
+    global _FINALIZER
+    panels, blocks = attach_panels(spec)
+    _WORKER.update(panels=panels, blocks=blocks, capital=capital, signals={}, candidates={})
+    # Pool workers leave through os._exit, which skips atexit / weakref.finalize
+    # hooks; multiprocessing runs its own finalizers there (and at interpreter
+    # exit when the "worker" is this process)
+    if _FINALIZER is None:
+        _FINALIZER = mp_util.Finalize(None, detach_worker, exitpriority=10)
+
+
+def _remember(cache, key, value):
+    cache[key] = value
+    while len(cache) > CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    return value
+
+
+def _run_combos(combos):
+    panels, capital = _WORKER["panels"], _WORKER["capital"]
+    signal_cache, candidate_cache = _WORKER["signals"], _WORKER["candidates"]
+    rows = []
+    for combo in combos:
+        ckey = _fills_key(combo)
+        skey = ckey[:-1]
+        if skey not in signal_cache:
+            _remember(signal_cache, skey, breakout_signals(
+                panels, max_atr_pct=combo["max_atr_pct"], min_base_days=combo["min_base_days"],
+                rs_weights=parse_weights(combo["rs_weights"])))
+        if ckey not in candidate_cache:
+            _remember(candidate_cache, ckey, prepare_candidates(
+                panels, signal_cache[skey], entry_buffer=combo["entry_buffer"]))
+        _, _, stats = simulate_portfolio(panels, candidate_cache[ckey], capital,
+                                         combo["phase"], combo["max_positions"])
+        rows.append({**combo, **stats})
+    return rows
+
+
+def rank_results(df):
+    """Ranks by return (high), drawdown (low) and hit rate (high); Score = mean rank."""
+    df = df.copy()
+    df["Rank_Return"] = df["return_%"].rank(ascending=False, method="min")
+    df["Rank_Drawdown"] = df["max_drawdown_%"].rank(ascending=True, method="min")
+    df["Rank_HitRate"] = df["hit_rate_%"].rank(ascending=False, method="min")
+    df["Score"] = df[["Rank_Return", "Rank_Drawdown", "Rank_HitRate"]].mean(axis=1).round(2)
+    return df.sort_values(["Score", "Rank_Return"], kind="stable").reset_index(drop=True)
+
+
+def sweep(panels, grid=DEFAULT_GRID, workers=1, capital=CAPITAL):
+    combos = expand_grid(grid)
+    spec, blocks = share_panels(panels)
+    try:
+        parts = run_chunks(_run_combos, chunk_combos(combos, workers), workers,
+                           kind="process", initializer=_init_worker, initargs=(spec, capital))
+    finally:
+        detach_worker()         # serial runs attach in this process
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return rank_results(pd.DataFrame([row for part in parts for row in part]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid search over risk, entry and filter settings")
+    parser.add_argument("--grid", help="JSON file overriding DEFAULT_GRID keys")
+    parser.add_argument("--watchlist", default="ILAN_COMBINED.csv", help="Universe CSV (Ticker column)")
+    parser.add_argument("--period", default="5y", help="History to load (default 5y)")
+    parser.add_argument("--capital", type=float, default=CAPITAL)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--out", default=RESULTS_FILE, help="Results CSV")
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid.update(json.load(f))
+
+    tickers = pd.read_csv(args.watchlist)["Ticker"].dropna().unique().tolist()
+    panels = load_panels(tickers, args.period)
+    n_combos = int(np.prod([len(v) for v in grid.values()]))
+    print(f"🧪 Sweeping {n_combos} combinations on {args.workers} workers")
+
+    results = sweep(panels, grid, args.workers, args.capital)
+    results.to_csv(args.out, index=False)
+    print(f"✅ Results → {args.out}")
+    print(results.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+backtest.py against brute force: first_touch_below vs a scan of every
+bar, and run_backtest vs a naive per-bar portfolio loop (position cap,
+one position per symbol, same-bar exits freeing their slot, re-entries).
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest import FIELDS, first_touch_below, run_backtest, session_dates
+from decision_tool import PHASE_RISK_PCT
+from panel import Panel
+
+
+def make_panels(opens, highs, lows, closes, tickers):
+    n = len(closes)
+    dates = pd.bdate_range("2025-01-02", periods=n, tz="America/New_York").tz_convert("UTC")
+    present = np.ones((n, len(tickers)), dtype=bool)
+    return {f: Panel(dates, list(tickers), np.asarray(v, dtype=float), present)
+            for f, v in zip(FIELDS, (opens, highs, lows, closes))}
+
+
+def random_panels(n=60, m=5, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, m)), axis=0))
+    opens = close * np.exp(rng.normal(0, 0.01, (n, m)))
+    highs = np.maximum(opens, close) * np.exp(np.abs(rng.normal(0, 0.015, (n, m))))
+    lows = np.minimum(opens, close) * np.exp(-np.abs(rng.normal(0, 0.015, (n, m))))
+    return make_panels(opens, highs, lows, close, [f"T{i}" for i in range(m)])
+
+
+def naive_backtest(panels, signals, capital, phase, max_positions):
+    """Day by day: exits first, then that session's entries in list order."""
+    o, h, l, c = (panels[f].values for f in FIELDS)
+    n = c.shape[0]
+    dates = session_dates(panels["Close"])
+    col_of = {t: i for i, t in enumerate(panels["Close"].tickers)}
+    risk_pct = PHASE_RISK_PCT[phase]
+
+    todays = {}
+    for sig in signals.itertuples(index=False):
+        row = dates.searchsorted(pd.Timestamp(sig.Date), side="right")
+        if 0 < row < n:
+            todays.setdefault(row, []).append(sig)
+
+    equity = cash = float(capital)
+    open_pos, trades = [], []
+
+    def close(pos, t, px):
+        nonlocal equity, cash
+        px = np.round(px, 2)        # exits are booked at the reported price
+        open_pos.remove(pos)
+        cash += pos["Shares"] * px
+        equity += pos["Shares"] * (px - pos["EntryPrice"])
+        trades.append(dict(pos, ExitDate=dates[t], ExitPrice=px))
+
+    for t in range(n):
+        for pos in list(open_pos):
+            col, stop = pos["Col"], pos["StopLoss"]
+            if l[t, col] <= stop:
+                close(pos, t, o[t, col] if o[t, col] < stop else stop)
+            elif t == n - 1:
+                close(pos, t, c[t, col])
+        for sig in todays.get(t, []):
+            col, entry, stop = col_of[sig.Symbol], sig.EntryPrice, sig.StopLoss
+            if not (o[t, col] < entry <= h[t, col] and stop < entry):
+                continue
+            if len(open_pos) >= max_positions or sig.Symbol in {p["Symbol"] for p in open_pos}:
+                continue
+            shares = min(int(equity * risk_pct // (entry - stop)), int(cash // entry))
+            if shares <= 0:
+                continue
+            cash -= shares * entry
+            pos = {"Symbol": sig.Symbol, "Col": col, "EntryDate": dates[t], "EntryPrice": entry,
+                   "StopLoss": stop, "Shares": shares}
+            open_pos.append(pos)
+            if l[t, col] <= stop:
+                close(pos, t, stop)          # stopped out on the entry bar
+            elif t == n - 1:
+                close(pos, t, c[t, col])
+
+    columns = ["Symbol", "EntryDate", "Shares", "ExitDate", "ExitPrice"]
+    out = pd.DataFrame(trades, columns=columns + ["Col", "EntryPrice", "StopLoss"])[columns]
+    return out.sort_values(["EntryDate", "Symbol"]).reset_index(drop=True)
+
+
+def compare(panels, signals, capital=100000.0, phase=2, max_positions=2):
+    trades, _, _ = run_backtest(panels, signals, capital, phase, max_positions)
+    got = trades[["Symbol", "EntryDate", "Shares", "ExitDate", "ExitPrice"]]
+    got = got.sort_values(["EntryDate", "Symbol"]).reset_index(drop=True)
+    want = naive_backtest(panels, signals, capital, phase, max_positions)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
+    return got
+
+
+def test_first_touch_below_matches_scan():
+    rng = np.random.default_rng(1)
+    low = rng.normal(100, 5, (80, 6))
+    low[rng.random(low.shape) < 0.05] = np.nan
+    k = 300
+    cols = rng.integers(0, 6, k)
+    start = rng.integers(0, 80, k)
+    last = np.minimum(start + rng.integers(0, 40, k), 79)
+    level = rng.normal(92, 4, k)
+
+    want = []
+    for col, s, e, lv in zip(cols, start, last, level):
+        hits = [t for t in range(s, e + 1) if low[t, col] <= lv]
+        want.append(hits[0] if hits else -1)
+    np.testing.assert_array_equal(first_touch_below(low, cols, start, last, level), want)
+
+
+def test_random_signals_match_naive_loop():
+    rng = np.random.default_rng(2)
+    panels = random_panels()
+    close = panels["Close"].values
+    dates = session_dates(panels["Close"])
+    rows, cols = rng.integers(0, 59, 120), rng.integers(0, 5, 120)
+    entry = np.round(close[rows, cols] * (1 + rng.uniform(0, 0.03, 120)), 2)
+    signals = pd.DataFrame({
+        "Date": dates[rows], "Symbol": [f"T{c}" for c in cols],
+        "EntryPrice": entry, "StopLoss": np.round(entry * (1 - rng.uniform(0.01, 0.05, 120)), 2),
+    })
+    for max_positions in (1, 2, 4):
+        trades = compare(panels, signals, max_positions=max_positions)
+        assert len(trades) > 5
+
+
+def test_same_bar_exit_frees_slot_and_allows_reentry():
+    # A enters on day 1 and is stopped out on the same bar; with one slot,
+    # B (listed after A on day 1) can only enter because that slot is free.
+    # A re-enters on day 2 while B is still open (max_positions=2), and a
+    # repeat B signal on day 2 is skipped because B is still held.
+    flat = np.full((5, 2), 100.0)
+    opens, highs, lows, closes = flat - 1, flat + 2, flat - 2, flat.copy()
+    lows[1, 0] = 90.0
+    panels = make_panels(opens, highs, lows, closes, ["A", "B"])
+    dates = session_dates(panels["Close"])
+    signals = pd.DataFrame({
+        "Date": [dates[0], dates[0], dates[1], dates[1]],
+        "Symbol": ["A", "B", "A", "B"],
+        "EntryPrice": [100.0, 100.0, 100.0, 100.0],
+        "StopLoss": [95.0, 95.0, 95.0, 95.0],
+    })
+
+    one_slot = compare(panels, signals, max_positions=1)
+    assert one_slot[["Symbol", "EntryDate"]].values.tolist() == [["A", dates[1]], ["B", dates[1]]]
+    assert one_slot.loc[0, "ExitDate"] == dates[1] and one_slot.loc[0, "ExitPrice"] == 95.0
+
+    two_slots = compare(panels, signals, max_positions=2)
+    assert two_slots[["Symbol", "EntryDate"]].values.tolist() == [
+        ["A", dates[1]], ["B", dates[1]], ["A", dates[2]]]
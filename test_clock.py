@@ -0,0 +1,83 @@
+"""
+VirtualClock.wait_for: result, timeout and a caller canceled mid-wait
+must all leave neither the awaited task nor the timer pending.
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+from clock import NY_TZ, VirtualClock
+
+START = datetime.datetime(2025, 6, 2, 9, 30, tzinfo=NY_TZ)
+
+
+def run(coro):
+    """
+    asyncio.run on a private loop (asyncio.run itself would unset the loop
+    ib_insync uses). Leftovers such as the clock's driver are canceled
+    on exit, so the checks that nothing is pending run inside coro.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+
+def timers_done(clock):
+    return all(fut.done() for _, _, fut in clock._timers)
+
+
+def test_wait_for_returns_result():
+    async def session():
+        clock = VirtualClock(START)
+
+        async def late():
+            await clock.sleep(5)
+            return "ok"
+
+        result = await clock.wait_for(late(), 60)
+        assert timers_done(clock)
+        return clock, result
+
+    clock, result = run(session())
+    assert result == "ok"
+    assert clock.now() == START + datetime.timedelta(seconds=5)
+
+
+def test_wait_for_timeout_cancels_and_awaits_task():
+    async def session():
+        clock = VirtualClock(START)
+        waited = asyncio.ensure_future(asyncio.Event().wait())
+        with pytest.raises(asyncio.TimeoutError):
+            await clock.wait_for(waited, 30)
+        assert waited.cancelled()
+        return clock
+
+    clock = run(session())
+    assert clock.now() == START + datetime.timedelta(seconds=30)
+
+
+def test_wait_for_cancelled_caller_cleans_up():
+    async def session():
+        clock = VirtualClock(START)
+        waited = asyncio.ensure_future(asyncio.Event().wait())
+        caller = asyncio.ensure_future(clock.wait_for(waited, 60))
+        for _ in range(3):
+            await asyncio.sleep(0)      # caller is now inside asyncio.wait
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert waited.cancelled()
+        assert timers_done(clock)
+        return clock
+
+    clock = run(session())
+    assert clock.now() == START      # the canceled timer never fired
@@ -0,0 +1,66 @@
+"""
+Batch decide_phases / simulate_phase_paths cross-checked row by row
+against decide_phase, the way single mode calls it (market capitalized).
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import SCENARIO_COLUMNS, decide_phase, decide_phases, simulate_phase_paths
+
+MARKETS = ["Red", "yellow", "ORANGE", "Green", "orange", "purple"]
+
+
+def single(last_phase, market, wins, breakeven, drawdown, growth, days):
+    return decide_phase(last_phase, market.capitalize(), wins, breakeven, drawdown, growth, days)
+
+
+def test_decide_phases_matches_decide_phase_on_grid():
+    grid = pd.DataFrame(list(itertools.product(
+        [0, 1, 2, 3, 4],                    # last_phase
+        MARKETS,                            # market
+        [0, 1, 2, 3],                       # wins_2r
+        ["y", "n"],                         # both_to_breakeven
+        [0.0, 0.5, 1.0, 1.5, 2.0, 6.0, 9.0],  # drawdown_pct (each phase's risk % and around)
+        [0.0, 4.99, 5.0],                   # growth_since_high_pct
+        [89, 90],                           # consistency_days
+    )), columns=SCENARIO_COLUMNS)
+
+    results = decide_phases(grid)
+    for row, phase, messages in zip(grid.itertuples(index=False), results["Phase"], results["Messages"]):
+        want_phase, want_messages = single(row.last_phase, row.market, row.wins_2r,
+                                           row.both_to_breakeven == "y", row.drawdown_pct,
+                                           row.growth_since_high_pct, row.consistency_days)
+        assert (phase, messages) == (want_phase, " | ".join(want_messages)), row
+
+
+def test_batch_market_is_capitalized_like_single_mode():
+    scenario = pd.DataFrame([[4, "yellow", 0, "n", 0.0, 0.0, 10]], columns=SCENARIO_COLUMNS)
+    result = decide_phases(scenario).iloc[0]
+    assert result["market"] == "Yellow"
+    assert "not allowed in Yellow" in result["Messages"]
+
+
+def test_simulate_phase_paths_matches_daily_loop():
+    rng = np.random.default_rng(4)
+    days = 250
+    stats = pd.DataFrame({
+        "date": pd.bdate_range("2025-01-02", periods=days).strftime("%Y-%m-%d"),
+        "market": rng.choice(MARKETS[:5], days, p=[0.1, 0.2, 0.35, 0.25, 0.1]),
+        "wins_2r": rng.integers(0, 4, days),
+        "both_to_breakeven": rng.choice(["y", "n"], days),
+        "drawdown_pct": np.round(rng.uniform(0, 10, days), 2),
+        "growth_since_high_pct": np.round(rng.uniform(0, 8, days), 2),
+        "consistency_days": rng.integers(0, 180, days),
+    })
+
+    paths = simulate_phase_paths(stats)
+    for start in (1, 2, 3, 4):
+        phase, want = start, []
+        for row in stats.itertuples(index=False):
+            phase, _ = single(phase, row.market, row.wins_2r, row.both_to_breakeven == "y",
+                              row.drawdown_pct, row.growth_since_high_pct, row.consistency_days)
+            want.append(phase)
+        assert paths[f"Phase_from_{start}"].tolist() == want
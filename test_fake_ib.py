@@ -0,0 +1,77 @@
+"""
+Replays a scripted 2025-06-02 session of tradebot_phase2 through FakeIB
+on a VirtualClock (no gateway, no network, well under a second):
+- AAPL arms below its 190 stop and breaks out at 10:30 -> fill
+- MSFT stays flat below its 410 stop -> entry canceled at 15:50
+- NVDA is rejected by the gateway
+Every input and output file lives in pytest's tmp_path.
+"""
+
+import datetime
+import json
+
+import pandas as pd
+
+from clock import NY_TZ
+from fake_ib import scripted_path, simulate
+from tradelog import read_records
+
+DAY = datetime.date(2025, 6, 2)
+MINUTES = 391           # 9:30-16:00, one price per minute
+
+
+def minute_path(prices_by_minute):
+    """scripted_path over the session; prices_by_minute is [(from_minute, price), ...]."""
+    start = datetime.datetime.combine(DAY, datetime.time(9, 30), tzinfo=NY_TZ)
+    prices = []
+    for i in range(MINUTES):
+        prices.append([p for m, p in prices_by_minute if m <= i][-1])
+    return scripted_path(start, prices)
+
+
+def run_session(tmp_path):
+    sizing = tmp_path / "sizing.csv"
+    pd.DataFrame({
+        "Symbol": ["AAPL", "MSFT", "NVDA"],
+        "EntryPrice": [190.0, 410.0, 120.0],
+        "StopLoss": [185.0, 400.0, 115.0],
+        "PositionSize": [10, 5, 20],
+    }).to_csv(sizing, index=False)
+    decision = tmp_path / "decision.json"
+    decision.write_text(json.dumps({"phase": 2, "market": "Green", "portfolio_value": 60000}))
+
+    paths = {
+        "AAPL": minute_path([(0, 189.0), (60, 190.5)]),
+        "MSFT": minute_path([(0, 405.0)]),
+        "NVDA": minute_path([(0, 119.0)]),
+    }
+    out_dir = tmp_path / "out"
+    ib, _ = simulate(paths, reject={"NVDA": "Order rejected by fake gateway"},
+                     sizing_file=str(sizing), decision_file=str(decision), out_dir=str(out_dir))
+    return ib, read_records(str(out_dir / ("tradebot_log_%s.jsonl" % DAY)))
+
+
+def test_replay_fill_reject_and_close_cancel(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # nothing may land in the working directory
+    ib, records = run_session(tmp_path)
+
+    assert ib.stats["fills"] == 1
+    assert ib.stats["rejects"] >= 1
+    assert ib.stats["cancels"] >= 1
+
+    by_event = {}
+    for record in records:
+        by_event.setdefault(record["event"], []).append(record)
+
+    fills = by_event["fill"]
+    assert [r["symbol"] for r in fills] == ["AAPL"]
+    assert fills[0]["ts"].startswith("2025-06-02T10:30")
+
+    ended = {r["symbol"]: r["state"] for r in by_event.get("entry_ended", [])}
+    assert "NVDA" in ended
+
+    cancels = by_event["cancel"]
+    assert [r["symbol"] for r in cancels] == ["MSFT"]
+    assert cancels[0]["ts"].startswith("2025-06-02T15:50")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["decision.json", "out", "sizing.csv"]
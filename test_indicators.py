@@ -0,0 +1,64 @@
+"""
+indicators.rsi (the RS_Rating source since the Finviz scrape was
+dropped) against Wilder's RSI(14): the published StockCharts worked
+example and a straightforward per-series loop.
+"""
+
+import numpy as np
+
+from indicators import rsi
+
+# StockCharts "RSI" worked example: closes and the RSI(14) from the 15th close on
+STOCKCHARTS_CLOSES = [
+    44.3389, 44.0902, 44.1497, 43.6124, 44.3278, 44.8264, 45.0955, 45.4245, 45.8433, 46.0826,
+    45.8931, 46.0328, 45.6140, 46.2820, 46.2820, 46.0028, 46.0328, 46.4116, 46.2222, 45.6439,
+    46.2122, 46.2521, 45.7137, 46.4515, 45.7835, 45.3548, 44.0288, 44.1783, 44.2181, 44.5672,
+    43.4205, 42.6628, 43.1314,
+]
+STOCKCHARTS_RSI = [
+    70.53, 66.32, 66.55, 69.41, 66.36, 57.97, 62.93, 63.26, 56.06, 62.38, 54.71, 50.42, 39.99,
+    41.46, 41.87, 45.46, 37.30, 33.08, 37.77,
+]
+
+
+def wilder_rsi(closes, period=14):
+    """One series, bar by bar: SMA seed over the first period changes, then Wilder smoothing."""
+    out = [np.nan] * len(closes)
+    changes = [b - a for a, b in zip(closes, closes[1:])]
+    if len(changes) < period:
+        return out
+    avg_gain = sum(max(c, 0) for c in changes[:period]) / period
+    avg_loss = sum(max(-c, 0) for c in changes[:period]) / period
+    for i in range(period, len(closes)):
+        if i > period:
+            change = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(change, 0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-change, 0)) / period
+        out[i] = 100.0 if avg_loss == 0 else 100 - 100 / (1 + avg_gain / avg_loss)
+    return out
+
+
+def test_rsi_matches_published_example():
+    got = rsi(np.array(STOCKCHARTS_CLOSES)[:, None])[:, 0]
+    assert np.isnan(got[:14]).all()
+    np.testing.assert_allclose(got[14:], STOCKCHARTS_RSI, atol=0.005)
+
+
+def test_rsi_matches_loop_per_column():
+    rng = np.random.default_rng(6)
+    n, m = 120, 6
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, m)), axis=0))
+    starts = [0, 5, 30, 100, 106, 110]          # right-aligned panels: leading NaN per ticker
+    for col, start in enumerate(starts):
+        closes[:start, col] = np.nan
+    closes[60:80, 1] = closes[59, 1]            # flat run: zero changes decay both averages
+
+    got = rsi(closes)
+    for col, start in enumerate(starts):
+        want = [np.nan] * start + wilder_rsi(list(closes[start:, col]))
+        np.testing.assert_allclose(got[:, col], want, rtol=1e-10, equal_nan=True)
+
+
+def test_rsi_all_gains_is_100():
+    got = rsi(np.arange(1.0, 31.0)[:, None])[:, 0]
+    assert (got[14:] == 100.0).all()
@@ -0,0 +1,121 @@
+"""
+Pipeline cache with tiny stages: hits, misses on params / upstream
+content / the source of a declared module, --force downstream,
+emit on cached runs and eviction beyond KEEP_PER_STAGE.
+"""
+
+import os
+
+import pipeline
+from pipeline import Pipeline
+
+
+def build(cache_dir, calls, source=lambda: [1, 2, 3], scale=2, emitted=None, modules=()):
+    def double(values, scale):
+        calls.append("double")
+        return [v * scale for v in values]
+
+    def total(values):
+        calls.append("total")
+        return sum(values)
+
+    def other():
+        calls.append("other")
+        return "x"
+
+    p = Pipeline(cache_dir=str(cache_dir), log=lambda msg: None)
+    p.add("source", source, cache=False)
+    p.add("double", double, ["source"], params={"scale": scale}, modules=modules)
+    p.add("total", total, ["double"], emit=None if emitted is None else emitted.append)
+    p.add("other", other)
+    return p
+
+
+def statuses(timings):
+    return {name: status for name, status, _ in timings}
+
+
+def test_second_run_loads_from_cache(tmp_path):
+    calls = []
+    results, timings = build(tmp_path, calls).run()
+    assert results["total"] == 12
+    assert set(statuses(timings).values()) == {"ran"}
+
+    calls.clear()
+    results, timings = build(tmp_path, calls).run()
+    assert results["total"] == 12
+    assert calls == []
+    assert statuses(timings) == {"source": "ran", "double": "cached", "total": "cached", "other": "cached"}
+
+
+def test_param_and_upstream_changes_miss(tmp_path):
+    calls = []
+    build(tmp_path, calls).run()
+
+    calls.clear()
+    results, _ = build(tmp_path, calls, scale=3).run()
+    assert results["total"] == 18
+    assert sorted(calls) == ["double", "total"]
+
+    calls.clear()
+    results, _ = build(tmp_path, calls, source=lambda: [1, 2, 4]).run()
+    assert results["total"] == 14
+    assert sorted(calls) == ["double", "total"]
+
+
+def test_same_upstream_content_still_hits(tmp_path):
+    calls = []
+    build(tmp_path, calls).run()
+    calls.clear()
+    build(tmp_path, calls, source=lambda: [1, 2] + [3]).run()
+    assert calls == []
+
+
+def test_declared_module_source_is_part_of_the_key(tmp_path, monkeypatch):
+    lib = tmp_path / "lib"
+    lib.mkdir()
+    (lib / "tiny_kernel.py").write_text("THRESHOLD = 1\n")
+    monkeypatch.syspath_prepend(str(lib))
+    calls = []
+    cache = tmp_path / "cache"
+
+    build(cache, calls, modules=("tiny_kernel",)).run()
+    calls.clear()
+    build(cache, calls, modules=("tiny_kernel",)).run()
+    assert calls == []
+
+    (lib / "tiny_kernel.py").write_text("THRESHOLD = 2\n")
+    build(cache, calls, modules=("tiny_kernel",)).run()
+    assert sorted(calls) == ["double", "total"]
+
+
+def test_force_reruns_stage_and_downstream_only(tmp_path):
+    calls = []
+    build(tmp_path, calls).run()
+    calls.clear()
+    _, timings = build(tmp_path, calls).run(force=["double"])
+    assert sorted(calls) == ["double", "total"]
+    assert statuses(timings)["other"] == "cached"
+
+
+def test_emit_runs_on_cached_runs(tmp_path):
+    emitted = []
+    build(tmp_path, [], emitted=emitted).run()
+    build(tmp_path, [], emitted=emitted).run()
+    assert emitted == [12, 12]
+
+
+def test_eviction_keeps_newest_results_per_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "KEEP_PER_STAGE", 2)
+    calls = []
+    for scale in (2, 3, 4):
+        build(tmp_path, calls, scale=scale).run(targets=["double"])
+    kept = [f for f in os.listdir(tmp_path) if f.startswith("double-")]
+    assert len(kept) == 2
+
+    # the newest key still hits, the evicted oldest one recomputes
+    calls.clear()
+    build(tmp_path, calls, scale=4).run(targets=["double"])
+    assert calls == []
+    build(tmp_path, calls, scale=2).run(targets=["double"])
+    assert calls == ["double"]
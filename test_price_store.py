@@ -0,0 +1,102 @@
+"""
+PriceStore offline through CsvFetcher fixtures: incremental top-ups,
+max_age skips, re-adjusted histories re-downloaded in full, and a failed
+re-download that must leave the stored bars alone.
+"""
+
+import pandas as pd
+import pytest
+
+from price_store import DEFAULT_TZ, CsvFetcher, PriceStore
+
+
+class RecordingFetcher(CsvFetcher):
+    """CsvFetcher that logs every (ticker, start) and can fail full re-downloads."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+        self.fail_before = None
+
+    def fetch(self, ticker, start, interval="1d"):
+        self.calls.append((ticker, start))
+        if self.fail_before is not None and start < self.fail_before:
+            return pd.DataFrame()
+        return super().fetch(ticker, start, interval)
+
+
+def sessions(n):
+    """The last n business days before today (NY midnight, aware)."""
+    today = pd.Timestamp.now(tz=DEFAULT_TZ).normalize()
+    return pd.bdate_range(end=today - pd.Timedelta(days=1), periods=n, tz=DEFAULT_TZ)
+
+
+def write_fixture(directory, ticker, dates, closes):
+    pd.DataFrame({
+        "Date": [d.isoformat() for d in dates],
+        "Open": closes, "High": [c + 1 for c in closes], "Low": [c - 1 for c in closes],
+        "Close": closes, "Volume": 1000.0,
+    }).to_csv(directory / f"{ticker}_1d.csv", index=False)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    fixtures = tmp_path / "fx"
+    fixtures.mkdir()
+    dates = sessions(30)
+    closes = [100.0 + i for i in range(30)]
+    write_fixture(fixtures, "AAPL", dates[:20], closes[:20])
+    fetcher = RecordingFetcher(str(fixtures))
+    store = PriceStore(path=str(tmp_path / "prices.sqlite"), fetcher=fetcher, max_age=0)
+    store.history_many(["AAPL"], period="1y")
+    fetcher.calls.clear()
+    yield store, fetcher, fixtures, dates, closes
+    store.close()
+
+
+def test_top_up_fetches_only_after_last_stored_bar(setup):
+    store, fetcher, fixtures, dates, closes = setup
+    write_fixture(fixtures, "AAPL", dates, closes)
+
+    result = store.history_many(["AAPL"], period="1y")
+    assert fetcher.calls == [("AAPL", dates[19])]       # last stored bar, inclusive
+    assert result.frames["AAPL"]["Close"].tolist() == closes
+
+
+def test_fresh_store_makes_no_fetch(setup):
+    store, fetcher, fixtures, dates, closes = setup
+    store.max_age = 3600
+    write_fixture(fixtures, "AAPL", dates, closes)
+
+    result = store.history_many(["AAPL"], period="1y")
+    assert fetcher.calls == []
+    assert len(result.frames["AAPL"]) == 20
+
+
+def test_readjusted_history_is_redownloaded(setup):
+    store, fetcher, fixtures, dates, closes = setup
+    split = [c / 2 for c in closes]
+    write_fixture(fixtures, "AAPL", dates, split)
+
+    result = store.history_many(["AAPL"], period="1y")
+    (_, top_up), (_, full) = fetcher.calls
+    assert top_up == dates[19]
+    assert full < dates[0]                              # from covered_from, i.e. everything
+    assert result.frames["AAPL"]["Close"].tolist() == split
+
+
+def test_failed_redownload_keeps_stored_bars(setup):
+    store, fetcher, fixtures, dates, closes = setup
+    write_fixture(fixtures, "AAPL", dates, [c / 2 for c in closes])
+    fetcher.fail_before = dates[0]
+
+    result = store.history_many(["AAPL"], period="1y")
+    assert len(fetcher.calls) == 2
+    assert result.frames["AAPL"]["Close"].tolist() == closes[:20]
+
+    # not marked fresh: the next refresh tries the re-download again
+    fetcher.fail_before = None
+    fetcher.calls.clear()
+    result = store.history_many(["AAPL"], period="1y")
+    assert len(fetcher.calls) == 2
+    assert result.frames["AAPL"]["Close"].tolist() == [c / 2 for c in closes]
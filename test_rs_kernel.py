@@ -0,0 +1,124 @@
+"""
+rs_kernel parity with the per-ticker path it replaced: the old
+get_returns() loop (skip rules included) and fillna(0) +
+Series.rank(pct=True) * 100, on ties and NaNs.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from panel import build_panel
+from rs_kernel import (MIN_HISTORY, RS_WEIGHTS, compute_returns, percentile_rank, rank_against,
+                       rank_outsiders, rank_table)
+
+NY = "America/New_York"
+END = pd.Timestamp("2025-06-02", tz=NY)
+NOW = datetime.datetime(2025, 6, 2, 15, 0, tzinfo=END.tzinfo)
+WINDOWS = {"1M": NOW - datetime.timedelta(days=21), "3M": NOW - datetime.timedelta(days=63), "6M": None}
+
+
+def reference_returns(frames, windows, min_history=MIN_HISTORY):
+    """The old sortwatchlistrs.get_returns() loop, minus the download."""
+    rows = []
+    for ticker, hist in frames.items():
+        if len(hist) < min_history:
+            continue
+        close_today = hist["Close"].iloc[-1]
+        anchors = {}
+        for window, cutoff in windows.items():
+            if cutoff is None:
+                anchors[window] = hist["Close"].iloc[0]
+                continue
+            filtered = hist.loc[hist.index >= cutoff]["Close"]
+            if filtered.empty:
+                break
+            anchors[window] = filtered.iloc[0]
+        if len(anchors) < len(windows) or np.isnan(close_today) or any(np.isnan(v) for v in anchors.values()):
+            continue
+        row = {"Ticker": ticker, "Price": round(close_today, 2)}
+        for window, then in anchors.items():
+            row[f"Return_{window}_%"] = round((close_today - then) / then * 100, 2)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def reference_rank(df):
+    """The old fillna(0) + rank(pct=True) * 100 + weighted score."""
+    df = df.fillna(0)
+    for window in RS_WEIGHTS:
+        df[f"{window}_Rank"] = df[f"Return_{window}_%"].rank(pct=True) * 100
+    df["RS_Score"] = round(sum(df[f"{w}_Rank"] * weight for w, weight in RS_WEIGHTS.items()), 2)
+    return df
+
+
+def frame(closes, end=END):
+    dates = pd.bdate_range(end=end, periods=len(closes), tz=NY)
+    return pd.DataFrame({"Close": np.asarray(closes, dtype=float)}, index=dates)
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(7)
+    walk = lambda n: np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 2)
+    out = {f"T{i}": frame(walk(140)) for i in range(8)}
+    out["TIE"] = out["T0"].copy()                                   # same returns as T0
+    out["SHORT"] = frame(walk(MIN_HISTORY - 1))                     # too little history
+    out["STALE"] = frame(walk(200), end=END - pd.Timedelta(days=40))  # no bar after the 1M cutoff
+    nan_today = walk(140)
+    nan_today[-1] = np.nan
+    out["NANTODAY"] = frame(nan_today)
+    nan_anchor = frame(walk(140))
+    nan_anchor.loc[nan_anchor.index >= WINDOWS["1M"], "Close"] = np.nan
+    nan_anchor.iloc[-1, 0] = 50.0
+    out["NAN1M"] = nan_anchor
+    gap = frame(walk(150))                                          # no bars around the 3M cutoff
+    out["GAP"] = gap[(gap.index < WINDOWS["3M"] - pd.Timedelta(days=5)) |
+                     (gap.index > WINDOWS["3M"] + pd.Timedelta(days=5))]
+    out["LATESTART"] = frame(walk(130))                             # 6M anchors on its own first bar
+    return out
+
+
+def test_compute_returns_matches_old_loop(frames):
+    got = compute_returns(build_panel(frames, "Close"), WINDOWS)
+    want = reference_returns(frames, WINDOWS)
+    assert set(want["Ticker"]) == set(frames) - {"SHORT", "STALE", "NANTODAY", "NAN1M"}
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), want[got.columns], check_dtype=False)
+
+
+def test_percentile_rank_matches_pandas_with_ties():
+    rng = np.random.default_rng(3)
+    values = rng.integers(-5, 5, 200).astype(float)
+    np.testing.assert_allclose(percentile_rank(values), pd.Series(values).rank(pct=True) * 100)
+    assert percentile_rank([]).size == 0
+
+
+def test_rank_table_matches_pandas_with_nans_and_ties():
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({f"Return_{w}_%": rng.integers(-3, 3, 50).astype(float) for w in RS_WEIGHTS})
+    df.iloc[::7, 0] = np.nan
+    df.iloc[::11, 2] = np.nan
+    df.insert(0, "Ticker", [f"T{i}" for i in range(50)])
+    got, want = rank_table(df.copy()), reference_rank(df.copy())
+    pd.testing.assert_frame_equal(got, want, check_exact=False, rtol=1e-12)
+
+
+def test_rank_against_matches_appending_each_value():
+    rng = np.random.default_rng(9)
+    universe = rng.integers(-4, 4, 60).astype(float)
+    values = np.array([-10.0, -4.0, 0.0, 0.5, 3.0, 10.0])
+    got = rank_against(universe, values)
+    want = [pd.Series(np.append(universe, v)).rank(pct=True).iloc[-1] * 100 for v in values]
+    np.testing.assert_allclose(got, want)
+
+
+def test_rank_outsiders_matches_old_per_entry_rank(frames):
+    returns = compute_returns(build_panel(frames, "Close"), WINDOWS)
+    universe, outsiders = returns[returns["Ticker"] != "GAP"], returns[returns["Ticker"] == "GAP"]
+    table = rank_table(universe.reset_index(drop=True))
+    got = rank_outsiders(table, outsiders.reset_index(drop=True)).iloc[0]
+    want = reference_rank(pd.concat([universe, outsiders], ignore_index=True)).iloc[-1]
+    for column in ["1M_Rank", "3M_Rank", "6M_Rank", "RS_Score"]:
+        assert got[column] == pytest.approx(want[column])
@@ -0,0 +1,94 @@
+"""
+get_finviz_rs against a local http.server serving snapshot pages in the
+Finviz snapshot-table2 layout: parsed values, '%' stripping, missing
+fields, a 429 retried after Retry-After, and token-bucket pacing of
+every attempt (retries included).
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from rs_scraper_finviz import get_finviz_rs, parse_snapshot
+
+
+def snapshot_page(fields):
+    cells = "".join("<td>%s</td><td><b>%s</b></td>" % item for item in fields.items())
+    return ("<html><body><table class=\"snapshot-table2\"><tr>%s</tr></table>"
+            "</body></html>" % cells).encode()
+
+
+PAGES = {
+    "AAPL": snapshot_page({"Perf Week": "2.35%", "RSI (14)": "61.23"}),
+    "MSFT": snapshot_page({"Perf Week": "-1.10%", "RSI (14)": "48.70"}),
+    "NVDA": snapshot_page({"Perf Week": "5.00%"}),                  # no RSI row
+    "TSLA": snapshot_page({"Perf Week": "-", "RSI (14)": "-"}),     # Finviz blank
+    "AMD": snapshot_page({"Perf Week": "0.50%", "RSI (14)": "55.00"}),
+}
+THROTTLED_ONCE = {"AMD"}       # first request answers 429
+
+
+@pytest.fixture
+def finviz():
+    hits, throttled = [], set()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            ticker = parse_qs(urlparse(self.path).query)["t"][0]
+            with lock:
+                hits.append((time.monotonic(), ticker))
+                first = ticker in THROTTLED_ONCE and ticker not in throttled
+                throttled.add(ticker)
+            if first:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            body = PAGES.get(ticker)
+            self.send_response(200 if body else 404)
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d/quote.ashx" % server.server_address[1], hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_values_percent_and_missing_fields(finviz):
+    base_url, _ = finviz
+    tickers = ["AAPL", "MSFT", "NVDA", "TSLA", "ZZZZ"]
+    assert get_finviz_rs(tickers, base_url=base_url, rate=100, burst=10) == {"AAPL": 61.23, "MSFT": 48.70}
+    perf = get_finviz_rs(tickers, base_url=base_url, field="Perf Week", rate=100, burst=10)
+    assert perf == {"AAPL": 2.35, "MSFT": -1.10, "NVDA": 5.00}
+
+
+def test_429_is_retried(finviz):
+    base_url, hits = finviz
+    assert get_finviz_rs(["AMD"], base_url=base_url, rate=100, burst=10, backoff=0) == {"AMD": 55.0}
+    assert [t for _, t in hits] == ["AMD", "AMD"]
+
+
+def test_every_attempt_is_paced(finviz):
+    base_url, hits = finviz
+    rate = 20.0
+    result = get_finviz_rs(["AAPL", "MSFT", "AMD", "NVDA"], base_url=base_url,
+                           concurrency=4, rate=rate, burst=1, backoff=0)
+    assert result == {"AAPL": 61.23, "MSFT": 48.70, "AMD": 55.0}
+
+    times = sorted(t for t, _ in hits)
+    assert len(times) == 5                              # 4 tickers + the AMD retry
+    assert times[-1] - times[0] >= (len(times) - 1) / rate * 0.9
+
+
+def test_parse_snapshot_without_table():
+    assert parse_snapshot(b"<html><body>blocked</body></html>") is None
@@ -0,0 +1,35 @@
+"""
+TradeLog timestamps: one clock read per record, in New York time, for
+the console line, the .txt line and the JSON ts alike.
+"""
+
+import datetime
+
+from clock import NY_TZ, VirtualClock
+from tradelog import TradeLog, read_records
+
+
+class CountingClock(VirtualClock):
+    def __init__(self, start):
+        super().__init__(start)
+        self.reads = 0
+
+    def now(self, tz=NY_TZ):
+        self.reads += 1
+        return super().now(tz)
+
+
+def test_console_txt_and_json_share_the_ny_timestamp(tmp_path, capsys):
+    # 13:30 UTC is 09:30 in New York; the host's own timezone must not matter
+    clock = CountingClock(datetime.datetime(2025, 6, 2, 13, 30, tzinfo=datetime.timezone.utc))
+    log = TradeLog(str(tmp_path / "session.txt"), clock=clock)
+    log("AAPL filled at 190.12", "fill", symbol="AAPL")
+    log.event("heartbeat")
+    log.close()
+
+    assert clock.reads == 2
+    assert capsys.readouterr().out == "[09:30:00] AAPL filled at 190.12\n"
+    assert (tmp_path / "session.txt").read_text() == "[09:30:00] AAPL filled at 190.12\n"
+    records = read_records(str(tmp_path / "session.jsonl"))
+    assert [r["ts"] for r in records] == ["2025-06-02T09:30:00.000-04:00"] * 2
+    assert records[0]["symbol"] == "AAPL" and records[1]["event"] == "heartbeat"
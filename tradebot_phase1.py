@@ -1,94 +1,120 @@
-import pandas as pd
-import time
-from datetime import datetime
-from ib_insync import *
 import os
-from dotenv import load_dotenv
-import pytz
 import math
 
+from artifacts import read_artifact
+from execution import ExecutionEngine, FILLED
+from tradelog import TradeLog
+
 # === Top-level flag ===
 USE_ENV = "live"  # ⬅️ Change to "paper" for paper trading
-
-# === Load selected .env ===
-env_file = f".env.{USE_ENV}"
-load_dotenv(dotenv_path=env_file)
-
-# === Read from env ===
-KILL_SWITCH = os.getenv("KILL_SWITCH", "false").lower() == "true"
-IB_HOST = os.getenv("IB_HOST")
-IB_PORT = int(os.getenv("IB_PORT"))
-IB_CLIENT_ID = int(os.getenv("IB_CLIENT_ID"))
-ACCOUNT_ID = os.getenv("ACCOUNT_ID")
-
-print(f"🔧 Loaded config: {USE_ENV.upper()}")
-
-# === Connect ===
-ib = IB()
-ib.connect(IB_HOST, IB_PORT, clientId=IB_CLIENT_ID)
-print(f"✅ Connected to IB Gateway ({USE_ENV.upper()})")
-
-# === Wait until 10:00 AM EST ===
-nytz = pytz.timezone("America/New_York")
-while True:
-    now = datetime.now(nytz)
-    if now.hour > 10 or (now.hour == 10 and now.minute >= 0):
-        break
-    print(f"⏳ Waiting... Current time: {now.strftime('%H:%M:%S')}")
-    time.sleep(30)
-
-if not KILL_SWITCH:
-    print("⛔ Tradebot deactivated by kill switch.")
-    exit()
-
-# === Load Buy Alerts ===
-df = pd.read_csv("buyalert.csv").dropna(how='any')
-print(f"📊 Loaded {len(df)} stocks from buyalert.csv")
-executed_trades = 0
-
-for _, row in df.iterrows():
-    if executed_trades >= 2:
-        print("🚫 Max trades reached for today.")
-        break
-
-    ticker = row['Ticker']
-    buy_price = float(row['BuyPrice'])
-    stop_price = float(row['StopLossPrice'])
-    allocated = float(row['AllocatedAmount'])
-
-    contract = Stock(ticker, 'SMART', 'USD')
-    market_data = ib.reqMktData(contract, snapshot=True, regulatorySnapshot=True)
-    ib.sleep(2)
-
-    if market_data.last == 0.0 or math.isnan(market_data.last):
-        print(f"⚠️ No price for {ticker}")
-        continue
-
-    price = market_data.last
-    print(f"📈 {ticker}: market price = {price}")
-
-    if price > buy_price and price <= buy_price * 1.01:
-        quantity = int(allocated // price)
-        if quantity == 0:
-            print(f"⚠️ Insufficient funds for {ticker}")
-            continue
-
-        # Submit market order with attached stop-loss
-        order = MarketOrder('BUY', quantity)
-        trade = ib.placeOrder(contract, order)
-        ib.sleep(2)
-        if trade.orderStatus.status != 'Filled':
-            print(f"❌ Order for {ticker} not filled.")
+REQUIRED_ENV = ("IB_HOST", "IB_PORT", "IB_CLIENT_ID")
+
+def load_config(use_env=USE_ENV):
+    """Loads .env.<use_env> and reads the connection settings."""
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=f".env.{use_env}")
+    missing = [name for name in REQUIRED_ENV if not os.getenv(name)]
+    if missing:
+        raise SystemExit(f"⛔ Missing {', '.join(missing)} in .env.{use_env}")
+    return {
+        "KILL_SWITCH": os.getenv("KILL_SWITCH", "false").lower() == "true",
+        "IB_HOST": os.getenv("IB_HOST"),
+        "IB_PORT": int(os.getenv("IB_PORT")),
+        "IB_CLIENT_ID": int(os.getenv("IB_CLIENT_ID")),
+        "ACCOUNT_ID": os.getenv("ACCOUNT_ID"),
+    }
+
+LOG_FILE = "tradebot_phase1_log_%s.txt"   # % session date (engine clock)
+MAX_TRADES = 2
+FILL_TIMEOUT = 2    # seconds a market order gets to fill
+
+async def session(engine, config, log):
+    from ib_insync import MarketOrder, Stock, StopOrder
+
+    # === Connect ===
+    await engine.connect()
+    log(f"✅ Connected to IB Gateway ({USE_ENV.upper()})", "connected")
+
+    # === Wait until 10:00 AM EST ===
+    now = engine.clock.now()
+    start = now.replace(hour=10, minute=0, second=0, microsecond=0)
+    if now < start:
+        log(f"⏳ Waiting... Current time: {now.strftime('%H:%M:%S')}", "wait", until=start.isoformat())
+        await engine.clock.sleep_until(start)
+
+    if not config["KILL_SWITCH"]:
+        log("⛔ Tradebot deactivated by kill switch.", "kill_switch")
+        return
+
+    # === Load Buy Alerts ===
+    df = read_artifact("buyalert", "buyalert.csv").dropna(how='any')
+    log(f"📊 Loaded {len(df)} stocks from buyalert.csv", "loaded", rows=len(df))
+
+    # === Price check: one snapshot round trip for the whole buy list ===
+    contracts = {ticker: Stock(ticker, 'SMART', 'USD') for ticker in df['Ticker']}
+    prices = await engine.quotes(contracts, timeout=5, regulatory=True)
+
+    candidates = []
+    for _, row in df.iterrows():
+        ticker = row['Ticker']
+        buy_price = float(row['BuyPrice'])
+        stop_price = float(row['StopLossPrice'])
+        allocated = float(row['AllocatedAmount'])
+
+        price = prices.at[ticker, 'Last']
+        if price == 0.0 or math.isnan(price):
+            log(f"⚠️ No price for {ticker}", "no_price", symbol=ticker)
             continue
-
-        filled_price = trade.orderStatus.avgFillPrice
-        print(f"✅ {ticker} bought @ {filled_price} x {quantity}")
-
-        # Place Stop Loss
-        stop_order = StopOrder('SELL', quantity, stop_price, parentId=trade.order.permId)
-        ib.placeOrder(contract, stop_order)
-
-        executed_trades += 1
-    else:
-        print(f"⏭️ {ticker} skipped (not in breakout zone)")
-print("🏁 Trading session completed.")
\ No newline at end of file
+        log(f"📈 {ticker}: market price = {price}", "quote", symbol=ticker, price=price, buy_price=buy_price)
+
+        if price > buy_price and price <= buy_price * 1.01:
+            quantity = int(allocated // price)
+            if quantity == 0:
+                log(f"⚠️ Insufficient funds for {ticker}", "skip", symbol=ticker, reason="insufficient funds")
+                continue
+            candidates.append((ticker, quantity, stop_price))
+        else:
+            log(f"⏭️ {ticker} skipped (not in breakout zone)", "skip", symbol=ticker, price=price,
+                reason="not in breakout zone")
+
+    # === Submit market orders for the open slots, fills awaited together ===
+    executed_trades = 0
+    while candidates and executed_trades < MAX_TRADES:
+        slots = MAX_TRADES - executed_trades
+        batch, candidates = candidates[:slots], candidates[slots:]
+        orders = [(engine.submit(ticker, contracts[ticker], MarketOrder('BUY', quantity)), quantity, stop_price)
+                  for ticker, quantity, stop_price in batch]
+        await engine.wait_all([order for order, _, _ in orders], timeout=FILL_TIMEOUT)
+
+        for order, quantity, stop_price in orders:
+            ticker = order.symbol
+            if order.state != FILLED:
+                log(f"❌ Order for {ticker} not filled.", "entry_ended", symbol=ticker, state=order.state,
+                    order_id=order.trade.order.orderId)
+                continue
+            log(f"✅ {ticker} bought @ {order.fill_price} x {quantity}", "fill", symbol=ticker,
+                price=order.fill_price, qty=quantity, order_id=order.trade.order.orderId)
+
+            # Place Stop Loss
+            stop_order = StopOrder('SELL', quantity, stop_price, parentId=order.trade.order.permId)
+            engine.submit(ticker, contracts[ticker], stop_order)
+            executed_trades += 1
+
+    if candidates:
+        log("🚫 Max trades reached for today.", "max_positions")
+    log("🏁 Trading session completed.", "session_end")
+
+def main():
+    config = load_config()
+    engine = ExecutionEngine(client_id=config["IB_CLIENT_ID"], host=config["IB_HOST"], port=config["IB_PORT"])
+    log = TradeLog(LOG_FILE % engine.clock.now().date(), clock=engine.clock)
+    engine.log = log
+    log(f"🔧 Loaded config: {USE_ENV.upper()}", "config", env=USE_ENV)
+    try:
+        engine.run(session(engine, config, log))
+    finally:
+        engine.close()
+        log.close()
+
+if __name__ == "__main__":
+    main()
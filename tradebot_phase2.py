@@ -5,19 +5,43 @@ TradeBot Bridge (Bracket Orders + Safe Reconnect + Auto Cancel)
 ---------------------------------------------------------------
 - Loads decision_summary.json + position_sizing_output.csv
 - Waits until 30 minutes after NYSE open (New York time)
+- Resolves contracts before the wait: conIds come from contract_cache.json,
+  uncached symbols are qualified in one batch; unknown/ambiguous ones are
+  reported up front
 - Connects only after wait (avoids pre-market disconnect)
+- Runs on the asyncio ExecutionEngine (execution.py): no blocking sleeps,
+  order-status updates are processed throughout the session
 - Places StopLimit BUY with linked Stop SELL (GTC)
-- Keeps heartbeat & reconnects if socket drops
-- Cancels all unfilled entries 10 min before close
-- Logs all actions in ASCII (Windows-safe)
+- Streams quotes: subscribes once and places each entry from the
+  pendingTickersEvent callback as soon as its trigger is met
+- Each fill is awaited on its own TrackedOrder
+- Keeps heartbeat & reconnects if socket drops (engine tasks)
+- Cancels all unfilled entries 10 min before close (engine timer)
+- All time logic (post-open wait, 15:50 cancel, close, log timestamps)
+  reads one injectable clock, so a session can replay on virtual time
+- Logs all actions in ASCII (Windows-safe) through tradelog.TradeLog:
+  console lines as before, plus tradebot_log_<date>.jsonl records
+  (event, symbol, prices, order ids) written by a background thread;
+  <date> is the session clock's NY date, so a replay never touches the
+  live day's files
+- Times the hot path per symbol (quote -> decision -> submit -> ack ->
+  fill, plus event-loop lag) and writes p50/p95/p99 to
+  tradebot_metrics_<date>.json next to the log
 
 Requires:  pip install ib_insync
 """
 
-from ib_insync import *
-import pandas as pd
-import json, time, datetime, os
+import asyncio, json, datetime, os
 from zoneinfo import ZoneInfo
+from clock import WallClock
+from execution import HEARTBEAT_SECS, IB_HOST, IB_PORT, ExecutionEngine, WORKING
+from ib_utils import CONTRACT_CACHE, cached_contracts, qualify_stocks_async, ticker_price
+from artifacts import read_artifact, validate, validate_decision
+from latency import ALL, LatencyRecorder
+from tradelog import TradeLog
+from lazy_imports import lazy_import
+
+ib_insync = lazy_import("ib_insync")
 
 # === Configuration ===
 MAX_POSITIONS = 2
@@ -25,151 +49,300 @@ NY_TZ = ZoneInfo("America/New_York")
 MARKET_OPEN = datetime.time(9, 30, tzinfo=NY_TZ)
 MARKET_CLOSE = datetime.time(16, 0, tzinfo=NY_TZ)
 ENTRY_BUFFER = 0.005   # +0.5%
-LOG_FILE = "tradebot_log_%s.txt" % datetime.date.today()
+LOG_FILE = "tradebot_log_%s.txt"            # % session date (NY, on the session clock)
+METRICS_FILE = "tradebot_metrics_%s.json"
+SIZING_FILE = "position_sizing_output.csv"
+DECISION_FILE = "decision_summary.json"
+LOG_DIR = "."           # replaced by main(log_dir=...); fake_ib sends replays to a scratch dir
+LOOP_LAG_SECS = 1.0    # event-loop lag sampling interval
+CLOCK = WallClock()     # replaced by main(clock=...) for simulated sessions
+TRADE_LOG = None        # opened by main(); log() opens one on first use otherwise
+
+def session_file(template, clock=None):
+    """LOG_DIR/template named after the session clock's NY date (a replay logs under its own day)."""
+    return os.path.join(LOG_DIR, template % now_ny(clock).date())
 
-def log(msg):
-    ts = datetime.datetime.now().strftime("[%H:%M:%S]")
-    line = "%s %s" % (ts, msg)
-    print(line)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
+def open_log(clock):
+    global TRADE_LOG
+    if TRADE_LOG is not None:
+        TRADE_LOG.close()
+    TRADE_LOG = TradeLog(session_file(LOG_FILE, clock), clock=clock)
+    return TRADE_LOG
 
-def now_ny():
-    return datetime.datetime.now(tz=NY_TZ)
+def log(msg, event="log", **fields):
+    """Console line + queued JSON record (see tradelog.py); never blocks on disk."""
+    (TRADE_LOG or open_log(CLOCK))(msg, event, **fields)
 
-def wait_until_market_ready():
-    now = now_ny()
+def now_ny(clock=None):
+    return (clock or CLOCK).now(NY_TZ)
+
+async def wait_until_market_ready(clock):
+    now = now_ny(clock)
     open_dt = now.replace(hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute,
                           second=0, microsecond=0)
     ready_dt = open_dt + datetime.timedelta(minutes=30)
     if now < ready_dt:
         wait = (ready_dt - now).total_seconds()
         log("Waiting %d minutes until 30 minutes post-open (NY %s)..." %
-            (int(wait/60), ready_dt.time()))
-        time.sleep(wait)
+            (int(wait/60), ready_dt.time()), "wait", until=ready_dt.isoformat())
+        await clock.sleep(wait)
     else:
         log("Market already past 30-minute buffer (NY) starting now.")
 
-def ensure_connection(ib, client_id):
-    """Reconnect if IB socket dropped."""
-    if not ib.isConnected():
+def place_bracket(engine, sym, contract, row):
+    """Parent StopLimit BUY + Child Stop SELL (GTC). Returns the parent TrackedOrder."""
+    stop_price = float(row["EntryPrice"])
+    limit_price = round(stop_price * (1 + ENTRY_BUFFER), 2)
+    qty = int(row["PositionSize"])
+    stop_loss_price = float(row["StopLoss"])
+
+    parent = ib_insync.StopLimitOrder("BUY", qty, limit_price, stop_price)
+    parent.tif = "DAY"
+    child = ib_insync.StopOrder("SELL", qty, stop_loss_price, tif="GTC")
+    order = engine.submit_bracket(sym, contract, parent, child)
+
+    log("Placed StopLimit BUY + Stop SELL(GTC) for %s | Qty %d Stop %.2f Limit %.2f SL %.2f"
+        % (sym, qty, stop_price, limit_price, stop_loss_price), "bracket", symbol=sym, qty=qty,
+        stop=stop_price, limit=limit_price, stop_loss=stop_loss_price,
+        order_id=parent.orderId, child_ids=[child.orderId])
+    return order
+
+def entry_triggered(last, row):
+    """Entry is armed while price is still below the breakout stop."""
+    return last < float(row["EntryPrice"])
+
+def close_warning_time(now):
+    return datetime.datetime.combine(now.date(),
+           (datetime.datetime.min + datetime.timedelta(hours=15, minutes=50)).time(),
+           tzinfo=NY_TZ)
+
+def market_close_time(now):
+    return datetime.datetime.combine(now.date(), MARKET_CLOSE.replace(tzinfo=None), tzinfo=NY_TZ)
+
+class Phase2Strategy:
+    """
+    Keeps one market-data subscription per candidate and reacts to
+    pendingTickersEvent: each bracket is placed as soon as its trigger is
+    met and its fill is awaited in its own task. Engine timers handle the
+    pre-close cancel and the market close.
+    """
+
+    def __init__(self, engine, contracts, latency=None):
+        self.engine = engine
+        self.ib = engine.ib
+        self.contracts = contracts
+        self.latency = latency if latency is not None else LatencyRecorder(engine.clock.monotonic)
+        self.open_trades = {}
+        self.subscribed = set()
+        self.active_positions = 0
+        self.entries_closed = False
+        self.finished = asyncio.Event()
+
+    def subscribe(self):
+        for sym, (contract, row) in self.contracts.items():
+            if sym not in self.open_trades and sym not in self.subscribed:
+                self.ib.reqMktData(contract, "", False, False)
+                self.subscribed.add(sym)
+        log("Streaming quotes for %d symbols." % len(self.subscribed), "subscribe",
+            symbols=sorted(self.subscribed))
+
+    def resubscribe(self):
+        """Subscriptions do not survive a dropped socket."""
+        self.subscribed.clear()
+        if not self.entries_closed:
+            self.subscribe()
+
+    def unsubscribe(self, sym=None):
+        for s in ([sym] if sym else list(self.subscribed)):
+            self.ib.cancelMktData(self.contracts[s][0])
+            self.subscribed.discard(s)
+
+    def on_pending_tickers(self, tickers):
+        if self.entries_closed:
+            return
+        latency = self.latency
+        t_quote = latency.now()
+        for ticker in tickers:
+            sym = ticker.contract.symbol
+            if sym in self.open_trades or sym not in self.contracts:
+                continue
+            if ticker.time is not None:
+                latency.record(sym, "quote_age", (self.engine.clock.now() - ticker.time).total_seconds())
+            last = ticker_price(ticker)
+            contract, row = self.contracts[sym]
+            triggered = last is not None and entry_triggered(last, row)
+            t_decided = latency.now()
+            latency.record(sym, "decision", t_decided - t_quote)
+            if not triggered:
+                continue
+
+            order = place_bracket(self.engine, sym, contract, row)
+            t_submitted = latency.now()
+            latency.record(sym, "submit", t_submitted - t_decided)
+            latency.record(sym, "quote_to_submit", t_submitted - t_quote)
+            latency.mark(sym, "submit", t_submitted)
+            self.open_trades[sym] = order
+            self.unsubscribe(sym)
+            self.engine.spawn(self.await_fill(order))
+
+    async def await_fill(self, order):
+        if await order.wait((WORKING,)) == WORKING:
+            self.latency.since(order.symbol, "ack", "submit")
+        if not await order.wait_filled():
+            log("%s entry ended %s." % (order.symbol, order.state), "entry_ended",
+                symbol=order.symbol, state=order.state, order_id=order.trade.order.orderId)
+            return
+        self.latency.since(order.symbol, "submit_to_fill", "submit")
+        self.active_positions += 1
+        log("%s filled at %.2f - protective stop active." % (order.symbol, order.fill_price), "fill",
+            symbol=order.symbol, price=order.fill_price, order_id=order.trade.order.orderId,
+            qty=order.trade.orderStatus.filled)
+        self.open_trades.pop(order.symbol, None)
+        if self.active_positions >= MAX_POSITIONS and not self.finished.is_set():
+            log("Two positions filled - stopping new entries.", "max_positions")
+            self.entries_closed = True
+            self.finished.set()
+
+    def on_close_warning(self):
+        # Auto-cancel all unfilled entries 10 min before close
+        self.entries_closed = True
+        self.unsubscribe()
+        log("10 min before close - canceling all unfilled entries.", "close_warning")
+        for order in self.engine.cancel_unfilled(list(self.open_trades.values())):
+            log("Canceled entry for %s" % order.symbol, "cancel",
+                symbol=order.symbol, order_id=order.trade.order.orderId)
+
+    def on_market_close(self):
+        log("Market close reached - disconnecting.", "market_close")
+        self.finished.set()
+
+    async def run(self):
+        now = now_ny(self.engine.clock)
+        self.ib.pendingTickersEvent += self.on_pending_tickers
+        self.engine.on_reconnect.append(self.resubscribe)
+        self.engine.call_at(close_warning_time(now), self.on_close_warning)
+        self.engine.call_at(market_close_time(now), self.on_market_close)
+        self.engine.spawn(self.latency.watch_loop(self.engine.clock, LOOP_LAG_SECS))
+        self.subscribe()
         try:
-            ib.disconnect()
-            ib.connect("127.0.0.1", 7497, clientId=client_id)
-            log("Reconnected to IB Gateway.")
+            await self.finished.wait()
+        finally:
+            self.ib.pendingTickersEvent -= self.on_pending_tickers
+            if self.ib.isConnected():
+                self.unsubscribe()
+
+async def prepare_contracts(df, client_id, ib=None, cache_path=CONTRACT_CACHE):
+    """
+    {symbol: (contract, row)} for every row of the sizing file. Symbols
+    missing from the conId cache (cache_path) are qualified in one
+    concurrent batch over a short pre-wait connection; unknown/ambiguous
+    ones are reported and dropped here, before the session starts.
+    """
+    symbols = df["Symbol"].tolist()
+    resolved, missing = cached_contracts(symbols, path=cache_path)
+    problems = {}
+    if missing:
+        log("Qualifying %d uncached symbols: %s" % (len(missing), ", ".join(missing)))
+        ib = ib if ib is not None else ib_insync.IB()
+        try:
+            await ib.connectAsync(IB_HOST, IB_PORT, clientId=client_id)
+            resolved, problems = await qualify_stocks_async(ib, symbols, path=cache_path)
         except Exception as e:
-            log("Reconnect failed: %s" % e)
+            log("Contract qualification failed: %s" % e, "error")
+            problems = {sym: "not qualified" for sym in missing}
+        finally:
+            ib.disconnect()
+    else:
+        log("All %d contracts resolved from cache." % len(resolved))
 
-def main():
-    # --- Load decision & positions ---
-    decision = json.load(open("decision_summary.json"))
-    df = pd.read_csv("position_sizing_output.csv")
+    for sym, reason in problems.items():
+        log("Skipping %s: %s" % (sym, reason), "skip", symbol=sym, reason=reason)
 
-    phase = decision["phase"]
-    market = decision["market"]
-    portfolio_value = decision["portfolio_value"]
+    contracts = {}
+    for _, row in df.iterrows():
+        sym = row["Symbol"]
+        if sym in resolved:
+            contracts[sym] = (resolved[sym], row)
+    return contracts
 
-    log("=== TradeBot Bridge started | Phase %d | Market: %s | Portfolio: $%.2f ===" %
-        (phase, market, portfolio_value))
+def write_metrics(latency, phase):
+    """Saves the session's latency summary and logs the headline spans."""
+    path = session_file(METRICS_FILE)
+    try:
+        summary = latency.write(path, session=str(now_ny().date()), phase=phase)
+    except OSError as e:
+        log("Could not write %s: %s" % (path, e), "error")
+        return
+    for span in ("decision", "quote_to_submit", "ack", "submit_to_fill"):
+        stats = summary.get(ALL, {}).get(span)
+        if stats:
+            log("Latency %s: n=%d p50 %.3f ms | p95 %.3f ms | p99 %.3f ms" %
+                (span, stats["count"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]),
+                "latency", span=span, **{k: v for k, v in stats.items() if k != "hist"})
+    log("Latency metrics saved to %s" % path)
+
+async def run_session(engine, df, phase, contract_cache=CONTRACT_CACHE):
+    # --- Resolve contracts BEFORE the wait (cache first, one batch for the rest) ---
+    contracts = await prepare_contracts(df, phase, engine.ib, contract_cache)
+    if not contracts:
+        log("No tradable symbols - exiting.")
+        return
 
     # --- Wait until 30 minutes after open ---
-    wait_until_market_ready()
+    await wait_until_market_ready(engine.clock)
 
     # --- Connect to IB Gateway AFTER wait ---
-    ib = IB()
     try:
-        ib.connect("127.0.0.1", 7497, clientId=phase)
-        log("Connected to IB Gateway.")
+        await engine.connect()
+        log("Connected to IB Gateway.", "connected")
     except Exception as e:
-        log("Connection error: %s" % e)
+        log("Connection error: %s" % e, "error")
         return
 
-    # --- Prepare contracts ---
-    contracts = {}
-    for _, row in df.iterrows():
-        sym = row["Symbol"]
-        c = Stock(sym, "SMART", "USD")
-        ib.qualifyContracts(c)
-        contracts[sym] = (c, row)
+    strategy = Phase2Strategy(engine, contracts)
+    try:
+        await strategy.run()
+    finally:
+        engine.close()
+        write_metrics(strategy.latency, phase)
+    log("TradeBot Bridge session complete.", "session_end")
 
-    active_positions = 0
-    open_trades = {}
-    canceled_for_close = False
+def main(ib=None, clock=None, df=None, decision=None, contract_cache=CONTRACT_CACHE, log_dir=".",
+         sizing_file=SIZING_FILE, decision_file=DECISION_FILE):
+    """
+    ib / clock default to a live IB() and the wall clock (fake_ib.py injects
+    both). df / decision default to the contents of sizing_file and
+    decision_file (pipeline.py hands them over in memory). contract_cache is the conId
+    cache file and log_dir the directory of the log / metrics files;
+    simulated sessions point both away from the live ones.
+    """
+    global CLOCK, LOG_DIR
+    CLOCK = clock if clock is not None else WallClock()
+    LOG_DIR = log_dir
+    trade_log = open_log(CLOCK)
 
-    while True:
-        now = now_ny()
+    # --- Load decision & positions ---
+    # Both fail fast on a missing key/column (e.g. StopLoss), before any connection
+    if decision is None:
+        with open(decision_file, encoding="utf-8") as f:
+            decision = json.load(f)
+    decision = validate_decision(decision)
+    df = read_artifact("sizing", sizing_file) if df is None else validate(df, "sizing")
 
-        # Auto-cancel all unfilled entries 10 min before close
-        close_warn = datetime.datetime.combine(now.date(),
-                     (datetime.datetime.min + datetime.timedelta(hours=15, minutes=50)).time(),
-                     tzinfo=NY_TZ)
-        if now >= close_warn and not canceled_for_close:
-            log("10 min before close - canceling all unfilled entries.")
-            for sym, trade in open_trades.items():
-                if trade.orderStatus.status not in ("Filled", "Cancelled"):
-                    ib.cancelOrder(trade.order)
-                    log("Canceled entry for %s" % sym)
-            canceled_for_close = True
-
-        if now.time() >= MARKET_CLOSE:
-            log("Market close reached - disconnecting.")
-            break
-
-        ensure_connection(ib, phase)
-
-        if active_positions >= MAX_POSITIONS:
-            log("Two positions filled - stopping new entries.")
-            break
-
-        for sym, (contract, row) in contracts.items():
-            if sym in open_trades or canceled_for_close:
-                continue
+    phase = decision["phase"]
+    market = decision["market"]
+    portfolio_value = decision["portfolio_value"]
 
-            ticker = ib.reqMktData(contract, "", False, False)
-            ib.sleep(2)
-            last = ticker.last if ticker.last else ticker.marketPrice()
-            ib.cancelMktData(contract)
-            if not last or last <= 0:
-                continue
+    log("=== TradeBot Bridge started | Phase %d | Market: %s | Portfolio: $%.2f ===" %
+        (phase, market, portfolio_value), "session_start",
+        phase=phase, market=market, portfolio=portfolio_value)
 
-            stop_price = float(row["EntryPrice"])
-            limit_price = round(stop_price * (1 + ENTRY_BUFFER), 2)
-            qty = int(row["PositionSize"])
-            stop_loss_price = float(row["StopLoss"])
-
-            # Parent StopLimit BUY + Child Stop SELL (GTC)
-            if last < stop_price:
-                parent = StopLimitOrder("BUY", qty, stop_price, limit_price)
-                parent.tif = "DAY"
-                parent.transmit = False
-
-                child = StopOrder("SELL", qty, stop_loss_price, tif="GTC")
-                child.parentId = parent.orderId
-                child.transmit = True
-
-                ib.placeOrder(contract, parent)
-                ib.placeOrder(contract, child)
-
-                open_trades[sym] = parent
-                log("Placed StopLimit BUY + Stop SELL(GTC) for %s | Qty %d Stop %.2f Limit %.2f SL %.2f"
-                    % (sym, qty, stop_price, limit_price, stop_loss_price))
-                time.sleep(1)
-
-        # --- Check fills & heartbeat ---
-        for sym, trade in list(open_trades.items()):
-            ib.sleep(1)
-            status = trade.orderStatus.status
-            if status == "Filled":
-                active_positions += 1
-                price = trade.orderStatus.avgFillPrice
-                log("%s filled at %.2f - protective stop active." % (sym, price))
-                open_trades.pop(sym)
-
-        ib.reqCurrentTime()     # keep socket alive
-        time.sleep(30)
-
-    ib.disconnect()
-    log("TradeBot Bridge session complete.")
+    engine = ExecutionEngine(ib=ib, clock=CLOCK, client_id=phase, host=IB_HOST, port=IB_PORT, log=log,
+                             heartbeat_secs=HEARTBEAT_SECS)
+    try:
+        engine.run(run_session(engine, df, phase, contract_cache))
+    finally:
+        trade_log.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,121 @@
+"""
+Structured Trade Log (shared by the tradebot scripts)
+---------------------------------------------------------------
+- Every log call becomes one record (ts, event, msg, symbol, prices,
+  order ids, ...) that is printed to the console right away and handed
+  to a background writer thread through a queue; the caller never
+  touches the disk
+- The writer drains the queue in batches (up to BATCH_SIZE records or
+  FLUSH_SECS after the first one) and flushes each batch once to:
+    <name>.jsonl  one JSON object per line, for post-session analysis
+    <name>.txt    the same "[HH:MM:SS] msg" lines as the console
+- Timestamps come from an injectable clock, so simulated sessions log
+  simulated time; the clock is read once per record, in New York time,
+  for the JSON ts and the console / .txt line alike (whatever the host's
+  timezone)
+- close() (also registered with atexit) writes whatever is still queued
+
+Example:
+    log = TradeLog("tradebot_log_2025-01-02.txt", clock=clock)
+    log("Connected to IB Gateway.")
+    log("AAPL filled at 190.12", event="fill", symbol="AAPL", price=190.12, order_id=17)
+    log.close()
+
+    records = read_records("tradebot_log_2025-01-02.jsonl")
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+from clock import NY_TZ, WallClock
+
+BATCH_SIZE = 256       # records per write/flush
+FLUSH_SECS = 0.5       # longest a record waits in the queue
+_STOP = object()
+
+
+class TradeLog:
+    """Callable logger: log(msg, event="log", **fields)."""
+
+    def __init__(self, text_path, json_path=None, clock=None, console=True,
+                 batch_size=BATCH_SIZE, flush_secs=FLUSH_SECS):
+        self.text_path = text_path
+        self.json_path = json_path or os.path.splitext(text_path)[0] + ".jsonl"
+        self.clock = clock if clock is not None else WallClock()
+        self.console = console
+        self.batch_size = batch_size
+        self.flush_secs = flush_secs
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="tradelog-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def __call__(self, msg, event="log", **fields):
+        self.event(event, msg, **fields)
+
+    def event(self, event, msg=None, **fields):
+        """Logs one record; msg (if any) is also printed."""
+        now = self.clock.now(NY_TZ)
+        line = None
+        if msg is not None:
+            line = "%s %s" % (now.strftime("[%H:%M:%S]"), msg)
+            if self.console:
+                print(line)
+        if self._closed:
+            return
+        record = {"ts": now.isoformat(timespec="milliseconds"), "event": event}
+        if msg is not None:
+            record["msg"] = msg
+        record.update(fields)
+        self._queue.put((record, line))
+
+    def close(self):
+        """Writes the remaining records and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        atexit.unregister(self.close)
+
+    # --- Writer thread ---
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_secs
+        while batch[-1] is not _STOP and len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        with open(self.json_path, "a", encoding="utf-8") as jf, \
+             open(self.text_path, "a", encoding="utf-8") as tf:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                for record, line in batch:
+                    jf.write(json.dumps(record, default=str) + "\n")
+                    if line is not None:
+                        tf.write(line + "\n")
+                jf.flush()
+                tf.flush()
+                if stop:
+                    return
+
+
+def read_records(path):
+    """Every record of a .jsonl trade log, in order."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]